@@ -609,7 +609,13 @@ col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
 with col1:
     st.markdown(f'<p style="color: rgba(255,255,255,0.6); font-size: 0.95rem; margin-top: 15px;">🕐 Last Updated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</p>', unsafe_allow_html=True)
 with col2:
-    pass  # Spacer
+    # Liveness probe: answered from memory by the backend
+    try:
+        import requests
+        backend_up = requests.head("http://localhost:8000/healthz", timeout=1).status_code == 200
+    except Exception:
+        backend_up = False
+    st.markdown(f'<p style="color: rgba(255,255,255,0.6); font-size: 0.95rem; margin-top: 15px;">{"🟢 Backend online" if backend_up else "🔴 Backend offline"}</p>', unsafe_allow_html=True)
 with col3:
     if st.button("🔄 Refresh Data", use_container_width=True, key="refresh_btn"):
         st.rerun()
@@ -809,6 +815,52 @@ with tab3:
                 """, unsafe_allow_html=True)
         else:
             st.info("No data available for perfect levels leaderboard")
+    
+    # Live feed from the backend's Server-Sent Events stream (needs `manage.py runasgi`)
+    st.markdown('<h3 style="color: #4facfe; font-size: 1.5rem; margin: 30px 0 20px;">📡 Live Feed</h3>', unsafe_allow_html=True)
+    watch_seconds = st.slider("Watch for (seconds)", 15, 300, 60, step=15, key="live_feed_seconds")
+    if st.button("📡 Watch Live", key="live_feed_watch"):
+        live_col1, live_col2 = st.columns(2)
+        with live_col1:
+            board_placeholder = st.empty()
+        with live_col2:
+            activity_placeholder = st.empty()
+        
+        def render_live(top, activity):
+            board_placeholder.markdown("**🏆 Leaderboard**\n\n" + ("\n".join(
+                f"{rank}. **{row['username']}** - {row['final_score']} pts ({row['total_time']:.0f}s)"
+                for rank, row in enumerate(top, start=1)
+            ) or "_No entries yet_"))
+            activity_placeholder.markdown("**⚡ Recent Completions**\n\n" + ("\n".join(
+                f"- **{item['username']}** cleared level {item['level_number'] + 1} ({item['difficulty']}, +{item['points_earned']})"
+                for item in activity
+            ) or "_No completions yet_"))
+        
+        try:
+            import requests
+            top, activity, event = [], [], None
+            deadline = time.time() + watch_seconds
+            # The server sends a keepalive comment at least every 15 seconds
+            with requests.get("http://localhost:8000/api/auth/stream/leaderboard/", stream=True, timeout=(5, 30)) as response:
+                response.raise_for_status()
+                for line in response.iter_lines(decode_unicode=True):
+                    if time.time() > deadline:
+                        break
+                    if line.startswith("event: "):
+                        event = line[len("event: "):]
+                    elif line.startswith("data: "):
+                        data = json.loads(line[len("data: "):])
+                        if event == "snapshot":
+                            top, activity = data['leaderboard'], data['activity']
+                        elif event == "leaderboard" and data['rank']:
+                            top.insert(data['rank'] - 1, data['entry'])
+                            del top[10:]
+                        elif event == "level_completed":
+                            activity = [data] + activity[:19]
+                        render_live(top, activity)
+            st.success("✅ Live feed finished")
+        except Exception as e:
+            st.warning(f"⚠️ Live feed unavailable (is the backend running under ASGI?): {str(e)}")
 
 # TAB 4: User Details
 with tab4:
@@ -1232,7 +1284,11 @@ with tab6:
                 # Load questions from database
                 try:
                     import requests
-                    response = requests.get("http://localhost:8000/api/auth/questions/", timeout=5)
+                    response = requests.get(
+                        "http://localhost:8000/api/auth/questions/",
+                        headers={"Authorization": f"Token {st.session_state.django_token}"},
+                        timeout=5
+                    )
                     if response.status_code == 200:
                         questions_data = response.json().get('questions', [])
                         if questions_data:
@@ -1345,7 +1401,11 @@ with tab6:
                 # First, get list of existing questions
                 try:
                     import requests
-                    response = requests.get("http://localhost:8000/api/auth/questions/", timeout=5)
+                    response = requests.get(
+                        "http://localhost:8000/api/auth/questions/",
+                        headers={"Authorization": f"Token {st.session_state.django_token}"},
+                        timeout=5
+                    )
                     if response.status_code == 200:
                         questions_data = response.json().get('questions', [])
                         if questions_data:
@@ -1446,7 +1506,11 @@ with tab6:
                 # Get list of existing questions
                 try:
                     import requests
-                    response = requests.get("http://localhost:8000/api/auth/questions/", timeout=5)
+                    response = requests.get(
+                        "http://localhost:8000/api/auth/questions/",
+                        headers={"Authorization": f"Token {st.session_state.django_token}"},
+                        timeout=5
+                    )
                     if response.status_code == 200:
                         questions_data = response.json().get('questions', [])
                         if questions_data:
@@ -1563,7 +1627,41 @@ with tab7:
             st.success("✅ Authenticated with Django backend")
             st.markdown("---")
             
-            # Load level progress data from backend
+            # Filters are applied by the backend, which returns one page at a time
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                level_filter = st.selectbox("📍 Filter by Level", ["All"] + list(range(0, 7)))
+            with col2:
+                user_filter = st.text_input("👤 Filter by Username (prefix)", "")
+            with col3:
+                difficulty_filter = st.selectbox("🎯 Filter by Difficulty", ["All", "easy", "medium", "hard"])
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                completed_from = st.date_input("📅 Completed From", value=None)
+            with col2:
+                completed_to = st.date_input("📅 Completed To", value=None)
+            with col3:
+                page_size = st.selectbox("📄 Rows per Page", [50, 100, 200, 500], index=1)
+            
+            progress_params = {"limit": page_size}
+            if level_filter != "All":
+                progress_params["level"] = level_filter
+            if user_filter.strip():
+                progress_params["username"] = user_filter.strip()
+            if difficulty_filter != "All":
+                progress_params["difficulty"] = difficulty_filter
+            if completed_from:
+                progress_params["completed_from"] = completed_from.isoformat()
+            if completed_to:
+                progress_params["completed_to"] = completed_to.isoformat()
+            
+            # Cursors of the pages visited so far; restart when the filters change
+            if st.session_state.get("progress_filters") != progress_params:
+                st.session_state.progress_filters = progress_params
+                st.session_state.progress_cursors = [None]
+            progress_cursors = st.session_state.progress_cursors
+            
+            # Load the visible page of level progress from the backend
             try:
                 import requests
                 
@@ -1571,32 +1669,18 @@ with tab7:
                 headers = {
                     "Authorization": f"Token {st.session_state.django_token}"
                 }
-                response = requests.get("http://localhost:8000/api/auth/game/progress/all/", headers=headers, timeout=5)
+                page_params = dict(progress_params)
+                if progress_cursors[-1]:
+                    page_params["cursor"] = progress_cursors[-1]
+                response = requests.get("http://localhost:8000/api/auth/game/progress/", headers=headers, params=page_params, timeout=5)
                 
                 if response.status_code == 200:
-                    progress_data = response.json().get('progress', [])
+                    progress_page = response.json()
+                    progress_data = progress_page.get('progress', [])
+                    next_cursor = progress_page.get('next_cursor')
                     if progress_data:
                         # Convert to DataFrame for display
-                        import pandas as pd
-                        progress_df = pd.DataFrame(progress_data)
-                        
-                        # Display filters
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            # Get unique levels for filter
-                            if 'level_number' in progress_df.columns:
-                                level_filter = st.selectbox("📍 Filter by Level", ["All"] + sorted(progress_df['level_number'].unique().tolist()))
-                            else:
-                                level_filter = "All"
-                        with col2:
-                            user_filter = st.text_input("👤 Filter by Username", "")
-                        
-                        # Apply filters
-                        filtered_df = progress_df.copy()
-                        if level_filter != "All" and 'level_number' in filtered_df.columns:
-                            filtered_df = filtered_df[filtered_df['level_number'] == int(level_filter)]
-                        if user_filter and 'username' in filtered_df.columns:
-                            filtered_df = filtered_df[filtered_df['username'].str.contains(user_filter, case=False, na=False)]
+                        filtered_df = pd.DataFrame(progress_data)
                         
                         # Display data
                         st.dataframe(
@@ -1617,46 +1701,84 @@ with tab7:
                             }
                         )
                         
-                        # Summary statistics
+                        # Page navigation
+                        col1, col2, col3 = st.columns([1, 2, 1])
+                        with col1:
+                            if st.button("⬅️ Previous", disabled=len(progress_cursors) == 1, key="progress_prev"):
+                                progress_cursors.pop()
+                                st.rerun()
+                        with col2:
+                            st.markdown(f'<p style="text-align: center; color: rgba(255,255,255,0.7);">Page {len(progress_cursors)}</p>', unsafe_allow_html=True)
+                        with col3:
+                            if st.button("Next ➡️", disabled=not next_cursor, key="progress_next"):
+                                progress_cursors.append(next_cursor)
+                                st.rerun()
+                        
+                    else:
+                        st.info("📭 No level progress data found.")
+                    
+                    # Summary statistics, aggregated by the backend over all progress
+                    stats_response = requests.get("http://localhost:8000/api/auth/game/progress/stats/", headers=headers, timeout=5)
+                    if stats_response.status_code == 200:
+                        progress_stats = stats_response.json()
+                        totals = progress_stats.get('totals', {})
                         st.markdown('<h3 style="color: #667eea; margin-top: 30px;">📊 Progress Summary</h3>', unsafe_allow_html=True)
                         col1, col2, col3, col4 = st.columns(4)
                         with col1:
                             st.markdown(f"""
                             <div class="premium-metric" style="border-color: rgba(102, 126, 234, 0.5);">
                                 <div class="metric-icon" style="color: #667eea;">🏁</div>
-                                <div class="metric-value">{len(progress_data)}</div>
+                                <div class="metric-value">{totals.get('sessions', 0)}</div>
                                 <div class="metric-label">Total Levels</div>
                             </div>
                             """, unsafe_allow_html=True)
                         with col2:
-                            completed_count = len([p for p in progress_data if p.get('level_completed')]) if isinstance(progress_data, list) else 0
                             st.markdown(f"""
                             <div class="premium-metric" style="border-color: rgba(79, 172, 254, 0.5);">
                                 <div class="metric-icon" style="color: #4facfe;">✅</div>
-                                <div class="metric-value">{completed_count}</div>
+                                <div class="metric-value">{totals.get('completed', 0)}</div>
                                 <div class="metric-label">Completed</div>
                             </div>
                             """, unsafe_allow_html=True)
                         with col3:
-                            player_count = len(set([p.get('username') for p in progress_data if p.get('username')])) if isinstance(progress_data, list) else 0
                             st.markdown(f"""
                             <div class="premium-metric" style="border-color: rgba(240, 147, 251, 0.5);">
                                 <div class="metric-icon" style="color: #f093fb;">👥</div>
-                                <div class="metric-value">{player_count}</div>
+                                <div class="metric-value">{totals.get('players', 0)}</div>
                                 <div class="metric-label">Players</div>
                             </div>
                             """, unsafe_allow_html=True)
                         with col4:
-                            hints_count = len([p for p in progress_data if p.get('hint_used')]) if isinstance(progress_data, list) else 0
                             st.markdown(f"""
                             <div class="premium-metric" style="border-color: rgba(67, 233, 123, 0.5);">
                                 <div class="metric-icon" style="color: #43e97b;">💡</div>
-                                <div class="metric-value">{hints_count}</div>
+                                <div class="metric-value">{totals.get('hints', 0)}</div>
                                 <div class="metric-label">Hints Used</div>
                             </div>
                             """, unsafe_allow_html=True)
-                    else:
-                        st.info("📭 No level progress data found.")
+                        
+                        if progress_stats.get('levels'):
+                            st.markdown('<h3 style="color: #667eea; margin-top: 30px;">🪜 Level Funnel</h3>', unsafe_allow_html=True)
+                            st.dataframe(
+                                pd.DataFrame(progress_stats['levels']),
+                                use_container_width=True,
+                                hide_index=True,
+                                column_order=["level_number", "sessions", "players", "completion_rate", "hint_rate",
+                                              "avg_riddle_attempts", "avg_security_attempts", "drop_off", "drop_off_rate"],
+                                column_config={
+                                    "level_number": st.column_config.NumberColumn("Level", format="%d"),
+                                    "sessions": st.column_config.NumberColumn("Reached", format="%d"),
+                                    "players": st.column_config.NumberColumn("Players", format="%d"),
+                                    "completion_rate": st.column_config.NumberColumn("Completion Rate", format="%.2f"),
+                                    "hint_rate": st.column_config.NumberColumn("Hint Rate", format="%.2f"),
+                                    "avg_riddle_attempts": st.column_config.NumberColumn("Avg Riddle Attempts", format="%.2f"),
+                                    "avg_security_attempts": st.column_config.NumberColumn("Avg Security Attempts", format="%.2f"),
+                                    "drop_off": st.column_config.NumberColumn("Drop-off", format="%d"),
+                                    "drop_off_rate": st.column_config.NumberColumn("Drop-off Rate", format="%.2f"),
+                                }
+                            )
+                elif response.status_code == 400:
+                    st.error("❌ " + response.json().get("message", "Invalid filter"))
                 elif response.status_code == 403:
                     st.warning("⚠️ Admin access required. The level progress endpoint requires admin privileges.")
                     st.info("💡 Please authenticate with a Django superuser account that has staff privileges.")
@@ -3,7 +3,31 @@ Django Admin Configuration for Treasure Hunt Models
 """
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, GameSession, LevelProgress, Achievement, UserAchievement, Leaderboard, Question
+from .level_stats import progress_snapshot, record_level_progress
+from .models import User, GameSession, LevelProgress, LevelStats, Achievement, UserAchievement, Leaderboard, Question
+
+
+class CrossDatabaseAdminMixin:
+    """
+    Keeps changelists working when gameplay tables live in their own database.
+
+    Relations to users (and user -> session links) are loaded with
+    prefetch_related, which runs one query per database, instead of a JOIN.
+    Username search resolves matching user ids first rather than joining.
+    """
+    list_select_related = ()
+    prefetch_fields = ()
+    username_search_path = None
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related(*self.prefetch_fields)
+
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term and self.username_search_path:
+            user_ids = list(User.objects.filter(username__icontains=search_term).values_list('id', flat=True))
+            results |= queryset.filter(**{f'{self.username_search_path}__in': user_ids})
+        return results, may_have_duplicates
 
 
 @admin.register(User)
@@ -21,10 +45,12 @@ class UserAdmin(BaseUserAdmin):
 
 
 @admin.register(GameSession)
-class GameSessionAdmin(admin.ModelAdmin):
+class GameSessionAdmin(CrossDatabaseAdminMixin, admin.ModelAdmin):
     list_display = ['user', 'session_token_short', 'current_level', 'score', 'is_active', 'finished', 'started_at']
     list_filter = ['is_active', 'finished', 'started_at']
-    search_fields = ['user__username', 'session_token']
+    search_fields = ['session_token']
+    prefetch_fields = ['user']
+    username_search_path = 'user'
     readonly_fields = ['session_token', 'started_at']
     
     def session_token_short(self, obj):
@@ -33,11 +59,45 @@ class GameSessionAdmin(admin.ModelAdmin):
 
 
 @admin.register(LevelProgress)
-class LevelProgressAdmin(admin.ModelAdmin):
+class LevelProgressAdmin(CrossDatabaseAdminMixin, admin.ModelAdmin):
     list_display = ['session', 'level_number', 'question_category', 'difficulty', 'points_earned', 'level_completed', 'time_spent']
     list_filter = ['difficulty', 'level_completed', 'hint_used']
-    search_fields = ['session__user__username', 'question_category']
+    search_fields = ['question_category']
+    list_select_related = ['session']
+    prefetch_fields = ['session__user']
+    username_search_path = 'session__user'
     ordering = ['session', 'level_number']
+    
+    def save_model(self, request, obj, form, change):
+        # Runs inside the admin's transaction, like the save_level_progress view
+        previous = progress_snapshot(LevelProgress.objects.get(pk=obj.pk)) if change else None
+        super().save_model(request, obj, form, change)
+        record_level_progress(obj, previous)
+
+
+@admin.register(LevelStats)
+class LevelStatsAdmin(admin.ModelAdmin):
+    """Running totals maintained by level progress writes - read only"""
+    list_display = ['level_number', 'difficulty', 'attempts', 'solves', 'hints', 'avg_riddle_attempts', 'avg_time_spent', 'updated_at']
+    list_filter = ['difficulty']
+    ordering = ['level_number', 'difficulty']
+    
+    def avg_riddle_attempts(self, obj):
+        return round(obj.riddle_attempts_sum / obj.attempts, 2) if obj.attempts else 0
+    avg_riddle_attempts.short_description = 'Avg Riddle Attempts'
+    
+    def avg_time_spent(self, obj):
+        return round(obj.time_spent_sum / obj.attempts, 2) if obj.attempts else 0
+    avg_time_spent.short_description = 'Avg Time (s)'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Achievement)
@@ -47,18 +107,22 @@ class AchievementAdmin(admin.ModelAdmin):
 
 
 @admin.register(UserAchievement)
-class UserAchievementAdmin(admin.ModelAdmin):
+class UserAchievementAdmin(CrossDatabaseAdminMixin, admin.ModelAdmin):
     list_display = ['user', 'achievement', 'unlocked_at', 'session']
     list_filter = ['unlocked_at', 'achievement']
     search_fields = ['user__username', 'achievement__name']
+    list_select_related = ['user', 'achievement']
+    prefetch_fields = ['session__user']
     ordering = ['-unlocked_at']
 
 
 @admin.register(Leaderboard)
-class LeaderboardAdmin(admin.ModelAdmin):
+class LeaderboardAdmin(CrossDatabaseAdminMixin, admin.ModelAdmin):
     list_display = ['user', 'final_score', 'rank_achieved', 'total_time_formatted', 'accuracy', 'completion_date']
     list_filter = ['rank_achieved', 'completion_date']
-    search_fields = ['user__username']
+    search_fields = ['rank_achieved']
+    prefetch_fields = ['user']
+    username_search_path = 'user'
     ordering = ['-final_score', 'total_time']
     
     def total_time_formatted(self, obj):
@@ -0,0 +1,194 @@
+"""
+Waiting room in front of login and game start
+
+When an event opens, every participant logs in at once. With the waiting
+room on (ADMISSION_RATE > 0), login_user and create_game_session only serve
+requests that carry an admitted ticket in the ``Admission-Ticket`` header.
+Anyone else gets a 503 with a ticket, their place in line and Retry-After;
+clients poll GET /api/auth/admission/<ticket>/ (no database, no auth) until
+admitted, then retry with the ticket.
+
+Tickets are admitted first come, first served at ADMISSION_RATE per second.
+Up to ADMISSION_BURST are admitted at once after a quiet spell, so the queue
+is invisible outside the opening rush. A ticket belongs to the client
+address that took it and is good for one successful login and one game
+start. Polls keep a waiting ticket alive; once admitted it lasts
+ADMISSION_TICKET_TTL seconds more, whether used or not, so a shared or
+replayed ticket can't be used to skip the line.
+
+Like the other caches, the queue lives in one process; run a single
+backend process (or sticky routing) while the waiting room is on.
+"""
+import functools
+import math
+import secrets
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.throttling import BaseThrottle
+
+from treasure_hunt_backend import metrics
+
+from .caching import TTLCache
+
+HEADER = 'Admission-Ticket'
+MAX_POLL_INTERVAL = 10  # seconds
+
+Admission = namedtuple('Admission', ['ticket', 'admitted', 'position', 'estimated_wait'])
+
+
+def waiting_room_enabled():
+    return settings.ADMISSION_RATE > 0
+
+
+def client_ident(request):
+    """The client address, as the throttles see it (NUM_PROXIES aware)"""
+    return BaseThrottle().get_ident(request)
+
+
+class Ticket:
+    __slots__ = ('number', 'client', 'used')
+
+    def __init__(self, number, client):
+        self.number = number
+        self.client = client
+        self.used = set()  # views it has been spent on
+
+
+class AdmissionQueue:
+    """FIFO of tickets drained by a token bucket of ADMISSION_RATE/s, ADMISSION_BURST deep"""
+
+    def __init__(self, timer=time.monotonic):
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._tickets = TTLCache(maxsize=settings.ADMISSION_MAX_TICKETS, ttl=settings.ADMISSION_TICKET_TTL,
+                                timer=timer)
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._tickets.clear()
+            self._issued = 0  # number of the latest ticket
+            # Tickets numbered up to this are admitted; starts a full burst ahead
+            self._admitted = float(settings.ADMISSION_BURST)
+            self._updated_at = self._timer()
+
+    def _advance(self):
+        now = self._timer()
+        self._admitted = min(self._admitted + (now - self._updated_at) * settings.ADMISSION_RATE,
+                             self._issued + settings.ADMISSION_BURST)
+        self._updated_at = now
+
+    def _status(self, ticket, number):
+        if number <= self._admitted:
+            return Admission(ticket, True, 0, 0.0)
+        return Admission(ticket, False, number - math.floor(self._admitted),
+                         (number - self._admitted) / settings.ADMISSION_RATE)
+
+    def join(self, client, use=None):
+        """Issue a ticket at the back of the line for ``client``, claimed for ``use`` if admitted at once"""
+        ticket = secrets.token_urlsafe(16)
+        with self._lock:
+            self._advance()
+            self._issued += 1
+            entry = Ticket(self._issued, client)
+            self._tickets.set(ticket, entry)
+            admission = self._status(ticket, entry.number)
+            if admission.admitted and use is not None:
+                entry.used.add(use)
+            return admission
+
+    def check(self, ticket, client, use=None):
+        """
+        Current Admission for ``ticket``, or None if it is unknown, expired,
+        another client's or already spent on ``use``. An admitted ticket is
+        claimed for ``use`` on the spot; release() gives it back.
+        """
+        with self._lock:
+            entry = self._tickets.get(ticket)
+            if entry is None or entry.client != client or use in entry.used:
+                return None
+            self._advance()
+            admission = self._status(ticket, entry.number)
+            if not admission.admitted:
+                # Waiting tickets live as long as they're polled; admitted ones don't
+                self._tickets.set(ticket, entry)
+            elif use is not None:
+                entry.used.add(use)
+            return admission
+
+    def release(self, ticket, use):
+        """Give back a claim that didn't succeed, e.g. a mistyped password"""
+        with self._lock:
+            entry = self._tickets.get(ticket)
+            if entry is not None:
+                entry.used.discard(use)
+
+    @property
+    def waiting(self):
+        with self._lock:
+            self._advance()
+            return max(0, self._issued - math.floor(self._admitted))
+
+
+admission_queue = AdmissionQueue()
+
+metrics.registry.add_gauge('treasure_hunt_admission_waiting', 'Tickets waiting in the login waiting room',
+                           lambda: admission_queue.waiting if waiting_room_enabled() else 0)
+
+
+def poll_interval(admission):
+    """Seconds a client should wait before polling again"""
+    return min(MAX_POLL_INTERVAL, max(1, math.ceil(admission.estimated_wait)))
+
+
+def admission_body(admission):
+    return {
+        'ticket': admission.ticket,
+        'admitted': admission.admitted,
+        'position': admission.position,
+        'estimated_wait': round(admission.estimated_wait, 1),
+        'retry_after': 0 if admission.admitted else poll_interval(admission),
+    }
+
+
+def admission_required(view):
+    """
+    Serve the view only with an admitted Admission-Ticket while the waiting
+    room is on, spending the ticket on this view if it succeeds; otherwise
+    answer 503 with a ticket (a new one if the request had none, or one that
+    is unknown, expired, another client's or already spent here) and
+    Retry-After.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not waiting_room_enabled():
+            return view(request, *args, **kwargs)
+        ticket = request.headers.get(HEADER)
+        client = client_ident(request)
+        use = request.resolver_match.url_name
+        admission = (ticket and admission_queue.check(ticket, client, use)) or admission_queue.join(client, use)
+        if admission.admitted:
+            try:
+                response = view(request, *args, **kwargs)
+            except Exception:
+                admission_queue.release(admission.ticket, use)
+                raise
+            if response.status_code >= 400:
+                admission_queue.release(admission.ticket, use)
+            else:
+                # The ticket may have been issued just now; its other uses need it
+                response[HEADER] = admission.ticket
+            return response
+        metrics.registry.record_shed('waiting_room', use)
+        body = admission_body(admission)
+        return Response(dict({
+            'success': False,
+            'message': f"You're number {admission.position} in line"
+        }, **body), status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': str(body['retry_after'])})
+
+    return wrapper
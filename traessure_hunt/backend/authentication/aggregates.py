@@ -0,0 +1,94 @@
+"""
+Per-level funnel and per-difficulty aggregates of level progress
+
+Computed with one GROUP BY query per breakdown, so the work happens in SQLite
+and the response has one entry per level / difficulty no matter how many
+players there are. Results are cached in process for PROGRESS_STATS_CACHE_TTL
+seconds and dropped whenever level progress is saved or deleted (see
+signals.py).
+"""
+import itertools
+
+from django.conf import settings
+from django.db.models import Avg, Count, Q
+from django.utils import timezone
+
+from .caching import TTLCache
+from .fast_serializers import format_datetime
+from .models import LevelProgress
+
+_CACHE_KEY = 'progress_aggregates'
+_aggregates_cache = TTLCache(maxsize=1, ttl=settings.PROGRESS_STATS_CACHE_TTL)
+# Bumped on every invalidation so a result computed while a write happened is
+# never cached over the invalidation
+_generation = itertools.count()
+_current_generation = next(_generation)
+
+
+def invalidate_progress_aggregates():
+    global _current_generation
+    _current_generation = next(_generation)
+    _aggregates_cache.delete(_CACHE_KEY)
+
+
+def _annotations():
+    return {
+        'sessions': Count('id'),
+        'players': Count('session__user_id', distinct=True),
+        'completed': Count('id', filter=Q(level_completed=True)),
+        'hints': Count('id', filter=Q(hint_used=True)),
+        'avg_riddle_attempts': Avg('riddle_attempts'),
+        'avg_security_attempts': Avg('security_attempts'),
+        'avg_time_spent': Avg('time_spent'),
+    }
+
+
+def _finish(row):
+    """Round averages and add rates to one aggregate row"""
+    for field in ('avg_riddle_attempts', 'avg_security_attempts', 'avg_time_spent'):
+        row[field] = round(row[field] or 0, 2)
+    sessions = row['sessions']
+    row['completion_rate'] = round(row['completed'] / sessions, 4) if sessions else 0.0
+    row['hint_rate'] = round(row['hints'] / sessions, 4) if sessions else 0.0
+    return row
+
+
+def compute_progress_aggregates():
+    levels = [
+        _finish(row) for row in
+        LevelProgress.objects.order_by('level_number').values('level_number').annotate(**_annotations())
+    ]
+    # Progress rows are saved per session as levels are cleared, so a session
+    # that reached a level but has no row for the next one stopped there.
+    # Each level is compared with level_number + 1 only; where that level has
+    # no rows at all (the last level, or a gap), the sessions that completed
+    # this one count as passed
+    reached = {row['level_number']: row['sessions'] for row in levels}
+    for row in levels:
+        passed = reached.get(row['level_number'] + 1, row['completed'])
+        row['drop_off'] = max(row['sessions'] - passed, 0)
+        row['drop_off_rate'] = round(row['drop_off'] / row['sessions'], 4) if row['sessions'] else 0.0
+
+    difficulties = [
+        _finish(row) for row in
+        LevelProgress.objects.order_by('difficulty').values('difficulty').annotate(**_annotations())
+    ]
+    totals = _finish(LevelProgress.objects.aggregate(**_annotations()))
+
+    return {
+        'levels': levels,
+        'difficulties': difficulties,
+        'totals': totals,
+        'generated_at': format_datetime(timezone.now()),
+    }
+
+
+def get_progress_aggregates():
+    """Cached compute_progress_aggregates()"""
+    aggregates = _aggregates_cache.get(_CACHE_KEY)
+    if aggregates is None:
+        generation = _current_generation
+        aggregates = compute_progress_aggregates()
+        if generation == _current_generation:
+            _aggregates_cache.set(_CACHE_KEY, aggregates)
+    return aggregates
@@ -0,0 +1,56 @@
+"""
+In-memory index of normalized answers for server-side answer verification
+
+The index maps each active question's level number to its normalized riddle
+answer and security key. It is built with one query on first use, dropped by
+signal handlers whenever a question is saved or deleted in this process, and
+expires after ANSWER_INDEX_TTL seconds so other processes pick up question
+edits too. A verification is then a dict lookup and a string comparison.
+"""
+import hmac
+
+from django.conf import settings
+
+from .caching import TTLCache
+from .models import Question
+
+PHASES = ('riddle', 'security')
+
+_INDEX_KEY = 'answers'
+_answer_index = TTLCache(maxsize=1, ttl=settings.ANSWER_INDEX_TTL)
+
+
+def normalize_answer(value):
+    """Case-insensitive, ignoring leading, trailing and repeated whitespace"""
+    return ' '.join(str(value).lower().split())
+
+
+def build_answer_index():
+    return {
+        level_number: {'riddle': normalize_answer(answer), 'security': normalize_answer(security_key)}
+        for level_number, answer, security_key in
+        Question.objects.filter(is_active=True).values_list('level_number', 'answer', 'security_key')
+    }
+
+
+def get_answer_index():
+    index = _answer_index.get(_INDEX_KEY)
+    if index is None:
+        index = build_answer_index()
+        _answer_index.set(_INDEX_KEY, index)
+    return index
+
+
+def invalidate_answer_index():
+    _answer_index.delete(_INDEX_KEY)
+
+
+def check_answer(level_number, phase, answer):
+    """
+    True/False for a known level, None if there is no active question for
+    level_number
+    """
+    expected = get_answer_index().get(level_number)
+    if expected is None:
+        return None
+    return hmac.compare_digest(normalize_answer(answer).encode(), expected[phase].encode())
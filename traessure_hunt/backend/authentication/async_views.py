@@ -0,0 +1,229 @@
+"""
+Async versions of the hot gameplay endpoints, served under ASGI
+
+DRF's @api_view runs synchronously, so these are plain Django async views
+returning the same JSON as their counterparts in views.py. Reads use Django's
+async ORM; the level progress upsert needs transaction.atomic(), which has no
+async form, and runs in a worker thread through sync_to_async.
+
+The live leaderboard stream exists only here: it holds its connection open,
+which an async view does for the cost of a coroutine rather than a thread.
+
+treasure_hunt_backend/asgi_urls.py routes the endpoints here when the app is
+started through treasure_hunt_backend/asgi.py (e.g. `manage.py runasgi`).
+"""
+import asyncio
+import functools
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from rest_framework import exceptions, status
+
+from .authentication import CachedTokenAuthentication
+from .broadcast import RESYNC, leaderboard_feed
+from .fast_serializers import LeaderboardValuesSerializer, PublicQuestionValuesSerializer
+from .idempotency import aidempotent
+from .models import GameSession, Leaderboard, Question
+from .renderers import json_response
+from .serializers import GameSessionSerializer
+from .throttling import SaveLevelThrottle
+from .views import level_progress_data, store_level_progress
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# HELPERS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def token_required(view):
+    """Async counterpart of IsAuthenticated with CachedTokenAuthentication"""
+    authenticator = CachedTokenAuthentication()
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            credentials = await authenticator.aauthenticate(request)
+        except exceptions.AuthenticationFailed as exc:
+            credentials, detail = None, exc.detail
+        else:
+            detail = exceptions.NotAuthenticated.default_detail
+        if credentials is None:
+            return json_response({'detail': detail}, status=status.HTTP_401_UNAUTHORIZED,
+                                 headers={'WWW-Authenticate': authenticator.authenticate_header(request)})
+        request.user, request.auth = credentials
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def throttled(throttle_class):
+    """Async counterpart of @throttle_classes([throttle_class]); goes after @token_required"""
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            throttle = throttle_class()
+            if not throttle.allow_request(request, None):
+                exc = exceptions.Throttled(throttle.wait())
+                return json_response({'detail': exc.detail}, status=exc.status_code,
+                                     headers={'Retry-After': '%d' % exc.wait})
+            return await view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# GAME SESSION ENDPOINTS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@require_http_methods(['GET'])
+@token_required
+async def get_active_session(request):
+    """
+    Get user's active game session
+    GET /api/auth/game/session/
+    """
+    try:
+        session = await GameSession.objects.aget(user=request.user, is_active=True)
+    except GameSession.DoesNotExist:
+        return json_response({
+            'success': False,
+            'message': 'No active session found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    # The serializer reads session.user.username; don't let it query
+    session.user = request.user
+    return json_response({
+        'success': True,
+        'session': GameSessionSerializer(session).data
+    })
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# LEVEL PROGRESS ENDPOINTS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@csrf_exempt
+@require_http_methods(['POST'])
+@token_required
+@throttled(SaveLevelThrottle)
+@aidempotent
+async def save_level_progress(request):
+    """
+    Save progress for a specific level
+    POST /api/auth/game/level/
+    """
+    try:
+        data = json.loads(request.body or b'{}')
+        session = await GameSession.objects.aget(user=request.user, is_active=True)
+
+        level_number = data.get('level', 0)
+        if level_number > 0:  # Adjust for 0-based indexing
+            level_number -= 1
+
+        question = await Question.objects.filter(level_number=level_number, is_active=True).afirst()
+        session.user = request.user
+
+        status_code, body = await sync_to_async(store_level_progress)(
+            session, level_number, level_progress_data(session, level_number, question, data),
+            request.user.username,
+        )
+        return json_response(body, status=status_code)
+
+    except GameSession.DoesNotExist:
+        return json_response({
+            'success': False,
+            'message': 'No active game session found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# LEADERBOARD ENDPOINTS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@require_http_methods(['GET'])
+async def get_leaderboard(request):
+    """
+    Get top players leaderboard
+    GET /api/auth/leaderboard/?limit=10
+    """
+    limit = int(request.GET.get('limit', 10))
+    leaderboard = Leaderboard.objects.all()[:limit]
+
+    return json_response({
+        'success': True,
+        'leaderboard': await LeaderboardValuesSerializer(leaderboard).adata()
+    })
+
+
+async def leaderboard_events(subscription):
+    """
+    Snapshot, then every published event; a comment line when idle. Events
+    queued while a snapshot was being built may already be in it: anything
+    not newer than the last snapshot sent is skipped, or clients would apply
+    it twice.
+    """
+    try:
+        snapshot = await sync_to_async(leaderboard_feed.snapshot_message)()
+        yield snapshot
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.get(), settings.LEADERBOARD_STREAM_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield b': keepalive\n\n'
+                continue
+            if message is RESYNC:
+                message = await sync_to_async(leaderboard_feed.snapshot_message)()
+            if message.event_id <= snapshot.event_id:
+                continue
+            if message.event == 'snapshot':
+                snapshot = message
+            yield message
+    finally:
+        leaderboard_feed.unsubscribe(subscription)
+
+
+@require_http_methods(['GET'])
+async def stream_leaderboard(request):
+    """
+    Live leaderboard and level completions (Server-Sent Events)
+    GET /api/auth/stream/leaderboard/
+
+    Events: 'snapshot' (top rows and recent completions, sent first and again
+    if the client falls behind), 'leaderboard' (a new entry and its rank) and
+    'level_completed'.
+    """
+    # Subscribe before the snapshot is read, so nothing published in between is missed
+    subscription = leaderboard_feed.subscribe()
+    response = StreamingHttpResponse(leaderboard_events(subscription), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: don't buffer the stream
+    return response
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# QUESTIONS ENDPOINTS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@require_http_methods(['GET'])
+async def get_public_questions(request):
+    """
+    Get all active questions without answers or security keys
+    GET /api/auth/questions/public/
+    """
+    questions = Question.objects.filter(is_active=True).order_by('level_number')
+    data = await PublicQuestionValuesSerializer(questions).adata()
+
+    return json_response({
+        'success': True,
+        'count': len(data),
+        'questions': data
+    })
@@ -0,0 +1,99 @@
+"""
+Custom DRF Authentication Classes for Treasure Hunt Backend
+"""
+import copy
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+
+from .caching import TTLCache
+
+# token key -> user id
+_token_user_ids = TTLCache(maxsize=settings.TOKEN_CACHE_MAX_SIZE, ttl=settings.TOKEN_CACHE_TTL)
+# user id -> (user, token)
+_cached_users = TTLCache(maxsize=settings.TOKEN_CACHE_MAX_SIZE, ttl=settings.TOKEN_CACHE_TTL)
+
+
+def invalidate_token(key):
+    """Forget a token key, e.g. after logout deletes it"""
+    _token_user_ids.delete(key)
+
+
+def invalidate_user(user_id):
+    """Forget a cached user, e.g. after a save, deactivation or password change"""
+    _cached_users.delete(user_id)
+
+
+def clear_token_cache():
+    _token_user_ids.clear()
+    _cached_users.clear()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that caches token -> user lookups in process.
+
+    A cache hit skips the Token JOIN User query that otherwise runs before
+    every authenticated view. Entries are dropped by signal handlers when the
+    token is deleted or the user is saved; other processes see those changes
+    after TOKEN_CACHE_TTL seconds at most.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = self._cached_credentials(key)
+        if cached is None:
+            cached = self._remember(key, *super().authenticate_credentials(key))
+        return self._request_copies(cached)
+
+    async def aauthenticate(self, request):
+        """authenticate() for plain async Django views (see async_views.py)"""
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(_('Invalid token header. Token string should not contain spaces.'))
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(
+                _('Invalid token header. Token string should not contain invalid characters.')
+            )
+        return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        """authenticate_credentials() with the async ORM on a cache miss"""
+        cached = self._cached_credentials(key)
+        if cached is None:
+            model = self.get_model()
+            try:
+                token = await model.objects.select_related('user').aget(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            if not token.user.is_active:
+                raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+            cached = self._remember(key, token.user, token)
+        return self._request_copies(cached)
+
+    def _cached_credentials(self, key):
+        user_id = _token_user_ids.get(key)
+        cached = _cached_users.get(user_id) if user_id is not None else None
+        if cached is None or cached[1].key != key:
+            return None
+        return cached
+
+    def _remember(self, key, user, token):
+        # Store detached copies so relation caches don't leak between requests
+        user, token = copy.copy(user), copy.copy(token)
+        user._state.fields_cache = {}
+        token._state.fields_cache = {}
+        _cached_users.set(user.pk, (user, token))
+        _token_user_ids.set(key, user.pk)
+        return (user, token)
+
+    def _request_copies(self, cached):
+        # Hand every request its own instances - views modify and save request.user
+        user, token = copy.copy(cached[0]), copy.copy(cached[1])
+        token.user = user
+        return (user, token)
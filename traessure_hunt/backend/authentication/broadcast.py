@@ -0,0 +1,194 @@
+"""
+In-process broadcaster behind the live leaderboard stream (Server-Sent Events)
+
+submit_to_leaderboard and save_level_progress publish events here, from
+whatever thread they run in; every open GET /api/auth/stream/leaderboard/
+connection (async_views.stream_leaderboard) receives them through its own
+bounded asyncio queue. Each event is encoded once and the same bytes are
+handed to every subscriber.
+
+The feed keeps the top LEADERBOARD_SIZE rows and the last ACTIVITY_SIZE level
+completions in memory. The top rows are read from the database once and then
+updated from the published entries, so new watchers get a snapshot without a
+query and 200 watchers cost no more queries than one. A leaderboard delete
+rebuilds the snapshot and pushes it to everyone.
+
+Subscribers live in one process: run the stream under ASGI in the same
+process that serves the writes (a single worker), or watchers miss events
+from the others.
+"""
+import asyncio
+import json
+import threading
+from collections import deque
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .fast_serializers import LeaderboardValuesSerializer
+from .models import Leaderboard
+
+LEADERBOARD_SIZE = 10
+ACTIVITY_SIZE = 20
+# Events a slow subscriber may fall behind by before it is sent a fresh snapshot
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Queued instead of an event when a subscriber fell too far behind
+RESYNC = object()
+
+
+class Message(bytes):
+    """An encoded event that remembers its name and id"""
+    event = None
+    event_id = None
+
+
+def encode_event(event, data, event_id=None):
+    """One Server-Sent Events message"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append('data: ' + json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':')))
+    message = Message(('\n'.join(lines) + '\n\n').encode())
+    message.event, message.event_id = event, event_id
+    return message
+
+
+class Subscription:
+    """A subscriber's queue, bound to the event loop that reads it"""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def deliver(self, message):
+        # Runs on self.loop
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class LeaderboardFeed:
+    """Subscribers plus the shared leaderboard/activity snapshot. Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._last_id = 0  # ids order events and snapshots; a snapshot includes every lower id
+        self._top = None  # None until first read from the database
+        self._activity = deque(maxlen=ACTIVITY_SIZE)
+        self._snapshot_message = None
+
+    # Subscribers ──────────────────────────────────────────────────────────────
+
+    def subscribe(self):
+        """Call from the subscriber's event loop"""
+        subscription = Subscription(asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def _broadcast(self, message):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:  # loop closed - the connection is gone
+                self.unsubscribe(subscription)
+
+    # Snapshot ─────────────────────────────────────────────────────────────────
+
+    def _load_top(self):
+        return LeaderboardValuesSerializer(Leaderboard.objects.all()[:LEADERBOARD_SIZE]).data
+
+    def _next_id(self):
+        # Under self._lock
+        self._last_id += 1
+        return self._last_id
+
+    def snapshot_message(self):
+        """Encoded 'snapshot' event; queries only when the top rows aren't loaded. Sync only."""
+        while True:
+            with self._lock:
+                if self._snapshot_message is not None:
+                    return self._snapshot_message
+                top, read_after = self._top, self._last_id
+            if top is None:
+                top = self._load_top()
+            with self._lock:
+                if self._top is None:
+                    if self._last_id != read_after:
+                        # An entry published during the read may be missing from it
+                        continue
+                    self._top = top
+                self._snapshot_message = encode_event('snapshot', {
+                    'leaderboard': self._top,
+                    'activity': list(self._activity),
+                }, self._next_id())
+                return self._snapshot_message
+
+    def refresh(self):
+        """Reload the top rows (after deletes or edits) and push them to every subscriber"""
+        with self._lock:
+            self._top = None
+            self._snapshot_message = None
+        if self._subscribers:
+            self._broadcast(self.snapshot_message())
+
+    def clear(self):
+        with self._lock:
+            self._top = None
+            self._snapshot_message = None
+            self._activity.clear()
+
+    # Events ───────────────────────────────────────────────────────────────────
+
+    def publish_leaderboard_entry(self, row):
+        """
+        A new leaderboard entry (LeaderboardSerializer keys). The event carries
+        the entry and its 1-based position in the top rows, or null if it
+        didn't make it; clients insert it there and drop rows past the size.
+        """
+        with self._lock:
+            rank = None
+            if self._top is not None:
+                key = (-row['final_score'], row['total_time'])
+                position = next(
+                    (index for index, other in enumerate(self._top)
+                     if key < (-other['final_score'], other['total_time'])),
+                    len(self._top),
+                )
+                if position < LEADERBOARD_SIZE:
+                    self._top = (self._top[:position] + [row] + self._top[position:])[:LEADERBOARD_SIZE]
+                    rank = position + 1
+                self._snapshot_message = None
+            message = encode_event('leaderboard', {'entry': row, 'rank': rank}, self._next_id())
+        self._broadcast(message)
+
+    def publish_level_completed(self, row):
+        """A saved level (LevelProgressSerializer keys), as a short activity item"""
+        activity = {key: row[key] for key in (
+            'username', 'level_number', 'difficulty', 'points_earned', 'completed_at',
+        )}
+        with self._lock:
+            self._activity.appendleft(activity)
+            self._snapshot_message = None
+            message = encode_event('level_completed', activity, self._next_id())
+        self._broadcast(message)
+
+
+leaderboard_feed = LeaderboardFeed()
@@ -0,0 +1,174 @@
+"""
+Change feed for incremental sync of users, game sessions, level progress and
+the leaderboard (GET /api/auth/changes/?since=<cursor>)
+
+Every feed table has an updated_at column with an (updated_at, id) index.
+A pull returns, per table, the rows after the cursor's position in that
+order, plus tombstones (DeletedRow) of rows deleted since. The cursor records
+the position reached in each table, so consumers apply the rows to their copy
+and pull again with the returned cursor; has_more says the next pull is
+available immediately. Pulling without a cursor pages through everything.
+
+updated_at is stamped when a write starts, not when it commits. Writes in
+atomic() take the lock first in the production profile (BEGIN IMMEDIATE),
+but autocommit writes - user.save() at login, the queryset updates of game
+start and answer checks - stamp the row and then wait for the lock, up to
+the busy timeout. Rows therefore only enter the feed once they are
+CHANGE_FEED_SETTLE_SECONDS old, which settings derives from the longest
+lock wait plus a margin; a row can't commit behind a position handed out.
+"""
+import base64
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .fast_serializers import LevelProgressValuesSerializer, ValuesSerializer, datetime_formatter, fill_usernames
+from .models import DeletedRow, GameSession, Leaderboard, LevelProgress, User
+from .serializers import GameSessionSerializer, LeaderboardSerializer, UserSerializer
+
+DEFAULT_CHANGES_LIMIT = 500
+MAX_CHANGES_LIMIT = 1000
+
+
+class UserChangeSerializer(ValuesSerializer):
+    """UserSerializer output plus updated_at"""
+    fields = UserSerializer.Meta.fields + ['updated_at']
+    datetime_fields = ['created_at', 'last_login_at', 'updated_at']
+
+
+class GameSessionChangeSerializer(ValuesSerializer):
+    """GameSessionSerializer output plus updated_at"""
+    fields = GameSessionSerializer.Meta.fields + ['updated_at']
+    sources = {'username': 'user_id'}
+    datetime_fields = ['started_at', 'completed_at', 'updated_at']
+
+    @classmethod
+    def to_rows(cls, tuples):
+        return fill_usernames(super().to_rows(tuples))
+
+
+class LevelProgressChangeSerializer(LevelProgressValuesSerializer):
+    """LevelProgressSerializer output plus updated_at"""
+    fields = LevelProgressValuesSerializer.fields + ['updated_at']
+    datetime_fields = ['completed_at', 'updated_at']
+
+
+class LeaderboardChangeSerializer(ValuesSerializer):
+    """LeaderboardSerializer output plus updated_at"""
+    fields = LeaderboardSerializer.Meta.fields + ['updated_at']
+    sources = {'username': 'user_id'}
+    datetime_fields = ['completion_date', 'updated_at']
+
+    @classmethod
+    def to_rows(cls, tuples):
+        return fill_usernames(super().to_rows(tuples))
+
+
+# Feed name -> (model, serializer), in response order
+FEEDS = {
+    'users': (User, UserChangeSerializer),
+    'sessions': (GameSession, GameSessionChangeSerializer),
+    'level_progress': (LevelProgress, LevelProgressChangeSerializer),
+    'leaderboard': (Leaderboard, LeaderboardChangeSerializer),
+}
+FEED_NAMES = {model: name for name, (model, _) in FEEDS.items()}
+# Cursor position of the tombstones
+DELETED = 'deleted'
+
+
+def encode_changes_cursor(positions):
+    format_datetime = datetime_formatter()
+    payload = json.dumps({
+        name: [format_datetime(timestamp), row_id] for name, (timestamp, row_id) in positions.items()
+    }, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_changes_cursor(cursor):
+    """Return {feed: (timestamp, id)} from a cursor string ({} for a full sync)"""
+    if not cursor:
+        return {}
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        positions = {}
+        for name, (timestamp, row_id) in payload.items():
+            if name not in FEEDS and name != DELETED:
+                raise ValueError
+            parsed = parse_datetime(timestamp)
+            if parsed is None:
+                raise ValueError
+            positions[name] = (parsed, int(row_id))
+    except (ValueError, TypeError, AttributeError):
+        raise ValueError('Invalid cursor')
+    return positions
+
+
+def parse_changes_limit(value):
+    if value in (None, ''):
+        return DEFAULT_CHANGES_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError(f"Invalid limit '{value}'")
+    return max(1, min(limit, MAX_CHANGES_LIMIT))
+
+
+def _after(field, position):
+    # field >= t AND (field > t OR id > i) rather than the plain OR, which
+    # SQLite answers with two index searches and a sort instead of one range
+    timestamp, row_id = position
+    return Q(**{f'{field}__gte': timestamp}) & (Q(**{f'{field}__gt': timestamp}) | Q(id__gt=row_id))
+
+
+def _page(queryset, field, position, settled_before):
+    queryset = queryset.filter(**{f'{field}__lte': settled_before}).order_by(field, 'id')
+    if position is not None:
+        queryset = queryset.filter(_after(field, position))
+    return queryset
+
+
+def changes_since(positions, limit=DEFAULT_CHANGES_LIMIT):
+    """
+    Up to ``limit`` changed rows and tombstones per feed after ``positions``
+    (from decode_changes_cursor). Returns (changes, deleted, next positions,
+    has_more).
+    """
+    settled_before = timezone.now() - timedelta(seconds=settings.CHANGE_FEED_SETTLE_SECONDS)
+    positions = dict(positions)
+    changes, has_more = {}, False
+
+    for name, (model, serializer) in FEEDS.items():
+        queryset = _page(model.objects.all(), 'updated_at', positions.get(name), settled_before)
+        rows = serializer.to_rows(queryset.values_list(*serializer.lookups())[:limit + 1])
+        if len(rows) > limit:
+            rows, has_more = rows[:limit], True
+        if rows:
+            positions[name] = (parse_datetime(rows[-1]['updated_at']), rows[-1]['id'])
+        changes[name] = rows
+
+    tombstones = list(_page(DeletedRow.objects.all(), 'deleted_at', positions.get(DELETED), settled_before)
+                      .values_list('table', 'row_id', 'deleted_at', 'id')[:limit + 1])
+    if len(tombstones) > limit:
+        tombstones, has_more = tombstones[:limit], True
+    deleted = {name: [] for name in FEEDS}
+    for table, row_id, _, _ in tombstones:
+        deleted[table].append(row_id)
+    if tombstones:
+        positions[DELETED] = tombstones[-1][2], tombstones[-1][3]
+
+    return changes, deleted, positions, has_more
+
+
+def record_deletion(instance):
+    """Write a tombstone for a deleted feed row once the delete commits"""
+    model = type(instance)
+    table, row_id = FEED_NAMES[model], instance.pk
+    transaction.on_commit(
+        lambda: DeletedRow.objects.create(table=table, row_id=row_id),
+        using=router.db_for_write(model),
+    )
@@ -0,0 +1,81 @@
+"""
+Streaming exports of level progress for the admin dashboard
+
+Rows are read with values_list() projections in keyset-paginated chunks
+(id > last id), so memory stays flat no matter how many rows exist, and no
+single read transaction is held open for the whole download. Each row carries
+the same keys and value formats as LevelProgressSerializer.
+
+Under ASGI, Django collects a sync streaming body into a list before sending
+it, so the view hands ASGI requests an async iterator (astream) instead.
+"""
+import csv
+import json
+
+from asgiref.sync import sync_to_async
+
+from .fast_serializers import LevelProgressValuesSerializer
+from .models import LevelProgress
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Same keys, in the same order, as LevelProgressSerializer
+EXPORT_FIELDS = LevelProgressValuesSerializer.fields
+
+
+def iter_progress_chunks(queryset=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield lists of export rows (dicts keyed by EXPORT_FIELDS), chunk_size
+    rows at a time
+    """
+    if queryset is None:
+        queryset = LevelProgress.objects.all()
+    queryset = queryset.order_by('id').values_list(*LevelProgressValuesSerializer.lookups())
+    last_id = 0
+    while True:
+        rows = LevelProgressValuesSerializer.to_rows(queryset.filter(id__gt=last_id)[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1]['id']
+
+
+def stream_ndjson(chunks):
+    """One JSON object per line"""
+    for rows in chunks:
+        yield ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows)
+
+
+class _Echo:
+    """File-like object whose write() just returns the line for streaming"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(chunks):
+    """CSV with a header row of EXPORT_FIELDS"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for rows in chunks:
+        yield ''.join(writer.writerow([row[field] for field in EXPORT_FIELDS]) for row in rows)
+
+
+async def astream(stream):
+    """
+    Async iterator over a sync stream, advancing it one chunk per
+    sync_to_async call so only one chunk is in memory at a time
+    """
+    iterator = iter(stream)
+    advance = sync_to_async(next)
+    while True:
+        chunk = await advance(iterator, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+EXPORT_FORMATS = {
+    'ndjson': (stream_ndjson, 'application/x-ndjson'),
+    'csv': (stream_csv, 'text/csv; charset=utf-8'),
+}
@@ -0,0 +1,182 @@
+"""
+Read-only list serializers built on values_list()
+
+DRF's ModelSerializer builds a field tree and walks it for every instance,
+which dominates CPU time once a list has thousands of rows. These serializers
+fetch only the needed columns as tuples and zip them against a key list
+worked out once per class. Their output is identical to the matching
+ModelSerializer in serializers.py (tests/test_fast_serializers.py checks this).
+"""
+from django.utils import timezone
+
+from .models import User
+
+
+def datetime_formatter():
+    """
+    Return a function rendering datetimes the way DRF's DateTimeField does,
+    with the current timezone looked up once rather than per value
+    """
+    current_timezone = timezone.get_current_timezone()
+
+    def format_datetime(value):
+        if value is None:
+            return None
+        if timezone.is_aware(value):
+            value = value.astimezone(current_timezone)
+        value = value.isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+
+    return format_datetime
+
+
+def format_datetime(value):
+    """Render a single datetime the way DRF's DateTimeField does"""
+    return datetime_formatter()(value)
+
+
+def fill_usernames(rows):
+    """
+    Replace the user id in each row's 'username' with the username, using one
+    query rather than a join: memory stays bounded by the batch and users may
+    live in another database
+    """
+    user_ids = {row['username'] for row in rows}
+    usernames = dict(User.objects.filter(id__in=user_ids).values_list('id', 'username'))
+    for row in rows:
+        row['username'] = usernames.get(row['username'])
+    return rows
+
+
+async def afill_usernames(rows):
+    """fill_usernames() with the async ORM"""
+    user_ids = {row['username'] for row in rows}
+    usernames = {
+        user_id: username
+        async for user_id, username in User.objects.filter(id__in=user_ids).values_list('id', 'username')
+    }
+    for row in rows:
+        row['username'] = usernames.get(row['username'])
+    return rows
+
+
+class ValuesSerializer:
+    """
+    Subclasses set:
+      fields          - output keys, in the same order as the ModelSerializer
+      sources         - output key -> values() lookup, where they differ
+      datetime_fields - output keys rendered like DRF's DateTimeField
+    """
+    fields = []
+    sources = {}
+    datetime_fields = []
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+    @classmethod
+    def lookups(cls):
+        return [cls.sources.get(field, field) for field in cls.fields]
+
+    @classmethod
+    def to_rows(cls, tuples):
+        keys = cls.fields
+        if not cls.datetime_fields:
+            return [dict(zip(keys, values)) for values in tuples]
+        format_datetime = datetime_formatter()
+        indexes = [keys.index(key) for key in cls.datetime_fields]
+        rows = []
+        for values in tuples:
+            values = list(values)
+            for index in indexes:
+                values[index] = format_datetime(values[index])
+            rows.append(dict(zip(keys, values)))
+        return rows
+
+    @classmethod
+    async def ato_rows(cls, tuples):
+        """to_rows() for subclasses that query while building rows"""
+        return cls.to_rows(tuples)
+
+    @property
+    def data(self):
+        return self.to_rows(self.queryset.values_list(*self.lookups()))
+
+    async def adata(self):
+        """.data fetched with the async ORM"""
+        return await self.ato_rows([values async for values in self.queryset.values_list(*self.lookups())])
+
+
+class AchievementValuesSerializer(ValuesSerializer):
+    """Same output as AchievementSerializer"""
+    fields = ['id', 'name', 'description', 'icon', 'points']
+
+
+class UserAchievementValuesSerializer(ValuesSerializer):
+    """Same output as UserAchievementSerializer (achievement nested)"""
+    fields = ['id', 'achievement', 'unlocked_at']
+
+    @classmethod
+    def lookups(cls):
+        return ['id', 'unlocked_at'] + [f'achievement__{field}' for field in AchievementValuesSerializer.fields]
+
+    @classmethod
+    def to_rows(cls, tuples):
+        achievement_keys = AchievementValuesSerializer.fields
+        format_datetime = datetime_formatter()
+        return [
+            {
+                'id': values[0],
+                'achievement': dict(zip(achievement_keys, values[2:])),
+                'unlocked_at': format_datetime(values[1]),
+            }
+            for values in tuples
+        ]
+
+
+class LeaderboardValuesSerializer(ValuesSerializer):
+    """Same output as LeaderboardSerializer"""
+    fields = ['id', 'username', 'final_score', 'total_time', 'completion_date',
+              'rank_achieved', 'accuracy', 'speed_score']
+    sources = {'username': 'user_id'}
+    datetime_fields = ['completion_date']
+
+    @classmethod
+    def to_rows(cls, tuples):
+        return fill_usernames(super().to_rows(tuples))
+
+    @classmethod
+    async def ato_rows(cls, tuples):
+        return await afill_usernames(super().to_rows(tuples))
+
+
+class LevelProgressValuesSerializer(ValuesSerializer):
+    """Same output as LevelProgressSerializer"""
+    fields = ['id', 'session', 'session_id', 'username', 'level_number', 'question_category', 'difficulty',
+              'points_earned', 'bonus_points', 'riddle_attempts', 'security_attempts',
+              'hint_used', 'security_hint_used', 'riddle_solved', 'level_completed',
+              'completed_at', 'time_spent']
+    sources = {'session': 'session_id', 'username': 'session__user_id'}
+    datetime_fields = ['completed_at']
+
+    @classmethod
+    def to_rows(cls, tuples):
+        return fill_usernames(super().to_rows(tuples))
+
+    @classmethod
+    async def ato_rows(cls, tuples):
+        return await afill_usernames(super().to_rows(tuples))
+
+
+class QuestionValuesSerializer(ValuesSerializer):
+    """Same output as QuestionSerializer"""
+    fields = ['level_number', 'question', 'answer', 'security_riddle',
+              'security_key', 'hint', 'security_hint', 'category',
+              'difficulty', 'points', 'is_active']
+
+
+class PublicQuestionValuesSerializer(ValuesSerializer):
+    """QuestionSerializer output without the answer and security key"""
+    fields = [field for field in QuestionValuesSerializer.fields if field not in ('answer', 'security_key')]
@@ -0,0 +1,18 @@
+"""
+Password hashing policy
+
+PolicyPBKDF2PasswordHasher is Django's PBKDF2-SHA256 hasher with its work
+factor taken from settings.PASSWORD_HASH_ITERATIONS (Django's default when
+unset). Hashes keep the same 'pbkdf2_sha256$<iterations>$...' format, so
+existing passwords keep working whatever the setting, and Django treats any
+hash with a different iteration count as due for an update on login (see
+PASSWORD_REHASH_ON_LOGIN in passwords.py).
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class PolicyPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS or PBKDF2PasswordHasher.iterations
@@ -0,0 +1,139 @@
+"""
+Idempotency-Key support for mutating game endpoints
+
+A client that may deliver the same request twice (a retry after a timeout, a
+Streamlit rerun) sends an ``Idempotency-Key`` header. The first response for a
+(user, method, path, key) is kept in an in-process TTL/LRU cache and replayed,
+with an ``Idempotent-Replayed: true`` header, for every later delivery of the
+same request without calling the view or touching the database. Reusing a key
+for a different body is rejected with 422, and a duplicate that arrives while
+the original is still running gets 409.
+
+Only responses below 500 are kept, so server errors can be retried with the
+same key. Entries live in one process for IDEMPOTENCY_CACHE_TTL seconds.
+"""
+import functools
+import hashlib
+import json
+import threading
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.response import Response
+
+from .caching import TTLCache
+from .renderers import json_response
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+# (user id, method, path, key) -> (request fingerprint, status code, data)
+_responses = TTLCache(maxsize=settings.IDEMPOTENCY_CACHE_MAX_SIZE, ttl=settings.IDEMPOTENCY_CACHE_TTL)
+_in_flight = set()
+_in_flight_lock = threading.Lock()
+
+
+def clear_idempotency_cache():
+    _responses.clear()
+
+
+def request_fingerprint(data):
+    """Hash of the parsed request body, independent of key order"""
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _begin(request, data):
+    """
+    Look the request's key up. Returns (claim, early): ``early`` is a
+    (status code, data, headers) answer to send instead of running the view;
+    otherwise ``claim`` is None (no key) or what _finish() needs afterwards.
+    """
+    key = request.headers.get(HEADER)
+    if not key:
+        return None, None
+    if len(key) > MAX_KEY_LENGTH:
+        return None, (status.HTTP_400_BAD_REQUEST, {
+            'success': False,
+            'message': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'
+        }, None)
+
+    cache_key = (request.user.pk, request.method, request.path, key)
+    fingerprint = request_fingerprint(data)
+    with _in_flight_lock:
+        cached = _responses.get(cache_key)
+        if cached is None:
+            if cache_key in _in_flight:
+                return None, (status.HTTP_409_CONFLICT, {
+                    'success': False,
+                    'message': 'A request with this Idempotency-Key is still being processed'
+                }, None)
+            _in_flight.add(cache_key)
+            return (cache_key, fingerprint), None
+
+    cached_fingerprint, status_code, cached_data = cached
+    if cached_fingerprint != fingerprint:
+        return None, (status.HTTP_422_UNPROCESSABLE_ENTITY, {
+            'success': False,
+            'message': f'{HEADER} was already used for a different request'
+        }, None)
+    return None, (status_code, cached_data, {'Idempotent-Replayed': 'true'})
+
+
+def _finish(claim, status_code, data):
+    cache_key, fingerprint = claim
+    if status_code < 500 and data is not None:
+        _responses.set(cache_key, (fingerprint, status_code, data))
+
+
+def _release(claim):
+    with _in_flight_lock:
+        _in_flight.discard(claim[0])
+
+
+def idempotent(view):
+    """
+    Decorator for function-based API views, placed below @api_view and
+    @permission_classes so it runs after authentication
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        claim, early = _begin(request, request.data)
+        if early is not None:
+            status_code, data, headers = early
+            return Response(data, status=status_code, headers=headers)
+        if claim is None:
+            return view(request, *args, **kwargs)
+        try:
+            response = view(request, *args, **kwargs)
+            _finish(claim, response.status_code, getattr(response, 'data', None))
+            return response
+        finally:
+            _release(claim)
+
+    return wrapper
+
+
+def aidempotent(view):
+    """idempotent() for the async JSON views in async_views.py"""
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            data = request.body.decode('latin-1')
+        claim, early = _begin(request, data)
+        if early is not None:
+            status_code, data, headers = early
+            return json_response(data, status=status_code, headers=headers)
+        if claim is None:
+            return await view(request, *args, **kwargs)
+        try:
+            response = await view(request, *args, **kwargs)
+            _finish(claim, response.status_code, getattr(response, 'data', None))
+            return response
+        finally:
+            _release(claim)
+
+    return wrapper
@@ -0,0 +1,104 @@
+"""
+Incremental maintenance of the LevelStats totals
+
+Every LevelProgress write adds its contribution to the (level, difficulty)
+row with UPDATE ... SET col = col + ?, inside the caller's transaction, so the
+totals always match the progress rows they summarise. An updated progress row
+contributes the difference between its new and previous values. Deletes are
+handled by the post_delete signal in signals.py. Batches of rows written by the
+write-behind flusher are summed per (level, difficulty) first.
+
+rebuild_level_stats() recomputes everything from LevelProgress, for rows
+edited outside these paths (e.g. in the Django admin).
+"""
+from collections import defaultdict
+
+from django.db import router, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import LevelProgress, LevelStats
+
+COUNTER_FIELDS = [
+    'attempts', 'solves', 'hints', 'riddle_attempts_sum', 'security_attempts_sum', 'time_spent_sum',
+]
+
+
+def progress_snapshot(progress):
+    """(level_number, difficulty) key and counter contribution of one progress row"""
+    return (progress.level_number, progress.difficulty), {
+        'attempts': 1,
+        'solves': int(progress.level_completed),
+        'hints': int(progress.hint_used),
+        'riddle_attempts_sum': progress.riddle_attempts,
+        'security_attempts_sum': progress.security_attempts,
+        'time_spent_sum': progress.time_spent,
+    }
+
+
+def _apply(key, deltas):
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    level_number, difficulty = key
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    updated = LevelStats.objects.filter(level_number=level_number, difficulty=difficulty).update(
+        updated_at=timezone.now(), **updates
+    )
+    if not updated:
+        LevelStats.objects.get_or_create(level_number=level_number, difficulty=difficulty)
+        LevelStats.objects.filter(level_number=level_number, difficulty=difficulty).update(**updates)
+    elif deltas.get('attempts', 0) < 0:
+        # Last progress row of this level/difficulty removed
+        LevelStats.objects.filter(level_number=level_number, difficulty=difficulty, attempts__lte=0).delete()
+
+
+def record_level_progress(progress, previous=None):
+    """
+    Add a saved progress row to the totals. ``previous`` is the
+    progress_snapshot() taken before an existing row was modified.
+    """
+    record_level_progress_batch([(progress, previous)])
+
+
+def record_level_progress_batch(changes):
+    """
+    record_level_progress() for a list of (progress, previous) pairs, with one
+    UPDATE per (level_number, difficulty) touched
+    """
+    totals = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+    for progress, previous in changes:
+        key, contribution = progress_snapshot(progress)
+        for field, value in contribution.items():
+            totals[key][field] += value
+        if previous is not None:
+            previous_key, previous_contribution = previous
+            for field, value in previous_contribution.items():
+                totals[previous_key][field] -= value
+    for key, deltas in totals.items():
+        _apply(key, deltas)
+
+
+def remove_level_progress(progress):
+    """Subtract a deleted progress row from the totals"""
+    key, contribution = progress_snapshot(progress)
+    _apply(key, {field: -value for field, value in contribution.items()})
+
+
+def rebuild_level_stats(using=None):
+    """Recompute every LevelStats row from LevelProgress"""
+    using = using or router.db_for_write(LevelStats)
+    with transaction.atomic(using=using):
+        totals = (
+            LevelProgress.objects.using(using).order_by().values('level_number', 'difficulty').annotate(
+                attempts=Count('id'),
+                solves=Count('id', filter=Q(level_completed=True)),
+                hints=Count('id', filter=Q(hint_used=True)),
+                riddle_attempts_sum=Coalesce(Sum('riddle_attempts'), 0),
+                security_attempts_sum=Coalesce(Sum('security_attempts'), 0),
+                time_spent_sum=Coalesce(Sum('time_spent'), 0.0),
+            )
+        )
+        LevelStats.objects.using(using).all().delete()
+        return LevelStats.objects.using(using).bulk_create([LevelStats(**row) for row in totals])
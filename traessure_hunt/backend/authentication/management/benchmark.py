@@ -0,0 +1,40 @@
+"""
+Shared helpers for the benchmark_* management commands
+"""
+import copy
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import setup_databases, teardown_databases
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def register_database(alias, config):
+    """Add a database alias at runtime so the ORM can route queries to it"""
+    configured = connections.configure_settings({
+        DEFAULT_DB_ALIAS: copy.deepcopy(settings.DATABASES[DEFAULT_DB_ALIAS]),
+        alias: copy.deepcopy(config),
+    })
+    connections.settings[alias] = configured[alias]
+
+
+@contextmanager
+def scratch_databases():
+    """
+    Point every configured database at a freshly migrated test database, the
+    same way `manage.py test` does, so benchmarks never touch real data.
+    """
+    old_config = setup_databases(verbosity=0, interactive=False, aliases=set(connections))
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
@@ -0,0 +1,170 @@
+"""
+Django Management Command to load test the hot gameplay endpoints, WSGI vs ASGI
+Run with: python manage.py benchmark_asgi --players 500 --rounds 5 --threads 32
+
+Fills a scratch test database with questions, players and a leaderboard, then
+runs --players simulated players concurrently on one asyncio event loop. Each
+player repeats a round of: fetch questions, fetch its active session, save a
+level, fetch the leaderboard. The same driver calls:
+
+  wsgi - the WSGI application on a pool of --threads worker threads, like a
+         threaded WSGI server (gunicorn --threads); latency includes waiting
+         for a free thread
+  asgi - treasure_hunt_backend.asgi.application directly on the event loop,
+         so the async views in authentication/async_views.py handle the calls
+
+No sockets are involved, so the numbers compare the two request paths rather
+than HTTP servers. Use TREASURE_HUNT_DB_PROFILE=production for WAL SQLite.
+"""
+import asyncio
+import io
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from authentication.management.benchmark import percentile, scratch_databases
+from authentication.models import GameSession, Leaderboard, Question, User
+
+LEVELS = 6
+
+
+class Command(BaseCommand):
+    help = 'Load test the hot gameplay endpoints through the WSGI and ASGI applications'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=500, help='Concurrent simulated players')
+        parser.add_argument('--rounds', type=int, default=5, help='Rounds of 4 requests per player')
+        parser.add_argument('--threads', type=int, default=32, help='WSGI worker threads')
+        parser.add_argument('--modes', nargs='+', default=['wsgi', 'asgi'], choices=['wsgi', 'asgi'])
+
+    def handle(self, *args, **options):
+        # Imported here: the ASGI entrypoint runs django.setup() on import
+        from treasure_hunt_backend.asgi import application as asgi_application
+
+        results = []
+        with scratch_databases():
+            keys = self.populate(options['players'])
+            for mode in options['modes']:
+                self.stdout.write(self.style.WARNING(f'Running {mode} with {len(keys)} players...'))
+                if mode == 'wsgi':
+                    with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                        call = self.wsgi_caller(WSGIHandler(), pool)
+                        results.append((mode, asyncio.run(self.run_players(call, keys, options['rounds']))))
+                else:
+                    call = self.asgi_caller(asgi_application)
+                    results.append((mode, asyncio.run(self.run_players(call, keys, options['rounds']))))
+                connections.close_all()
+
+        self.stdout.write('')
+        self.stdout.write(f"{'mode':<6} {'requests':>9} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for mode, r in results:
+            self.stdout.write(
+                f"{mode:<6} {r['requests']:>9} {r['rate']:>9.1f} {r['p50']:>9.2f} {r['p99']:>9.2f} {r['errors']:>7}"
+            )
+
+    def populate(self, players):
+        for level in range(LEVELS):
+            Question.objects.create(
+                level_number=level, question=f'Question {level}', answer='a', security_riddle='?',
+                security_key='k', hint='h', security_hint='h', category='Benchmark',
+            )
+        users = User.objects.bulk_create(User(username=f'bench_player_{i}') for i in range(players))
+        sessions = GameSession.objects.bulk_create(
+            GameSession(user=user, session_token=f'bench-{user.id}') for user in users
+        )
+        Leaderboard.objects.bulk_create(
+            Leaderboard(user=session.user, session=session, final_score=i, total_time=60.0, accuracy=90,
+                        speed_score=1, completion_date=timezone.now())
+            for i, session in enumerate(sessions[:100])
+        )
+        return [Token.objects.create(user=user).key for user in users]
+
+    async def run_players(self, call, keys, rounds):
+        latencies, errors = [], []
+
+        async def player(key):
+            headers = [(b'authorization', f'Token {key}'.encode())]
+            for round_number in range(rounds):
+                body = json.dumps({'level': round_number % LEVELS + 1, 'score': round_number * 10}).encode()
+                for method, path, payload in (
+                    ('GET', '/api/auth/questions/public/', b''),
+                    ('GET', '/api/auth/game/session/', b''),
+                    ('POST', '/api/auth/game/level/', body),
+                    ('GET', '/api/auth/leaderboard/', b''),
+                ):
+                    started = time.perf_counter()
+                    status_code = await call(method, path, headers, payload)
+                    latencies.append(time.perf_counter() - started)
+                    if status_code >= 400:
+                        errors.append(status_code)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(player(key) for key in keys))
+        elapsed = time.perf_counter() - started
+        return {
+            'requests': len(latencies),
+            'rate': len(latencies) / elapsed,
+            'p50': percentile(latencies, 50) * 1000,
+            'p99': percentile(latencies, 99) * 1000,
+            'errors': len(errors),
+        }
+
+    def wsgi_caller(self, handler, pool):
+        def call_sync(method, path, headers, body):
+            environ = {
+                'REQUEST_METHOD': method, 'PATH_INFO': path, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+                'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+                'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(body), 'wsgi.errors': io.StringIO(),
+                'CONTENT_TYPE': 'application/json', 'CONTENT_LENGTH': str(len(body)),
+            }
+            for name, value in headers:
+                environ['HTTP_' + name.decode().upper().replace('-', '_')] = value.decode()
+            status_line = []
+            response = handler(environ, lambda status, response_headers, exc_info=None: status_line.append(status))
+            try:
+                b''.join(response)
+            finally:
+                response.close()
+            return int(status_line[0].split()[0])
+
+        async def call(method, path, headers, body):
+            return await asyncio.get_running_loop().run_in_executor(pool, call_sync, method, path, headers, body)
+
+        return call
+
+    def asgi_caller(self, application):
+        async def call(method, path, headers, body):
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+                'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'',
+                'root_path': '', 'server': ('testserver', 80), 'client': ('127.0.0.1', 50000),
+                'headers': headers + [
+                    (b'host', b'testserver'), (b'content-type', b'application/json'),
+                    (b'content-length', str(len(body)).encode()),
+                ],
+            }
+            messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+            disconnected = asyncio.Event()
+            status_code = []
+
+            async def receive():
+                if messages:
+                    return messages.pop()
+                # Django listens for a client disconnect until the response is sent
+                await disconnected.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status_code.append(message['status'])
+
+            await application(scope, receive, send)
+            return status_code[0]
+
+        return call
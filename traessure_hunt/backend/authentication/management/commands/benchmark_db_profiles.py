@@ -0,0 +1,137 @@
+"""
+Django Management Command to compare the SQLite database profiles under load
+Run with: python manage.py benchmark_db_profiles --players 50 --saves 20
+
+Each profile from settings.DATABASE_PROFILES gets a fresh, migrated database in
+a temporary directory. Writer threads then replay autosaves (level progress
+upsert + session update) while reader threads poll the leaderboard and session
+progress, which is what a room full of players looks like during an event.
+"""
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+from django.utils import timezone
+
+from authentication.management.benchmark import percentile, register_database
+from authentication.models import GameSession, LevelProgress, Leaderboard, User
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent autosaves against each SQLite database profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=50, help='Concurrent writer threads')
+        parser.add_argument('--saves', type=int, default=20, help='Autosaves per player')
+        parser.add_argument('--readers', type=int, default=10, help='Concurrent reader threads')
+        parser.add_argument('--profiles', nargs='+', default=list(settings.DATABASE_PROFILES),
+                            help='Profiles to compare')
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            results = []
+            for profile in options['profiles']:
+                alias = f'bench_{profile}'
+                config = dict(settings.DATABASE_PROFILES[profile], NAME=str(Path(tmp_dir) / f'{profile}.db'))
+                register_database(alias, config)
+                call_command('migrate', database=alias, verbosity=0)
+
+                self.stdout.write(self.style.WARNING(f'Running {profile} profile...'))
+                results.append((profile, self.run_load(alias, options)))
+                connections[alias].close()
+
+        self.stdout.write('')
+        self.stdout.write(
+            f"{'profile':<12} {'writes/s':>9} {'w p50 ms':>9} {'w p99 ms':>9} "
+            f"{'reads/s':>9} {'r p99 ms':>9} {'errors':>7}"
+        )
+        for profile, r in results:
+            self.stdout.write(
+                f"{profile:<12} {r['write_rate']:>9.1f} {r['write_p50']:>9.2f} {r['write_p99']:>9.2f} "
+                f"{r['read_rate']:>9.1f} {r['read_p99']:>9.2f} {r['errors']:>7}"
+            )
+
+    def run_load(self, alias, options):
+        sessions = []
+        for i in range(options['players']):
+            user = User.objects.using(alias).create(username=f'bench_player_{i}')
+            sessions.append(GameSession.objects.using(alias).create(user=user, session_token=f'bench-{i}'))
+
+        write_latencies, read_latencies, errors = [], [], []
+        lock = threading.Lock()
+        writers_done = threading.Event()
+
+        def writer(session):
+            local, failed = [], 0
+            try:
+                for save in range(options['saves']):
+                    started = time.perf_counter()
+                    try:
+                        with transaction.atomic(using=alias):
+                            LevelProgress.objects.using(alias).update_or_create(
+                                session=session,
+                                level_number=save % 6,
+                                defaults={
+                                    'question_category': 'Benchmark',
+                                    'difficulty': 'medium',
+                                    'points_earned': save * 10,
+                                    'level_completed': True,
+                                    'completed_at': timezone.now(),
+                                },
+                            )
+                            GameSession.objects.using(alias).filter(id=session.id).update(
+                                current_level=save % 6, score=save * 10
+                            )
+                        local.append(time.perf_counter() - started)
+                    except OperationalError:
+                        failed += 1
+            finally:
+                connections[alias].close()
+            with lock:
+                write_latencies.extend(local)
+                errors.append(failed)
+
+        def reader(index):
+            local, failed = [], 0
+            try:
+                while not writers_done.is_set():
+                    started = time.perf_counter()
+                    try:
+                        list(Leaderboard.objects.using(alias).all()[:10])
+                        list(LevelProgress.objects.using(alias).filter(session=sessions[index % len(sessions)]))
+                        local.append(time.perf_counter() - started)
+                    except OperationalError:
+                        failed += 1
+            finally:
+                connections[alias].close()
+            with lock:
+                read_latencies.extend(local)
+                errors.append(failed)
+
+        writers = [threading.Thread(target=writer, args=(s,)) for s in sessions]
+        readers = [threading.Thread(target=reader, args=(i,)) for i in range(options['readers'])]
+
+        started = time.perf_counter()
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        writers_done.set()
+        for thread in readers:
+            thread.join()
+
+        return {
+            'write_rate': len(write_latencies) / elapsed,
+            'write_p50': statistics.median(write_latencies) * 1000 if write_latencies else 0.0,
+            'write_p99': percentile(write_latencies, 99) * 1000,
+            'read_rate': len(read_latencies) / elapsed,
+            'read_p99': percentile(read_latencies, 99) * 1000,
+            'errors': sum(errors),
+        }
@@ -0,0 +1,121 @@
+"""
+Django Management Command to measure login password checks per second per core
+Run with: python manage.py benchmark_logins --clients 64 --logins 2000 --workers 1 2 4
+
+Creates --users players in a scratch test database with passwords hashed at
+--iterations, then has --clients threads log in as random players through
+verify_credentials(), the function LoginSerializer uses:
+
+  inline    - PASSWORD_CHECK_WORKERS=0, every client thread hashes itself,
+              as authenticate() did before the password pool
+  workers=N - hashing on a PasswordCheckPool of N threads
+
+Cores is the number of threads that can hash at once, capped at the CPU
+count. Logins/s counts successful logins only; refused ones (pool full or
+timed out) are reported separately. Rehashing is off so every login costs
+exactly one check.
+"""
+import os
+import random
+import threading
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import override_settings
+
+from authentication import passwords
+from authentication.management.benchmark import percentile, scratch_databases
+from authentication.models import User
+from authentication.passwords import PasswordCheckBusy, PasswordCheckPool
+
+PASSWORD = 'bench-password'
+
+
+class Command(BaseCommand):
+    help = 'Compare login password checks inline vs on the bounded password pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Distinct players')
+        parser.add_argument('--logins', type=int, default=2000, help='Logins per run')
+        parser.add_argument('--clients', type=int, default=64, help='Concurrent client threads')
+        parser.add_argument('--iterations', type=int, default=None,
+                            help="PBKDF2 iterations (default: the current policy)")
+        parser.add_argument('--workers', type=int, nargs='+', default=[os.cpu_count() or 1],
+                            help='Password pool sizes to run after the inline baseline')
+
+    def handle(self, *args, **options):
+        cpus = os.cpu_count() or 1
+        results = []
+        with scratch_databases(), override_settings(PASSWORD_HASH_ITERATIONS=options['iterations'],
+                                                    PASSWORD_REHASH_ON_LOGIN=False):
+            # One hash shared by every player: creating thousands would take longer than the benchmark
+            encoded = make_password(PASSWORD)
+            User.objects.bulk_create(
+                User(username=f'bench_player_{i}', password=encoded) for i in range(options['users'])
+            )
+            self.stdout.write(f"Hash: {encoded.split('$', 2)[0]} with {encoded.split('$')[1]} iterations")
+
+            for workers in [0] + options['workers']:
+                name = f'workers={workers}' if workers else 'inline'
+                self.stdout.write(self.style.WARNING(f'Running {name}...'))
+                saved_pool = passwords._pool
+                pool = passwords._pool = PasswordCheckPool(workers, options['clients']) if workers else None
+                try:
+                    with override_settings(PASSWORD_CHECK_WORKERS=workers):
+                        stats = self.run_clients(options['users'], options['logins'], options['clients'])
+                finally:
+                    passwords._pool = saved_pool
+                    if pool:
+                        pool._executor.shutdown()
+                cores = min(workers or options['clients'], cpus)
+                results.append((name, cores, stats))
+
+        self.stdout.write('')
+        self.stdout.write(f"{'run':<12} {'cores':>5} {'logins/s':>9} {'per core':>9} "
+                          f"{'p50 ms':>9} {'p99 ms':>9} {'refused':>8}")
+        for name, cores, r in results:
+            self.stdout.write(
+                f"{name:<12} {cores:>5} {r['rate']:>9.1f} {r['rate'] / cores:>9.1f} "
+                f"{r['p50']:>9.2f} {r['p99']:>9.2f} {r['refused']:>8}"
+            )
+
+    def run_clients(self, users, logins, clients):
+        latencies, refused = [], []
+        remaining = iter(range(logins))
+        lock = threading.Lock()
+
+        def client(seed):
+            rng = random.Random(seed)
+            try:
+                while True:
+                    with lock:
+                        if next(remaining, None) is None:
+                            return
+                    started = time.perf_counter()
+                    try:
+                        passwords.verify_credentials(f'bench_player_{rng.randrange(users)}', PASSWORD)
+                    except PasswordCheckBusy:
+                        with lock:
+                            refused.append(time.perf_counter() - started)
+                        continue
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        latencies.append(elapsed)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=client, args=(seed,)) for seed in range(clients)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        return {
+            'rate': len(latencies) / elapsed,
+            'p50': percentile(latencies, 50) * 1000,
+            'p99': percentile(latencies, 99) * 1000,
+            'refused': len(refused),
+        }
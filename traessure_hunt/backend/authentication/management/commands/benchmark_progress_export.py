@@ -0,0 +1,69 @@
+"""
+Django Management Command to measure memory use of the level progress export
+Run with: python manage.py benchmark_progress_export --rows 1000000
+
+Fills a scratch test database with level progress rows, then consumes the
+streaming NDJSON/CSV exports and (optionally) the old serializer-based
+/game/progress/all/ path, reporting throughput and peak traced memory.
+"""
+import json
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from authentication.exports import EXPORT_FORMATS, iter_progress_chunks
+from authentication.management.benchmark import scratch_databases
+from authentication.models import GameSession, LevelProgress, User
+from authentication.serializers import LevelProgressSerializer
+
+LEVELS = 6
+
+
+class Command(BaseCommand):
+    help = 'Measure peak memory and throughput of the streaming level progress export'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='LevelProgress rows to export')
+        parser.add_argument('--serializer', action='store_true',
+                            help='Also measure the LevelProgressSerializer list (slow and memory hungry)')
+
+    def handle(self, *args, **options):
+        with scratch_databases():
+            self.populate(options['rows'])
+
+            self.stdout.write(f"{'path':<12} {'rows/s':>10} {'peak MB':>9} {'bytes':>12}")
+            for name, (stream, _content_type) in EXPORT_FORMATS.items():
+                self.measure(name, lambda stream=stream: sum(len(part) for part in stream(iter_progress_chunks())))
+            if options['serializer']:
+                self.measure('serializer', lambda: len(json.dumps(LevelProgressSerializer(
+                    LevelProgress.objects.select_related('session').prefetch_related('session__user'), many=True
+                ).data)))
+
+    def populate(self, rows):
+        players = max(1, rows // LEVELS)
+        self.stdout.write(self.style.WARNING(f'Creating {rows} level progress rows for {players} players...'))
+        users = User.objects.bulk_create(User(username=f'bench_player_{i}') for i in range(players))
+        sessions = GameSession.objects.bulk_create(
+            GameSession(user=user, session_token=f'bench-{user.id}') for user in users
+        )
+        batch = []
+        for index in range(rows):
+            batch.append(LevelProgress(
+                session=sessions[index // LEVELS % players], level_number=index % LEVELS + index // (LEVELS * players) * LEVELS,
+                question_category='Benchmark', difficulty='medium', points_earned=10,
+            ))
+            if len(batch) == 5000:
+                LevelProgress.objects.bulk_create(batch)
+                batch = []
+        LevelProgress.objects.bulk_create(batch)
+
+    def measure(self, name, consume):
+        rows = LevelProgress.objects.count()
+        tracemalloc.start()
+        started = time.perf_counter()
+        size = consume()
+        elapsed = time.perf_counter() - started
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.stdout.write(f'{name:<12} {rows / elapsed:>10.0f} {peak / 1e6:>9.1f} {size:>12}')
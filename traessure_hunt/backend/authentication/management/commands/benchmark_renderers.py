@@ -0,0 +1,115 @@
+"""
+Django Management Command to measure response payloads and JSON rendering time
+Run with: python manage.py benchmark_renderers --players 2000
+
+Fills a scratch test database with the real questions and --players players'
+progress, requests every read endpoint once, then re-renders each response
+body with DRF's stdlib JSONRenderer and with FastJSONRenderer and reports the
+raw and gzipped payload sizes.
+"""
+import io
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.utils.text import compress_string
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from authentication import renderers
+from authentication.management.benchmark import scratch_databases
+from authentication.models import Achievement, GameSession, Leaderboard, LevelProgress, User
+from authentication.renderers import FastJSONRenderer
+
+LEVELS = 6
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = 'Benchmark payload size and JSON rendering time for each API endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=2000, help='Players with full level progress')
+        parser.add_argument('--repeat', type=int, default=5, help='Renders per endpoint (best is reported)')
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed - FastJSONRenderer uses the stdlib'))
+
+        with scratch_databases():
+            admin, session = self.populate(options['players'])
+            admin_client = self.client_for(admin)
+            player_client = self.client_for(session.user)
+            endpoints = [
+                (player_client, '/api/auth/questions/public/'),
+                (player_client, '/api/auth/achievements/all/'),
+                (player_client, '/api/auth/leaderboard/?limit=1000'),
+                (player_client, f'/api/auth/game/session/{session.id}/progress/'),
+                (admin_client, '/api/auth/game/progress/?limit=500'),
+                (admin_client, '/api/auth/game/progress/stats/'),
+                (admin_client, '/api/auth/game/progress/level-stats/'),
+                (admin_client, '/api/auth/game/progress/all/'),
+            ]
+
+            self.stdout.write(
+                f"{'endpoint':<40} {'bytes':>10} {'gzip':>9} {'ratio':>6} "
+                f"{'stdlib ms':>10} {'fast ms':>8} {'gzip ms':>8}"
+            )
+            for client, url in endpoints:
+                data = client.get(url).data
+                stdlib_time, body = self.measure(lambda: JSONRenderer().render(data), options['repeat'])
+                fast_time, _ = self.measure(lambda: FastJSONRenderer().render(data), options['repeat'])
+                gzip_time, compressed = self.measure(lambda: compress_string(body), options['repeat'])
+                self.stdout.write(
+                    f'{url.split("?")[0]:<40} {len(body):>10} {len(compressed):>9} '
+                    f'{len(body) / len(compressed):>5.1f}x {stdlib_time * 1000:>10.2f} '
+                    f'{fast_time * 1000:>8.2f} {gzip_time * 1000:>8.2f}'
+                )
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+        return client
+
+    def measure(self, render, repeat):
+        best, result = None, None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = render()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    def populate(self, players):
+        self.stdout.write(self.style.WARNING(f'Creating {players} players with {LEVELS} levels each...'))
+        call_command('populate_questions', stdout=io.StringIO())
+        Achievement.objects.bulk_create(
+            Achievement(name=f'Badge {i}', description='Unlocked during the benchmark', icon='🏆', points=10)
+            for i in range(20)
+        )
+        admin = User.objects.create_user(username='bench_admin', password='bench-password', is_staff=True)
+        users = User.objects.bulk_create(
+            (User(username=f'bench_player_{i}') for i in range(players)), batch_size=BATCH_SIZE
+        )
+        sessions = GameSession.objects.bulk_create(
+            (GameSession(user=user, session_token=f'bench-{user.id}', is_active=False, finished=True)
+             for user in users),
+            batch_size=BATCH_SIZE,
+        )
+        now = timezone.now()
+        LevelProgress.objects.bulk_create((
+            LevelProgress(
+                session=session, level_number=level, question_category='Benchmark', difficulty='medium',
+                points_earned=10, riddle_solved=True, level_completed=True, completed_at=now, time_spent=42.5,
+            ) for session in sessions for level in range(LEVELS)
+        ), batch_size=BATCH_SIZE)
+        Leaderboard.objects.bulk_create((
+            Leaderboard(
+                user_id=session.user_id, session=session, final_score=index, total_time=312.5,
+                rank_achieved='Kernel Master', accuracy=87.5, speed_score=64.25,
+            ) for index, session in enumerate(sessions)
+        ), batch_size=BATCH_SIZE)
+        call_command('rebuild_level_stats', stdout=io.StringIO())
+        return admin, sessions[0]
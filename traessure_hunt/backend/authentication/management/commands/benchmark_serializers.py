@@ -0,0 +1,108 @@
+"""
+Django Management Command to compare the DRF ModelSerializers with the
+values_list() serializers used by the list endpoints
+Run with: python manage.py benchmark_serializers --rows 10000
+
+Fills a scratch test database with --rows rows per model, then serializes each
+list with both implementations (best of --repeat runs, including the queries)
+and checks that the JSON output is identical.
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from authentication.fast_serializers import (
+    AchievementValuesSerializer, LeaderboardValuesSerializer, LevelProgressValuesSerializer,
+    QuestionValuesSerializer, UserAchievementValuesSerializer,
+)
+from authentication.management.benchmark import scratch_databases
+from authentication.models import (
+    Achievement, GameSession, Leaderboard, LevelProgress, Question, User, UserAchievement,
+)
+from authentication.serializers import (
+    AchievementSerializer, LeaderboardSerializer, LevelProgressSerializer,
+    QuestionSerializer, UserAchievementSerializer,
+)
+
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = 'Benchmark DRF ModelSerializers against the values_list() list serializers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Rows per serialized list')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per serializer (best is reported)')
+
+    def handle(self, *args, **options):
+        with scratch_databases():
+            user = self.populate(options['rows'])
+            cases = [
+                ('questions', Question.objects.filter(is_active=True).order_by('level_number'),
+                 QuestionSerializer, QuestionValuesSerializer),
+                ('leaderboard', Leaderboard.objects.all(), LeaderboardSerializer, LeaderboardValuesSerializer),
+                ('session progress', LevelProgress.objects.all(), LevelProgressSerializer, LevelProgressValuesSerializer),
+                ('user achievements', UserAchievement.objects.filter(user=user),
+                 UserAchievementSerializer, UserAchievementValuesSerializer),
+                ('achievements', Achievement.objects.all(), AchievementSerializer, AchievementValuesSerializer),
+            ]
+
+            self.stdout.write(f"{'list':<18} {'rows':>7} {'drf ms':>9} {'values ms':>10} {'speedup':>8} {'same':>5}")
+            for name, queryset, model_serializer, values_serializer in cases:
+                drf_time, drf_data = self.measure(lambda: model_serializer(queryset, many=True).data, options['repeat'])
+                fast_time, fast_data = self.measure(lambda: values_serializer(queryset).data, options['repeat'])
+                same = json.dumps(drf_data) == json.dumps(fast_data)
+                self.stdout.write(
+                    f'{name:<18} {len(fast_data):>7} {drf_time * 1000:>9.1f} {fast_time * 1000:>10.1f} '
+                    f"{drf_time / fast_time:>7.1f}x {'yes' if same else 'NO':>5}"
+                )
+
+    def measure(self, serialize, repeat):
+        best, data = None, None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            data = serialize()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, data
+
+    def populate(self, rows):
+        """rows of every model; one user owns all achievements, sessions and entries"""
+        self.stdout.write(self.style.WARNING(f'Creating {rows} rows per model...'))
+        user = User.objects.create(username='bench_player')
+        sessions = GameSession.objects.bulk_create(
+            (GameSession(user=user, session_token=f'bench-{i}', is_active=False) for i in range(rows)),
+            batch_size=BATCH_SIZE,
+        )
+        Question.objects.bulk_create((
+            Question(
+                level_number=i, question=f'Riddle number {i}\nwith a second line of text',
+                answer='kernel', security_riddle='Which command prints the working directory?',
+                security_key='pwd', hint='Think about the heart of the OS', security_hint='Three letters',
+                category='Benchmark', difficulty='medium',
+            ) for i in range(rows)
+        ), batch_size=BATCH_SIZE)
+        achievements = Achievement.objects.bulk_create((
+            Achievement(name=f'Badge {i}', description='Unlocked during the benchmark', icon='🏆', points=i)
+            for i in range(rows)
+        ), batch_size=BATCH_SIZE)
+        UserAchievement.objects.bulk_create(
+            (UserAchievement(user=user, achievement=achievement) for achievement in achievements),
+            batch_size=BATCH_SIZE,
+        )
+        now = timezone.now()
+        Leaderboard.objects.bulk_create((
+            Leaderboard(
+                user=user, session=session, final_score=i, total_time=120.5, rank_achieved='Benchmark',
+                accuracy=87.5, speed_score=64.25,
+            ) for i, session in enumerate(sessions)
+        ), batch_size=BATCH_SIZE)
+        LevelProgress.objects.bulk_create((
+            LevelProgress(
+                session=session, level_number=0, question_category='Benchmark', difficulty='medium',
+                points_earned=10, level_completed=True, completed_at=now, time_spent=42.0,
+            ) for session in sessions
+        ), batch_size=BATCH_SIZE)
+        return user
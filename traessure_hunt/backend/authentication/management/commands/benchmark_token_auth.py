@@ -0,0 +1,59 @@
+"""
+Django Management Command to measure per-request token authentication cost
+Run with: python manage.py benchmark_token_auth --users 200 --requests 5000
+
+Runs against a scratch test database. Every simulated request authenticates a
+random player's token with DRF's TokenAuthentication and with
+CachedTokenAuthentication, counting the queries each one issues.
+"""
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+
+from authentication.authentication import CachedTokenAuthentication, clear_token_cache
+from authentication.management.benchmark import scratch_databases
+from authentication.models import User
+
+
+class Command(BaseCommand):
+    help = 'Compare queries and time per request for plain vs cached token authentication'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Distinct players/tokens')
+        parser.add_argument('--requests', type=int, default=5000, help='Authenticated requests to simulate')
+
+    def handle(self, *args, **options):
+        with scratch_databases():
+            users = User.objects.bulk_create(
+                User(username=f'bench_player_{i}') for i in range(options['users'])
+            )
+            keys = [Token.objects.create(user=user).key for user in users]
+            rng = random.Random(42)
+            workload = [rng.choice(keys) for _ in range(options['requests'])]
+
+            factory = RequestFactory()
+            requests = [
+                Request(factory.get('/api/auth/profile/', HTTP_AUTHORIZATION=f'Token {key}'))
+                for key in workload
+            ]
+
+            self.stdout.write(f"{'authenticator':<28} {'queries/req':>12} {'us/req':>9}")
+            for authenticator in (TokenAuthentication(), CachedTokenAuthentication()):
+                clear_token_cache()
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    for request in requests:
+                        authenticator.authenticate(request)
+                    elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{type(authenticator).__name__:<28} "
+                    f"{len(queries) / len(requests):>12.3f} "
+                    f"{elapsed / len(requests) * 1e6:>9.1f}"
+                )
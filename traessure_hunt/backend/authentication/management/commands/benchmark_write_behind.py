@@ -0,0 +1,115 @@
+"""
+Django Management Command to compare direct and write-behind level progress saves
+Run with: python manage.py benchmark_write_behind --players 50 --saves 20
+
+Each mode gets a freshly migrated scratch database. --players threads post
+autosaves to /api/auth/game/level/ (cycling through the levels, so later saves
+overwrite earlier ones) and the command reports request latency, throughput
+including the final flush, and how many INSERT/UPDATE statements reached the
+database from request threads and the flusher together.
+"""
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from authentication.management.benchmark import percentile, scratch_databases
+from authentication.models import GameSession, LevelProgress, Question, User
+from authentication.write_behind import progress_buffer
+
+LEVELS = 6
+
+
+class Command(BaseCommand):
+    help = 'Benchmark level progress saves with and without the write-behind buffer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=50, help='Concurrent players')
+        parser.add_argument('--saves', type=int, default=20, help='Autosaves per player')
+        parser.add_argument('--interval-ms', type=int, default=200, help='Write-behind flush interval')
+
+    def handle(self, *args, **options):
+        results = []
+        for mode, write_behind in (('direct', False), ('write-behind', True)):
+            with scratch_databases(), override_settings(
+                PROGRESS_WRITE_BEHIND=write_behind, PROGRESS_FLUSH_INTERVAL_MS=options['interval_ms'],
+            ):
+                self.stdout.write(self.style.WARNING(f'Running {mode} saves...'))
+                results.append((mode, self.run_load(options)))
+
+        self.stdout.write('')
+        self.stdout.write(
+            f"{'mode':<13} {'saves/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'writes':>8} {'rows':>6}"
+        )
+        for mode, r in results:
+            self.stdout.write(
+                f"{mode:<13} {r['rate']:>9.1f} {r['p50']:>8.2f} {r['p99']:>8.2f} {r['writes']:>8} {r['rows']:>6}"
+            )
+
+    def run_load(self, options):
+        for level in range(LEVELS):
+            Question.objects.create(
+                level_number=level, question='?', answer='a', security_riddle='?', security_key='k',
+                hint='h', security_hint='h', category='Benchmark',
+            )
+        clients = []
+        for i in range(options['players']):
+            user = User.objects.create_user(username=f'bench_player_{i}')
+            GameSession.objects.create(user=user, session_token=f'bench-{i}')
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+            clients.append(client)
+
+        latencies, writes, lock = [], [], threading.Lock()
+
+        def count_writes(execute, sql, params, many, context):
+            if sql.startswith(('INSERT', 'UPDATE')):
+                with lock:
+                    writes.append(sql)
+            return execute(sql, params, many, context)
+
+        def track_connection(sender, connection, **kwargs):
+            connection.execute_wrappers.append(count_writes)
+
+        def player(client):
+            local = []
+            try:
+                for save in range(options['saves']):
+                    started = time.perf_counter()
+                    response = client.post('/api/auth/game/level/', {
+                        'level': save % LEVELS + 1, 'score': save * 10, 'wrong_attempts': save % 3,
+                    }, format='json')
+                    local.append(time.perf_counter() - started)
+                    assert response.status_code in (201, 202), response.content
+            finally:
+                connections.close_all()
+            with lock:
+                latencies.extend(local)
+
+        threads = [threading.Thread(target=player, args=(client,)) for client in clients]
+        connection_created.connect(track_connection)
+        try:
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            # Buffered saves only count once they are on disk
+            progress_buffer.stop()
+            elapsed = time.perf_counter() - started
+        finally:
+            connection_created.disconnect(track_connection)
+
+        return {
+            'rate': len(latencies) / elapsed,
+            'p50': statistics.median(latencies) * 1000,
+            'p99': percentile(latencies, 99) * 1000,
+            'writes': len(writes),
+            'rows': LevelProgress.objects.count(),
+        }
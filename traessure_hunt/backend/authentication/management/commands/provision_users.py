@@ -0,0 +1,184 @@
+"""
+Django Management Command to create event participants in bulk from a CSV file
+Run with: python manage.py provision_users participants.csv --output credentials.csv
+
+The CSV needs a header row with a ``username`` column; ``email`` and
+``password`` are optional. Blank passwords are generated. Passwords are
+hashed on a pool of --workers processes at the current hashing policy
+(TREASURE_HUNT_PASSWORD_ITERATIONS, see authentication/hashers.py), then the
+users and their API tokens are inserted with bulk_create, one transaction per
+--batch-size rows. Usernames that already exist, repeat earlier rows or fail
+validation are skipped and reported.
+
+The credentials sheet (username, email, password) lists only the accounts
+created by this run and is written readable by its owner only. An existing
+sheet holds the passwords of an earlier run, so it is never overwritten
+unless --force is given.
+
+bulk_create sends no post_save signals; the only handler for new users drops
+them from the token cache, which can't hold them yet.
+"""
+import csv
+import math
+import os
+import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import get_hasher
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import router, transaction
+from rest_framework.authtoken.models import Token
+
+from authentication.models import User
+
+# No 0/O, 1/l/I: the sheet gets printed and typed in by hand
+PASSWORD_ALPHABET = 'abcdefghjkmnpqrstuvwxyzABCDEFGHJKLMNPQRSTUVWXYZ23456789'
+PASSWORD_LENGTH = 10
+MIN_PASSWORD_LENGTH = 6  # as enforced by register_user
+
+
+def generate_password():
+    return ''.join(secrets.choice(PASSWORD_ALPHABET) for _ in range(PASSWORD_LENGTH))
+
+
+def hash_passwords(passwords, iterations):
+    """Encode with the default hasher; runs in a worker process"""
+    hasher = get_hasher('default')
+    return [hasher.encode(password, hasher.salt(), iterations) for password in passwords]
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class Command(BaseCommand):
+    help = 'Create participant accounts and API tokens in bulk from a CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help='CSV with a username column and optional email and password')
+        parser.add_argument('--output', help='Credentials sheet to write (default: <csv_file>-credentials.csv)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Hashing processes; 0 hashes in this process')
+        parser.add_argument('--batch-size', type=int, default=500, help='Accounts per transaction')
+        parser.add_argument('--force', action='store_true',
+                            help='Overwrite an existing credentials sheet, losing the passwords in it')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        output = options['output'] or f"{os.path.splitext(options['csv_file'])[0]}-credentials.csv"
+        # Refuse before creating anything: these accounts' passwords would have nowhere to go
+        if os.path.exists(output) and not options['force']:
+            raise CommandError(f'{output} already exists; pass --output or --force to overwrite it')
+        rows, skipped = self.read_rows(options['csv_file'])
+        rows, existing = self.drop_existing(rows, options['batch_size'])
+        for username in existing:
+            skipped.append((username, 'already exists'))
+
+        encoded = self.hash_all([row['password'] for row in rows], options['workers'])
+
+        using = router.db_for_write(User)
+        created = []
+        try:
+            for start in range(0, len(rows), options['batch_size']):
+                batch = rows[start:start + options['batch_size']]
+                with transaction.atomic(using=using):
+                    users = User.objects.using(using).bulk_create(
+                        User(username=row['username'], email=row['email'], password=password)
+                        for row, password in zip(batch, encoded[start:start + len(batch)])
+                    )
+                    Token.objects.using(using).bulk_create(
+                        Token(key=Token.generate_key(), user=user) for user in users
+                    )
+                created.extend(batch)
+        finally:
+            # Committed batches keep their accounts even if a later one fails
+            output = self.write_sheet(output, created, options['force'])
+
+        for username, reason in skipped:
+            self.stdout.write(self.style.WARNING(f'Skipped {username or "(blank)"}: {reason}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Created {len(created)} accounts ({len(skipped)} skipped) in '
+            f'{time.perf_counter() - started:.1f}s; credentials written to {output}'
+        ))
+
+    def hash_all(self, passwords, workers):
+        """Encoded passwords in order, hashed across ``workers`` processes"""
+        iterations = get_hasher('default').iterations
+        if workers <= 0 or not passwords:
+            return hash_passwords(passwords, iterations)
+        # A few chunks per process keeps them all busy to the end
+        size = math.ceil(len(passwords) / (workers * 4))
+        parts = list(chunks(passwords, size))
+        # django.setup() first, so this module can be imported in spawned workers
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            hashed = pool.map(hash_passwords, parts, [iterations] * len(parts))
+            return [password for part in hashed for password in part]
+
+    def read_rows(self, path):
+        """Valid rows with generated passwords filled in, and (username, reason) for the rest"""
+        try:
+            with open(path, newline='', encoding='utf-8-sig') as handle:
+                reader = csv.DictReader(handle)
+                if 'username' not in (reader.fieldnames or []):
+                    raise CommandError(f'{path} needs a header row with a username column')
+                records = list(reader)
+        except OSError as exc:
+            raise CommandError(f'Cannot read {path}: {exc}')
+
+        rows, skipped, seen = [], [], set()
+        max_length = User._meta.get_field('username').max_length
+        for record in records:
+            username = (record.get('username') or '').strip()
+            password = (record.get('password') or '').strip()
+            if not username:
+                skipped.append((username, 'no username'))
+                continue
+            if username in seen:
+                skipped.append((username, 'repeated in the CSV'))
+                continue
+            seen.add(username)
+            try:
+                User.username_validator(username)
+            except ValidationError:
+                skipped.append((username, 'invalid username'))
+                continue
+            if len(username) > max_length:
+                skipped.append((username, f'username longer than {max_length} characters'))
+            elif password and len(password) < MIN_PASSWORD_LENGTH:
+                skipped.append((username, f'password shorter than {MIN_PASSWORD_LENGTH} characters'))
+            else:
+                rows.append({
+                    'username': username,
+                    'email': (record.get('email') or '').strip(),
+                    'password': password or generate_password(),
+                })
+        return rows, skipped
+
+    def drop_existing(self, rows, batch_size):
+        """Rows whose username is free, and the usernames already taken"""
+        existing = set()
+        for batch in chunks([row['username'] for row in rows], batch_size):
+            existing.update(User.objects.filter(username__in=batch).values_list('username', flat=True))
+        return [row for row in rows if row['username'] not in existing], sorted(existing)
+
+    def write_sheet(self, path, rows, force):
+        """Write the sheet to ``path``, or beside it if one appeared since handle() checked; returns the path"""
+        # Plaintext passwords: owner-only from the moment the file exists
+        flags = os.O_WRONLY | os.O_CREAT | (os.O_TRUNC if force else os.O_EXCL)
+        try:
+            fd = os.open(path, flags, 0o600)
+        except FileExistsError:
+            root, ext = os.path.splitext(path)
+            path = f"{root}-{time.strftime('%Y%m%d-%H%M%S')}{ext}"
+            fd = os.open(path, flags, 0o600)
+        # The mode above only applies to a new file, not one --force truncates
+        os.fchmod(fd, 0o600)
+        with open(fd, 'w', newline='', encoding='utf-8') as handle:
+            writer = csv.DictWriter(handle, fieldnames=['username', 'email', 'password'])
+            writer.writeheader()
+            writer.writerows(rows)
+        return path
@@ -0,0 +1,18 @@
+"""
+Django Management Command to recompute the LevelStats totals from LevelProgress
+Run with: python manage.py rebuild_level_stats
+
+The totals are maintained incrementally by every progress write; run this after
+importing progress rows directly or if the totals are ever suspected to drift.
+"""
+from django.core.management.base import BaseCommand
+
+from authentication.level_stats import rebuild_level_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-level statistics table from level progress'
+
+    def handle(self, *args, **kwargs):
+        stats = rebuild_level_stats()
+        self.stdout.write(self.style.SUCCESS(f'✅ Rebuilt {len(stats)} level stats rows'))
@@ -0,0 +1,38 @@
+"""
+Django Management Command to serve the API through the ASGI entrypoint
+Run with: python manage.py runasgi --host 0.0.0.0 --port 8000 --workers 1
+
+Starts uvicorn (optional dependency, see requirements.txt) on
+treasure_hunt_backend.asgi:application, so the hot gameplay endpoints are
+served by the async views. Use one worker while the write-behind progress
+buffer is enabled.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+try:
+    import uvicorn
+except ImportError:  # optional dependency, see requirements.txt
+    uvicorn = None
+
+
+class Command(BaseCommand):
+    help = 'Serve the API with uvicorn through the ASGI entrypoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8000)
+        parser.add_argument('--workers', type=int, default=1, help='Worker processes')
+        parser.add_argument('--log-level', default='info')
+
+    def handle(self, *args, **options):
+        if uvicorn is None:
+            raise CommandError('uvicorn is not installed - run: pip install uvicorn')
+        uvicorn.run(
+            'treasure_hunt_backend.asgi:application',
+            host=options['host'],
+            port=options['port'],
+            workers=options['workers'],
+            log_level=options['log_level'],
+            # Django's ASGI handler has no lifespan support
+            lifespan='off',
+        )
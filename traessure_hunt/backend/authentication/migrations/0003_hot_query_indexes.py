@@ -0,0 +1,55 @@
+# Generated by Django 5.0.1 on 2026-10-19 00:57
+
+from django.db import migrations, models
+
+
+def deactivate_duplicate_active_sessions(apps, schema_editor):
+    """Keep only the newest active session per user so the partial unique index can be built"""
+    GameSession = apps.get_model('authentication', 'GameSession')
+    db_alias = schema_editor.connection.alias
+    seen_users = set()
+    stale_ids = []
+    active = (
+        GameSession.objects.using(db_alias)
+        .filter(is_active=True)
+        .order_by('user_id', '-started_at', '-id')
+        .values_list('id', 'user_id')
+    )
+    for session_id, user_id in active:
+        if user_id in seen_users:
+            stale_ids.append(session_id)
+        else:
+            seen_users.add(user_id)
+    if stale_ids:
+        GameSession.objects.using(db_alias).filter(id__in=stale_ids).update(is_active=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_question_gamesession_game_completed_permanently'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gamesession',
+            index=models.Index(fields=['user', 'is_active'], name='game_sess_user_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboard',
+            index=models.Index(fields=['-final_score', 'total_time'], name='leaderboard_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['is_active', 'level_number'], name='questions_active_level_idx'),
+        ),
+        migrations.RunPython(
+            deactivate_duplicate_active_sessions,
+            migrations.RunPython.noop,
+            hints={'model_name': 'gamesession'},
+        ),
+        migrations.AddConstraint(
+            model_name='gamesession',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('user',), name='one_active_session_per_user'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.1 on 2026-10-19 01:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0004_gameplay_database_split'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='levelprogress',
+            index=models.Index(fields=['-completed_at', '-id'], name='progress_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='levelprogress',
+            index=models.Index(fields=['level_number', '-completed_at', '-id'], name='progress_level_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='levelprogress',
+            index=models.Index(fields=['difficulty', '-completed_at', '-id'], name='progress_diff_recent_idx'),
+        ),
+    ]
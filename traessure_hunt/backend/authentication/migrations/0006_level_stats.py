@@ -0,0 +1,59 @@
+# Generated by Django 5.0.1 on 2026-10-19 01:20
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_level_stats(apps, schema_editor):
+    """Build the initial totals from the existing level progress rows"""
+    LevelProgress = apps.get_model('authentication', 'LevelProgress')
+    LevelStats = apps.get_model('authentication', 'LevelStats')
+    db_alias = schema_editor.connection.alias
+    totals = (
+        LevelProgress.objects.using(db_alias).order_by().values('level_number', 'difficulty').annotate(
+            attempts=Count('id'),
+            solves=Count('id', filter=Q(level_completed=True)),
+            hints=Count('id', filter=Q(hint_used=True)),
+            riddle_attempts_sum=Coalesce(Sum('riddle_attempts'), 0),
+            security_attempts_sum=Coalesce(Sum('security_attempts'), 0),
+            time_spent_sum=Coalesce(Sum('time_spent'), 0.0),
+        )
+    )
+    LevelStats.objects.using(db_alias).bulk_create([LevelStats(**row) for row in totals])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0005_level_progress_page_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LevelStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level_number', models.IntegerField()),
+                ('difficulty', models.CharField(max_length=20)),
+                ('attempts', models.IntegerField(default=0)),
+                ('solves', models.IntegerField(default=0)),
+                ('hints', models.IntegerField(default=0)),
+                ('riddle_attempts_sum', models.IntegerField(default=0)),
+                ('security_attempts_sum', models.IntegerField(default=0)),
+                ('time_spent_sum', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'level stats',
+                'db_table': 'level_stats',
+                'ordering': ['level_number', 'difficulty'],
+                'unique_together': {('level_number', 'difficulty')},
+            },
+        ),
+        migrations.RunPython(
+            backfill_level_stats,
+            migrations.RunPython.noop,
+            hints={'model_name': 'levelstats'},
+        ),
+    ]
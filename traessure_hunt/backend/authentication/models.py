@@ -1,6 +1,8 @@
 """
 Django Models for FOSS Treasure Hunt Authentication and Game Progress
 """
+from django.conf import settings
+from django.contrib.auth.hashers import check_password
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.utils import timezone
@@ -17,20 +19,33 @@ class User(AbstractUser):
     rank: str = models.CharField(max_length=100, default="🔰 BEGINNER CODER")  # type: ignore[assignment]
     created_at = models.DateTimeField(auto_now_add=True)
     last_login_at = models.DateTimeField(null=True, blank=True)
+    # Change feed position (authentication/changes.py); queryset.update() calls set it explicitly
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:  # type: ignore[misc]
         db_table = 'users'
         ordering = ['-total_score']
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='users_updated_idx'),
+        ]
     
     def __str__(self):
         return self.username
 
+    def check_password(self, raw_password):
+        """Upgrades an outdated hash only while PASSWORD_REHASH_ON_LOGIN is on"""
+        if settings.PASSWORD_REHASH_ON_LOGIN:
+            return super().check_password(raw_password)
+        return check_password(raw_password, self.password)
+
 
 class GameSession(models.Model):
     """
     Tracks individual game sessions for each player
     """
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='game_sessions')
+    # Gameplay tables may live in a separate database (see authentication.routers),
+    # so links to read-mostly tables carry no DB constraint and cascade via signals
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, related_name='game_sessions')
     session_token = models.CharField(max_length=255, unique=True)
     started_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
@@ -51,10 +66,23 @@ class GameSession(models.Model):
     security_wrong_attempts = models.IntegerField(default=0)  # type: ignore[assignment]
     finished = models.BooleanField(default=False)  # type: ignore[assignment]
     game_completed_permanently = models.BooleanField(default=False, help_text="Game completed - no replay allowed")  # type: ignore[assignment]
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'game_sessions'
         ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['user', 'is_active'], name='game_sess_user_active_idx'),
+            models.Index(fields=['updated_at', 'id'], name='game_sess_updated_idx'),
+        ]
+        constraints = [
+            # A player may only have one active session at a time
+            models.UniqueConstraint(
+                fields=['user'],
+                condition=models.Q(is_active=True),
+                name='one_active_session_per_user',
+            ),
+        ]
     
     def __str__(self) -> str:
         return f"{self.user.username} - Session {self.session_token[:8]}"  # type: ignore[attr-defined]
@@ -86,16 +114,53 @@ class LevelProgress(models.Model):
     time_spent = models.FloatField(default=0)  # in seconds
     
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'level_progress'
         unique_together = ['session', 'level_number']
         ordering = ['level_number']
+        indexes = [
+            # Newest-first keyset pages of the admin progress API, unfiltered
+            # and filtered by level or difficulty
+            models.Index(fields=['-completed_at', '-id'], name='progress_recent_idx'),
+            models.Index(fields=['level_number', '-completed_at', '-id'], name='progress_level_recent_idx'),
+            models.Index(fields=['difficulty', '-completed_at', '-id'], name='progress_diff_recent_idx'),
+            models.Index(fields=['updated_at', 'id'], name='progress_updated_idx'),
+        ]
     
     def __str__(self):
         return f"Level {self.level_number} - {self.session.user.username}"
 
 
+class LevelStats(models.Model):
+    """
+    Running totals of level progress per level and difficulty, kept up to
+    date in the same transaction as every progress write so analytics read
+    one row per level instead of aggregating every LevelProgress row
+    """
+    level_number = models.IntegerField()
+    difficulty = models.CharField(max_length=20)
+    
+    attempts = models.IntegerField(default=0)  # progress rows (one per session)
+    solves = models.IntegerField(default=0)
+    hints = models.IntegerField(default=0)
+    riddle_attempts_sum = models.IntegerField(default=0)
+    security_attempts_sum = models.IntegerField(default=0)
+    time_spent_sum = models.FloatField(default=0)  # in seconds
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'level_stats'
+        unique_together = ['level_number', 'difficulty']
+        ordering = ['level_number', 'difficulty']
+        verbose_name_plural = 'level stats'
+    
+    def __str__(self):
+        return f"Level {self.level_number} ({self.difficulty}) - {self.attempts} attempts"
+
+
 class Achievement(models.Model):
     """
     Achievements that players can unlock
@@ -119,7 +184,7 @@ class UserAchievement(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='achievements')
     achievement = models.ForeignKey(Achievement, on_delete=models.CASCADE)
     unlocked_at = models.DateTimeField(auto_now_add=True)
-    session = models.ForeignKey(GameSession, on_delete=models.SET_NULL, null=True, blank=True)
+    session = models.ForeignKey(GameSession, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True)
     
     class Meta:
         db_table = 'user_achievements'
@@ -134,7 +199,7 @@ class Leaderboard(models.Model):
     """
     Leaderboard entries for tracking top players
     """
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False)
     session = models.ForeignKey(GameSession, on_delete=models.CASCADE)
     
     final_score = models.IntegerField()
@@ -144,10 +209,15 @@ class Leaderboard(models.Model):
     rank_achieved = models.CharField(max_length=100)
     accuracy = models.FloatField()  # percentage
     speed_score = models.FloatField()  # percentage
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'leaderboard'
         ordering = ['-final_score', 'total_time']
+        indexes = [
+            models.Index(fields=['-final_score', 'total_time'], name='leaderboard_rank_idx'),
+            models.Index(fields=['updated_at', 'id'], name='leaderboard_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - Score: {self.final_score}"
@@ -181,6 +251,29 @@ class Question(models.Model):
     class Meta:
         db_table = 'questions'
         ordering = ['level_number']
+        indexes = [
+            models.Index(fields=['is_active', 'level_number'], name='questions_active_level_idx'),
+        ]
     
     def __str__(self):
         return f"Level {self.level_number + 1}: {self.category} ({self.difficulty})"
+
+
+class DeletedRow(models.Model):
+    """
+    Tombstone for a deleted user, game session, level progress or
+    leaderboard row, so change feed consumers can drop it from their copy
+    """
+    table = models.CharField(max_length=32)  # change feed name, e.g. 'sessions'
+    row_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'deleted_rows'
+        ordering = ['deleted_at', 'id']
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='deleted_rows_recent_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.table} #{self.row_id} deleted {self.deleted_at}"
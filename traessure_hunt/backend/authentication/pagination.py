@@ -0,0 +1,166 @@
+"""
+Keyset (cursor) pagination and server-side filters for the admin level
+progress API
+
+Pages are ordered newest first by (completed_at, id). The cursor is the sort
+key of the last row on the previous page, so fetching page N costs the same as
+page 1 - no OFFSET scans - and rows inserted meanwhile don't shift pages.
+Rows without a completion time sort after all completed rows.
+"""
+import base64
+import json
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .fast_serializers import LevelProgressValuesSerializer
+from .models import LevelProgress, User
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Upper bound for a username prefix range scan (username >= p AND username < p + MAX)
+_PREFIX_END = '\U0010ffff'
+
+
+def encode_cursor(row):
+    payload = json.dumps([row['completed_at'], row['id']])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return (completed_at, id) from a cursor string, or None for the first page"""
+    if not cursor:
+        return None
+    try:
+        completed_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        row_id = int(row_id)
+        if completed_at is not None:
+            completed_at = parse_datetime(completed_at)
+            if completed_at is None:
+                raise ValueError
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    return completed_at, row_id
+
+
+def _parse_bound(value, name):
+    """
+    Parse a date or datetime query parameter.
+    Returns (aware datetime, is_bare_date).
+    """
+    # parse_date first: parse_datetime also accepts a bare date as midnight
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is not None:
+        parsed, is_date = datetime.combine(day, time.min), True
+    else:
+        try:
+            parsed = parse_datetime(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValueError(f"Invalid {name} '{value}', expected YYYY-MM-DD or an ISO datetime")
+        is_date = False
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed, is_date
+
+
+def parse_page_size(value):
+    if value in (None, ''):
+        return DEFAULT_PAGE_SIZE
+    try:
+        size = int(value)
+    except ValueError:
+        raise ValueError(f"Invalid limit '{value}'")
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def filter_level_progress(params):
+    """
+    Build the filtered queryset from query parameters:
+      level          - exact level_number
+      username       - case-sensitive username prefix
+      difficulty     - exact difficulty
+      completed_from - completed_at lower bound (inclusive)
+      completed_to   - completed_at upper bound (a bare date includes that day)
+    Raises ValueError for malformed values.
+    """
+    queryset = LevelProgress.objects.all()
+
+    level = params.get('level')
+    if level not in (None, ''):
+        try:
+            queryset = queryset.filter(level_number=int(level))
+        except ValueError:
+            raise ValueError(f"Invalid level '{level}'")
+
+    difficulty = params.get('difficulty')
+    if difficulty:
+        queryset = queryset.filter(difficulty=difficulty)
+
+    completed_from = params.get('completed_from')
+    if completed_from:
+        bound, _ = _parse_bound(completed_from, 'completed_from')
+        queryset = queryset.filter(completed_at__gte=bound)
+
+    completed_to = params.get('completed_to')
+    if completed_to:
+        bound, is_date = _parse_bound(completed_to, 'completed_to')
+        if is_date:
+            queryset = queryset.filter(completed_at__lt=bound + timedelta(days=1))
+        else:
+            queryset = queryset.filter(completed_at__lte=bound)
+
+    username = params.get('username')
+    if username:
+        # Range scan on the unique username index; resolved to ids first
+        # because users may live in another database than level progress
+        user_ids = list(User.objects.filter(
+            username__gte=username, username__lt=username + _PREFIX_END
+        ).values_list('id', flat=True))
+        queryset = queryset.filter(session__user_id__in=user_ids)
+
+    return queryset
+
+
+def _ranges_after(cursor):
+    """
+    Filters for the rows after ``cursor``, one index range each, in page
+    order: older completed rows, then the rows without a completion time.
+    """
+    completed_at, row_id = cursor
+    if completed_at is None:
+        return [Q(completed_at__isnull=True, id__lt=row_id)]
+    return [
+        # completed_at <= t AND (completed_at < t OR id < i) rather than the
+        # plain OR, which SQLite answers by walking the index from the start
+        Q(completed_at__lte=completed_at) & (Q(completed_at__lt=completed_at) | Q(id__lt=row_id)),
+        Q(completed_at__isnull=True),
+    ]
+
+
+def progress_page(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """Return (rows, next_cursor) for one page, newest first"""
+    queryset = queryset.order_by('-completed_at', '-id')
+    ranges = [Q()] if cursor is None else _ranges_after(cursor)
+    values = []
+    for predicate in ranges:
+        # One row past the page tells whether there is a next one
+        values.extend(queryset.filter(predicate).values_list(
+            *LevelProgressValuesSerializer.lookups()
+        )[:page_size + 1 - len(values)])
+        if len(values) > page_size:
+            break
+    rows = LevelProgressValuesSerializer.to_rows(values)
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1])
+    return rows, next_cursor
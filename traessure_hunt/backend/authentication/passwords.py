@@ -0,0 +1,107 @@
+"""
+Password checks on a bounded pool of hashing threads
+
+A PBKDF2 check costs tens to hundreds of milliseconds of CPU. Run inline by
+authenticate(), a burst of logins at event start occupies every request
+worker with hashing, and the rest of the game queues behind them.
+verify_credentials() runs authenticate() itself, with every configured
+backend and its signals, on PASSWORD_CHECK_WORKERS threads. hashlib
+releases the GIL while hashing, so those threads use that many cores. At
+most PASSWORD_CHECK_QUEUE more checks may wait. When that backlog is full,
+or a check takes longer than PASSWORD_CHECK_TIMEOUT, the login fails fast
+with 503 and Retry-After and the request worker is freed.
+
+Pool threads keep their own database connections, which can't see a
+transaction the request has open; inside one the check runs inline.
+
+Hashing policy for events: lower PASSWORD_HASH_ITERATIONS (hashers.py) for
+accounts created for the event, and set PASSWORD_REHASH_ON_LOGIN off so
+logins never hash twice (User.check_password). Afterwards, restore the
+iterations and turn rehashing back on; each hash is then upgraded at that
+player's next login.
+"""
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.contrib.auth import authenticate, get_user_model
+from django.db import close_old_connections, connections, router
+from rest_framework import exceptions, status
+
+from treasure_hunt_backend import metrics
+
+
+class PasswordCheckBusy(exceptions.APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many logins in progress, please retry shortly.'
+    default_code = 'password_check_busy'
+
+    def __init__(self):
+        super().__init__()
+        # DRF's exception handler turns this into Retry-After
+        self.wait = max(1, math.ceil(settings.PASSWORD_CHECK_TIMEOUT))
+
+
+class PasswordCheckPool:
+    """ThreadPoolExecutor that refuses work beyond ``workers + queue_size`` pending calls"""
+
+    def __init__(self, workers, queue_size):
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-check')
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def run(self, fn, *args, timeout):
+        """fn(*args) on a pool thread; raises PasswordCheckBusy if the pool is full or too slow"""
+        if not self._slots.acquire(blocking=False):
+            metrics.registry.record_shed('password_pool_full', 'login')
+            raise PasswordCheckBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # Also runs on cancel, so a timed-out check still frees its slot
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()  # only succeeds while still queued
+            metrics.registry.record_shed('password_check_timeout', 'login')
+            raise PasswordCheckBusy()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def password_checks():
+    """The process-wide pool, started on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PasswordCheckPool(settings.PASSWORD_CHECK_WORKERS, settings.PASSWORD_CHECK_QUEUE)
+    return _pool
+
+
+def _authenticate(request, credentials):
+    """authenticate() on a pool thread, recycling its connections like a request would"""
+    close_old_connections()
+    try:
+        return authenticate(request, **credentials)
+    finally:
+        close_old_connections()
+
+
+def verify_credentials(username, password, request=None):
+    """
+    authenticate() with the hashing on the password pool: the user, or None.
+    With PASSWORD_CHECK_WORKERS at 0, or inside a transaction, it runs on
+    the request thread.
+    """
+    credentials = {'username': username, 'password': password}
+    alias = router.db_for_read(get_user_model())
+    if settings.PASSWORD_CHECK_WORKERS <= 0 or connections[alias].in_atomic_block:
+        return authenticate(request, **credentials)
+    return password_checks().run(_authenticate, request, credentials, timeout=settings.PASSWORD_CHECK_TIMEOUT)
@@ -0,0 +1,58 @@
+"""
+Custom DRF Renderers for Treasure Hunt Backend
+"""
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional dependency, see requirements.txt
+    orjson = None
+
+# orjson writes these as raw UTF-8; JSONRenderer escapes them so the output
+# stays a strict JavaScript subset
+_LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed.
+
+    Compact output only: indented rendering (the browsable API or
+    `Accept: application/json; indent=4`) and a missing orjson fall back to the
+    stdlib encoder. Values orjson can't encode natively (datetimes, Decimals,
+    lazy strings, ...) go through DRF's JSONEncoder.default, so both paths
+    produce the same JSON.
+    """
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data, default=self._encoder.default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except TypeError:
+            # e.g. integers beyond 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
+        for raw, escaped in _LINE_SEPARATORS:
+            if raw in ret:
+                ret = ret.replace(raw, escaped)
+        return ret
+
+
+def json_response(data, status=200, headers=None):
+    """HttpResponse rendered like an API response, for plain Django views"""
+    response = HttpResponse(
+        FastJSONRenderer().render(data), status=status, headers=headers,
+        content_type=FastJSONRenderer.media_type,
+    )
+    # Unrendered payload, like Response.data (read by idempotency and tests)
+    response.data = data
+    return response
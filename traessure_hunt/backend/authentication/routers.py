@@ -0,0 +1,51 @@
+"""
+Database Router for splitting write-hot gameplay tables into their own SQLite file
+
+GameSession, LevelProgress (and its LevelStats totals) and Leaderboard take a
+write on nearly every player action during an event. SQLite has a single writer lock per database file, so
+when everything shares one file, question and profile reads queue behind those
+writes. With TREASURE_HUNT_SPLIT_DB=1 the settings add a 'gameplay' database
+and install this router; everything else stays on 'default'.
+
+Migrate both databases:
+    python manage.py migrate
+    python manage.py migrate --database=gameplay
+"""
+
+GAMEPLAY_DB = 'gameplay'
+DEFAULT_DB = 'default'
+
+# model_name values (lowercase) of the write-hot tables
+GAMEPLAY_MODELS = {'gamesession', 'levelprogress', 'levelstats', 'leaderboard'}
+
+
+def is_gameplay_model(app_label, model_name):
+    return app_label == 'authentication' and model_name in GAMEPLAY_MODELS
+
+
+class GameplayRouter:
+    """Route gameplay models to the 'gameplay' database, everything else to 'default'"""
+
+    def _db_for_model(self, model):
+        # Always answer explicitly: returning None would make Django fall back
+        # to the database of the related instance, e.g. loading session.user
+        # from the gameplay file
+        if is_gameplay_model(model._meta.app_label, model._meta.model_name):
+            return GAMEPLAY_DB
+        return DEFAULT_DB
+
+    def db_for_read(self, model, **hints):
+        return self._db_for_model(model)
+
+    def db_for_write(self, model, **hints):
+        return self._db_for_model(model)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both files hold one logical dataset; cross-file FKs carry no DB
+        # constraint (db_constraint=False) and are resolved by the ORM
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if model_name is not None and is_gameplay_model(app_label, model_name):
+            return db == GAMEPLAY_DB
+        return db != GAMEPLAY_DB
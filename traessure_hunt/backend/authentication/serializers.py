@@ -2,8 +2,8 @@
 REST API Serializers for Treasure Hunt Backend
 """
 from rest_framework import serializers
-from django.contrib.auth import authenticate
-from .models import User, GameSession, LevelProgress, Achievement, UserAchievement, Leaderboard, Question
+from .models import User, GameSession, LevelProgress, LevelStats, Achievement, UserAchievement, Leaderboard, Question
+from .passwords import verify_credentials
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -49,7 +49,8 @@ class LoginSerializer(serializers.Serializer):
         password = data.get('password')
         
         if username and password:
-            user = authenticate(username=username, password=password)
+            # authenticate() on the bounded password pool
+            user = verify_credentials(username, password, self.context.get('request'))
             if not user:
                 raise serializers.ValidationError("Invalid credentials")
             if not user.is_active:
@@ -89,6 +90,53 @@ class LevelProgressSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
+class LevelProgressFieldsSerializer(serializers.ModelSerializer):
+    """
+    Validates and coerces the stored values of a level save. Leaves out the
+    session and the unique-together check, so it runs without queries.
+    """
+    
+    class Meta:
+        model = LevelProgress
+        fields = ['question_category', 'difficulty', 'points_earned', 'bonus_points', 'riddle_attempts',
+                  'security_attempts', 'hint_used', 'security_hint_used', 'riddle_solved', 'level_completed',
+                  'completed_at', 'time_spent']
+
+
+class LevelStatsSerializer(serializers.ModelSerializer):
+    """Serializer for LevelStats totals, with the rates and averages derived from them"""
+    solve_rate = serializers.SerializerMethodField()
+    hint_rate = serializers.SerializerMethodField()
+    avg_riddle_attempts = serializers.SerializerMethodField()
+    avg_security_attempts = serializers.SerializerMethodField()
+    avg_time_spent = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = LevelStats
+        fields = ['level_number', 'difficulty', 'attempts', 'solves', 'hints',
+                  'riddle_attempts_sum', 'security_attempts_sum', 'time_spent_sum',
+                  'solve_rate', 'hint_rate', 'avg_riddle_attempts', 'avg_security_attempts',
+                  'avg_time_spent', 'updated_at']
+    
+    def _per_attempt(self, obj, total, digits):
+        return round(total / obj.attempts, digits) if obj.attempts else 0.0
+    
+    def get_solve_rate(self, obj):
+        return self._per_attempt(obj, obj.solves, 4)
+    
+    def get_hint_rate(self, obj):
+        return self._per_attempt(obj, obj.hints, 4)
+    
+    def get_avg_riddle_attempts(self, obj):
+        return self._per_attempt(obj, obj.riddle_attempts_sum, 2)
+    
+    def get_avg_security_attempts(self, obj):
+        return self._per_attempt(obj, obj.security_attempts_sum, 2)
+    
+    def get_avg_time_spent(self, obj):
+        return self._per_attempt(obj, obj.time_spent_sum, 2)
+
+
 class AchievementSerializer(serializers.ModelSerializer):
     """Serializer for Achievement model"""
     class Meta:
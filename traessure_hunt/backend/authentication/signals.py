@@ -0,0 +1,91 @@
+"""
+Signal handlers for the Treasure Hunt models
+
+Cache invalidation: the token authentication cache forgets a user whenever the
+row is saved or deleted (covers deactivation and password changes) and a token
+as soon as it is deleted (logout). The admin progress aggregates are recomputed
+after any level progress row is saved or deleted, and the answer index after
+any question is saved or deleted. The live leaderboard feed reloads its top
+rows once an entry is edited or deleted.
+
+Change feed: deleting a user, game session, level progress or leaderboard row
+leaves a tombstone for incremental sync clients.
+
+LevelStats: a deleted level progress row is subtracted from the running totals
+inside the delete's transaction (saves are recorded by the views that make
+them, which know the row's previous values).
+
+Cascades: links between gameplay tables and read-mostly tables are declared with
+on_delete=DO_NOTHING so deletes never join across database files when the
+gameplay router is enabled. The cascades they used to get from the ORM are
+performed here instead, each query routed to the database that owns the table.
+"""
+from django.db import router, transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .aggregates import invalidate_progress_aggregates
+from .answers import invalidate_answer_index
+from .authentication import invalidate_token, invalidate_user
+from .broadcast import leaderboard_feed
+from .changes import record_deletion
+from .level_stats import remove_level_progress
+from .models import User, GameSession, LevelProgress, Leaderboard, Question, UserAchievement
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=LevelProgress)
+@receiver(post_delete, sender=LevelProgress)
+def invalidate_cached_aggregates(sender, instance, **kwargs):
+    invalidate_progress_aggregates()
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidate_cached_answers(sender, instance, **kwargs):
+    invalidate_answer_index()
+
+
+@receiver(post_save, sender=Leaderboard)
+@receiver(post_delete, sender=Leaderboard)
+def refresh_leaderboard_feed(sender, instance, created=False, **kwargs):
+    # New entries are published by submit_to_leaderboard
+    if not created:
+        transaction.on_commit(leaderboard_feed.refresh, using=router.db_for_write(Leaderboard))
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=GameSession)
+@receiver(post_delete, sender=LevelProgress)
+@receiver(post_delete, sender=Leaderboard)
+def leave_tombstone(sender, instance, **kwargs):
+    record_deletion(instance)
+
+
+@receiver(post_delete, sender=LevelProgress)
+def subtract_deleted_progress(sender, instance, **kwargs):
+    remove_level_progress(instance)
+
+
+@receiver(pre_delete, sender=User)
+def delete_user_gameplay_rows(sender, instance, **kwargs):
+    """Cascade a user delete to their leaderboard entries and game sessions"""
+    Leaderboard.objects.filter(user_id=instance.pk).delete()
+    GameSession.objects.filter(user_id=instance.pk).delete()
+
+
+@receiver(pre_delete, sender=GameSession)
+def detach_session_achievements(sender, instance, **kwargs):
+    """Keep achievements unlocked in a deleted session, without the session link"""
+    UserAchievement.objects.filter(session_id=instance.pk).update(session=None)
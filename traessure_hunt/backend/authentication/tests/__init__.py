@@ -0,0 +1,4 @@
+"""
+Test suite for the Treasure Hunt authentication & game API
+Run with: python manage.py test authentication
+"""
@@ -0,0 +1,168 @@
+"""
+Tests for the login waiting room
+"""
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from authentication.admission import AdmissionQueue, admission_queue
+from authentication.models import User
+from authentication.throttling import reset_throttles
+from treasure_hunt_backend import metrics
+
+LOGIN_URL = '/api/auth/login/'
+START_URL = '/api/auth/game/start/'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@override_settings(ADMISSION_RATE=2, ADMISSION_BURST=2)
+class AdmissionQueueTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.queue = AdmissionQueue(timer=self.clock)
+
+    def test_burst_then_steady_rate_in_arrival_order(self):
+        tickets = [self.queue.join('10.0.0.1') for _ in range(5)]
+        self.assertEqual([t.admitted for t in tickets], [True, True, False, False, False])
+        self.assertEqual([t.position for t in tickets], [0, 0, 1, 2, 3])
+        self.assertEqual([t.estimated_wait for t in tickets[2:]], [0.5, 1.0, 1.5])
+        self.assertEqual(self.queue.waiting, 3)
+
+        self.clock.now += 1  # two more admitted
+        self.assertEqual([self.queue.check(t.ticket, '10.0.0.1').admitted for t in tickets], [True] * 4 + [False])
+        self.assertEqual(self.queue.check(tickets[4].ticket, '10.0.0.1').position, 1)
+
+    def test_quiet_spell_refills_only_the_burst(self):
+        self.clock.now += 3600
+        tickets = [self.queue.join('10.0.0.1') for _ in range(3)]
+        self.assertEqual([t.admitted for t in tickets], [True, True, False])
+
+    def test_unknown_ticket(self):
+        self.assertIsNone(self.queue.check('no-such-ticket', '10.0.0.1'))
+
+    def test_ticket_belongs_to_its_client(self):
+        ticket = self.queue.join('10.0.0.1').ticket
+        self.assertIsNone(self.queue.check(ticket, '10.0.0.2'))
+        self.assertTrue(self.queue.check(ticket, '10.0.0.1').admitted)
+
+    def test_admitted_ticket_is_spent_once_per_use(self):
+        ticket = self.queue.join('10.0.0.1').ticket
+        self.assertTrue(self.queue.check(ticket, '10.0.0.1', 'login').admitted)
+        self.assertIsNone(self.queue.check(ticket, '10.0.0.1', 'login'))
+        self.assertTrue(self.queue.check(ticket, '10.0.0.1', 'start_game').admitted)
+        self.queue.release(ticket, 'login')
+        self.assertTrue(self.queue.check(ticket, '10.0.0.1', 'login').admitted)
+
+    @override_settings(ADMISSION_TICKET_TTL=60)
+    def test_admitted_ticket_is_not_kept_alive_by_use(self):
+        queue = AdmissionQueue(timer=self.clock)
+        ticket = queue.join('10.0.0.1').ticket
+        self.clock.now += 59
+        self.assertTrue(queue.check(ticket, '10.0.0.1', 'login').admitted)
+        self.clock.now += 2
+        self.assertIsNone(queue.check(ticket, '10.0.0.1', 'start_game'))
+
+
+@override_settings(ADMISSION_RATE=1, ADMISSION_BURST=1)
+class WaitingRoomViewTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='eager', password='secret123')
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(admission_queue, '_timer', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for cleanup in (admission_queue.clear, reset_throttles, metrics.registry.clear):
+            cleanup()
+            self.addCleanup(cleanup)
+        self.client = APIClient()
+
+    def login(self, ticket=None):
+        headers = {'Admission-Ticket': ticket} if ticket else {}
+        return self.client.post(LOGIN_URL, {'username': 'eager', 'password': 'secret123'}, format='json',
+                                headers=headers)
+
+    def test_login_waits_for_its_turn(self):
+        self.assertEqual(self.login().status_code, 200)  # the burst lets the first one in
+
+        response = self.login()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        data = response.json()
+        self.assertEqual((data['admitted'], data['position']), (False, 1))
+        ticket = data['ticket']
+
+        # Same place in line while it isn't our turn, whether polling or retrying
+        self.assertEqual(self.client.get(f'/api/auth/admission/{ticket}/').json()['position'], 1)
+        self.assertEqual(self.login(ticket).json()['position'], 1)
+
+        self.clock.now += 1
+        poll = self.client.get(f'/api/auth/admission/{ticket}/')
+        self.assertEqual((poll.status_code, poll.json()['admitted']), (200, True))
+        self.assertNotIn('Retry-After', poll)
+        self.assertEqual(self.login(ticket).status_code, 200)
+        # Spent: logging in again means queueing again
+        self.assertEqual(self.login(ticket).status_code, 503)
+
+    def test_ticket_issued_at_login_covers_the_game_start(self):
+        self.clock.now += 10
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {response.data['token']}")
+        headers = {'Admission-Ticket': response['Admission-Ticket']}
+        self.assertEqual(self.client.post(START_URL, headers=headers).status_code, 201)
+        self.assertEqual(self.client.post(START_URL, headers=headers).status_code, 503)
+
+    def test_failed_login_keeps_the_ticket(self):
+        self.clock.now += 10
+        ticket = self.client.post('/api/auth/admission/').json()['ticket']
+        response = self.client.post(LOGIN_URL, {'username': 'eager', 'password': 'wrong'}, format='json',
+                                    headers={'Admission-Ticket': ticket})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.login(ticket).status_code, 200)
+
+    def test_ticket_is_refused_from_another_address(self):
+        self.clock.now += 10
+        ticket = self.client.post('/api/auth/admission/', REMOTE_ADDR='10.0.0.1').json()['ticket']
+        self.assertEqual(self.client.get(f'/api/auth/admission/{ticket}/', REMOTE_ADDR='10.0.0.2').status_code, 404)
+        response = self.client.post(LOGIN_URL, {'username': 'eager', 'password': 'secret123'}, format='json',
+                                    headers={'Admission-Ticket': ticket}, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, 503)
+        self.assertNotEqual(response.json()['ticket'], ticket)
+
+    def test_join_and_poll(self):
+        self.clock.now += 10
+        first = self.client.post('/api/auth/admission/').json()
+        second = self.client.post('/api/auth/admission/')
+        self.assertEqual(second.status_code, 201)
+        self.assertTrue(first['admitted'])
+        self.assertEqual((second.json()['position'], second.json()['retry_after']), (1, 1))
+        self.assertEqual(self.client.get('/api/auth/admission/bogus/').status_code, 404)
+        self.assertIn('treasure_hunt_admission_waiting 1', metrics.registry.render())
+
+    def test_game_start_needs_a_ticket_too(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+        self.clock.now += 10
+        ticket = self.client.post('/api/auth/admission/').json()['ticket']
+        self.assertEqual(self.client.post(START_URL).status_code, 503)
+        self.assertEqual(self.client.post(START_URL, headers={'Admission-Ticket': ticket}).status_code, 201)
+        self.assertIn('treasure_hunt_shed_requests_total{reason="waiting_room",scope="start_game"} 1',
+                      metrics.registry.render())
+
+    @override_settings(ADMISSION_RATE=0)
+    def test_off_by_default(self):
+        self.assertEqual([self.login().status_code for _ in range(3)], [200] * 3)
+        self.assertTrue(self.client.post('/api/auth/admission/').json()['admitted'])
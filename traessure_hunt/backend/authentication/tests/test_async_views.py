@@ -0,0 +1,119 @@
+"""
+Tests for the async gameplay views served under ASGI
+"""
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.signals import setting_changed
+from django.urls import resolve
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from authentication import async_views
+from authentication.idempotency import clear_idempotency_cache
+from authentication.models import GameSession, Leaderboard, LevelProgress, Question, User
+from authentication.write_behind import progress_buffer
+from treasure_hunt_backend.asgi import ASGI_URLCONF, AsyncAPIHandler, AsyncViewsASGIHandler, application
+
+
+@override_settings(PROGRESS_WRITE_BEHIND=False, PROGRESS_FLUSH_INTERVAL_MS=0)
+class AsyncViewTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        for level in range(3):
+            Question.objects.create(
+                level_number=level, question=f'Q{level}', answer='a', security_riddle='?', security_key='k',
+                hint='h', security_hint='h', category='Linux', difficulty='hard',
+            )
+        cls.user = User.objects.create_user(username='asyncer', password='secret123')
+        cls.session = GameSession.objects.create(user=cls.user, session_token='async', score=40)
+        Leaderboard.objects.create(user=cls.user, session=cls.session, final_score=40, total_time=60,
+                                   accuracy=90, speed_score=10)
+        cls.key = Token.objects.create(user=cls.user).key
+
+    def setUp(self):
+        clear_idempotency_cache()
+        self.addCleanup(clear_idempotency_cache)
+        self.async_client = AsyncClient()
+        self.sync_client = APIClient()
+        self.sync_client.credentials(HTTP_AUTHORIZATION=f'Token {self.key}')
+
+    def tearDown(self):
+        progress_buffer.stop()
+        progress_buffer.clear()
+
+    def test_asgi_application_routes_to_async_views(self):
+        self.assertEqual(resolve('/api/auth/game/level/', urlconf=ASGI_URLCONF).func, async_views.save_level_progress)
+        self.assertEqual(resolve('/api/auth/profile/', urlconf=ASGI_URLCONF).url_name, 'profile')
+        self.assertIn('/api/auth/game/level/', application.async_paths)
+        self.assertNotIn('/api/auth/profile/', application.async_paths)
+        self.assertIn('/healthz', application.async_paths)
+        for handler in (application.api_handler, application.site_handler):
+            request, _ = handler.create_request({'type': 'http', 'method': 'GET', 'path': '/', 'headers': []}, None)
+            self.assertEqual(request.urlconf, ASGI_URLCONF)
+
+    def test_api_handler_loads_only_the_lean_middleware(self):
+        changed = []
+
+        def record(setting, **kwargs):
+            changed.append(setting)
+
+        setting_changed.connect(record)
+        self.addCleanup(setting_changed.disconnect, record)
+        lean, full = AsyncAPIHandler(), AsyncViewsASGIHandler()
+        self.assertEqual(changed, [])
+        # CsrfViewMiddleware is in MIDDLEWARE, not ASYNC_API_MIDDLEWARE
+        self.assertEqual(lean._view_middleware, [])
+        self.assertTrue(full._view_middleware)
+
+    @override_settings(ROOT_URLCONF=ASGI_URLCONF)
+    async def test_reads_match_the_sync_views(self):
+        for url in ('/api/auth/game/session/', '/api/auth/leaderboard/?limit=5', '/api/auth/questions/public/'):
+            with self.subTest(url=url), override_settings(ROOT_URLCONF='treasure_hunt_backend.urls'):
+                expected = (await self.sync_get(url)).json()
+            response = await self.aget(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), expected)
+
+    async def aget(self, url):
+        return await self.async_client.get(url, headers={'Authorization': f'Token {self.key}'})
+
+    async def apost(self, url, data, **headers):
+        return await self.async_client.post(url, data, content_type='application/json',
+                                            headers=dict(headers, Authorization=f'Token {self.key}'))
+
+    async def sync_get(self, url):
+        return await sync_to_async(self.sync_client.get)(url)
+
+    @override_settings(ROOT_URLCONF=ASGI_URLCONF)
+    async def test_save_level_progress(self):
+        response = await self.apost('/api/auth/game/level/', {'level': 2, 'score': 15, 'hints_used': 1})
+        self.assertEqual(response.status_code, 201)
+        row = response.json()['level_progress']
+        self.assertEqual((row['level_number'], row['difficulty'], row['username']), (1, 'hard', 'asyncer'))
+        progress = await LevelProgress.objects.aget(session=self.session)
+        self.assertEqual((progress.points_earned, progress.hint_used), (15, True))
+
+    @override_settings(ROOT_URLCONF=ASGI_URLCONF)
+    async def test_save_replays_idempotent_duplicates(self):
+        for _ in range(2):
+            response = await self.apost('/api/auth/game/level/', {'level': 1, 'score': 5}, **{'Idempotency-Key': 'k1'})
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        self.assertEqual(await LevelProgress.objects.acount(), 1)
+
+    @override_settings(ROOT_URLCONF=ASGI_URLCONF)
+    async def test_authentication_required(self):
+        response = await AsyncClient().get('/api/auth/game/session/')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Token')
+        response = await AsyncClient().post('/api/auth/game/level/', {}, content_type='application/json',
+                                            headers={'Authorization': 'Token nope'})
+        self.assertEqual((response.status_code, response.json()), (401, {'detail': 'Invalid token.'}))
+
+    @override_settings(ROOT_URLCONF=ASGI_URLCONF)
+    async def test_no_active_session(self):
+        await GameSession.objects.filter(id=self.session.id).aupdate(is_active=False)
+        self.assertEqual((await self.aget('/api/auth/game/session/')).status_code, 404)
+        response = await self.apost('/api/auth/game/level/', {'level': 1})
+        self.assertEqual(response.status_code, 404)
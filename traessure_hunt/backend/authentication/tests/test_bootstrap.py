@@ -0,0 +1,67 @@
+"""
+Tests for the one-round-trip game bootstrap endpoint
+"""
+from contextlib import ExitStack
+
+from django.db import connections
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from authentication.models import Achievement, GameSession, LevelProgress, Question, User, UserAchievement
+
+URL = '/api/auth/game/bootstrap/'
+
+
+class BootstrapTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='resumer', password='secret123', total_score=40)
+        GameSession.objects.create(user=cls.user, session_token='old', is_active=False)
+        cls.session = GameSession.objects.create(user=cls.user, session_token='current', current_level=2, score=20)
+        for level in range(2):
+            LevelProgress.objects.create(session=cls.session, level_number=level, question_category='Linux',
+                                         difficulty='easy', level_completed=True)
+        achievement = Achievement.objects.create(name='First Blood', description='First level', icon='🩸')
+        UserAchievement.objects.create(user=cls.user, achievement=achievement, session=cls.session)
+        cls.question = Question.objects.create(
+            level_number=0, question='?', answer='kernel', security_riddle='?', security_key='pwd',
+            hint='h', security_hint='sh', category='Linux',
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+
+    def test_returns_everything_needed_to_resume(self):
+        data = self.client.get(URL).data
+        self.assertEqual(data['user']['username'], 'resumer')
+        self.assertEqual(data['session']['id'], self.session.id)
+        self.assertEqual(data['session']['username'], 'resumer')
+        self.assertEqual([p['level_number'] for p in data['progress']], [0, 1])
+        self.assertEqual(data['progress'][0]['username'], 'resumer')
+        self.assertEqual(data['achievements'][0]['achievement']['name'], 'First Blood')
+        self.assertTrue(data['questions_version'])
+
+    def test_constant_number_of_queries(self):
+        self.client.get(URL)  # warm the token cache
+        with ExitStack() as stack:
+            captured = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+            self.client.get(URL)
+        # session + prefetched progress + achievements + catalogue version
+        self.assertEqual(sum(len(queries) for queries in captured), 4)
+
+    def test_without_active_session(self):
+        GameSession.objects.filter(user=self.user).update(is_active=False)
+        data = self.client.get(URL).data
+        self.assertIsNone(data['session'])
+        self.assertEqual(data['progress'], [])
+
+    def test_questions_version_changes_with_catalogue(self):
+        version = self.client.get(URL).data['questions_version']
+        self.question.is_active = False
+        self.question.save()
+        self.assertNotEqual(self.client.get(URL).data['questions_version'], version)
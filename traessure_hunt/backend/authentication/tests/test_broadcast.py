@@ -0,0 +1,204 @@
+"""
+Tests for the live leaderboard stream (authentication/broadcast.py)
+"""
+import asyncio
+import json
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core import signals
+from django.db import close_old_connections, router
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from authentication import broadcast
+from authentication.async_views import leaderboard_events
+from authentication.broadcast import RESYNC, leaderboard_feed
+from authentication.models import GameSession, Leaderboard, User
+from authentication.write_behind import progress_buffer
+from treasure_hunt_backend.asgi import application
+
+STREAM_PATH = '/api/auth/stream/leaderboard/'
+
+
+def parse_event(message):
+    fields = dict(line.split(': ', 1) for line in message.decode().strip().split('\n'))
+    return fields['event'], json.loads(fields['data'])
+
+
+def entry(entry_id, final_score, total_time=60.0):
+    return {'id': entry_id, 'username': f'p{entry_id}', 'final_score': final_score, 'total_time': total_time}
+
+
+class StreamClient:
+    """Drives one stream request through the ASGI application"""
+
+    def __init__(self):
+        self.sent = asyncio.Queue()
+        self.disconnected = asyncio.Event()
+        self.request = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+    async def open(self):
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': STREAM_PATH, 'raw_path': STREAM_PATH.encode(), 'query_string': b'',
+            'root_path': '', 'server': ('testserver', 80), 'client': ('127.0.0.1', 50000),
+            'headers': [(b'host', b'testserver'), (b'accept-encoding', b'gzip')],
+        }
+        self.task = asyncio.create_task(application(scope, self.receive, self.sent.put))
+        return await self.next()
+
+    async def receive(self):
+        if self.request:
+            return self.request.pop()
+        await self.disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def next(self):
+        return await asyncio.wait_for(self.sent.get(), 5)
+
+    async def next_event(self):
+        return parse_event((await self.next())['body'])
+
+    async def close(self):
+        self.disconnected.set()
+        await asyncio.wait_for(self.task, 5)
+
+
+class LeaderboardFeedTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        leaderboard_feed.clear()
+        self.addCleanup(leaderboard_feed.clear)
+
+    def test_snapshot_is_read_once(self):
+        with self.assertNumQueries(1, using=router.db_for_read(Leaderboard)):
+            first = leaderboard_feed.snapshot_message()
+            self.assertIs(leaderboard_feed.snapshot_message(), first)
+        self.assertEqual(parse_event(first), ('snapshot', {'leaderboard': [], 'activity': []}))
+
+    def test_entries_are_ranked_into_the_snapshot(self):
+        leaderboard_feed.snapshot_message()
+        for entry_id, score in enumerate([50, 30, 40, 40], start=1):
+            leaderboard_feed.publish_leaderboard_entry(entry(entry_id, score))
+        _, data = parse_event(leaderboard_feed.snapshot_message())
+        self.assertEqual([row['id'] for row in data['leaderboard']], [1, 3, 4, 2])
+
+        with mock.patch.object(broadcast, 'LEADERBOARD_SIZE', 4):
+            leaderboard_feed.publish_leaderboard_entry(entry(5, 10))
+            leaderboard_feed.publish_leaderboard_entry(entry(6, 45, total_time=10))
+        _, data = parse_event(leaderboard_feed.snapshot_message())
+        self.assertEqual([row['id'] for row in data['leaderboard']], [1, 6, 3, 4])
+
+    async def test_slow_subscriber_is_resynced(self):
+        subscription = leaderboard_feed.subscribe()
+        self.addCleanup(leaderboard_feed.unsubscribe, subscription)
+        for level in range(broadcast.SUBSCRIBER_QUEUE_SIZE + 1):
+            leaderboard_feed.publish_level_completed({
+                'username': 'p', 'level_number': level, 'difficulty': 'easy', 'points_earned': 1, 'completed_at': None,
+            })
+        await asyncio.sleep(0)  # deliveries are scheduled on this loop
+        self.assertIs(await subscription.get(), RESYNC)
+        self.assertTrue(subscription.queue.empty())
+
+    def test_entry_published_during_the_read_is_read_again(self):
+        def stale_read():
+            leaderboard_feed.publish_leaderboard_entry(entry(1, 50))
+            return []
+
+        reads = [stale_read, lambda: [entry(1, 50)]]
+        with mock.patch.object(leaderboard_feed, '_load_top', side_effect=lambda: reads.pop(0)()):
+            _, data = parse_event(leaderboard_feed.snapshot_message())
+        self.assertEqual(data['leaderboard'], [entry(1, 50)])
+        self.assertEqual(reads, [])
+
+    async def test_events_already_in_the_snapshot_are_skipped(self):
+        subscription = leaderboard_feed.subscribe()
+        leaderboard_feed.publish_leaderboard_entry(entry(1, 50))  # queued before the snapshot is built
+        events = leaderboard_events(subscription)
+        with mock.patch.object(leaderboard_feed, '_load_top', return_value=[entry(1, 50)]):
+            self.assertEqual(parse_event(await anext(events)), ('snapshot', {'leaderboard': [entry(1, 50)], 'activity': []}))
+        leaderboard_feed.publish_leaderboard_entry(entry(2, 40))
+        self.assertEqual(parse_event(await anext(events)), ('leaderboard', {'entry': entry(2, 40), 'rank': 2}))
+        await events.aclose()
+
+
+@override_settings(PROGRESS_WRITE_BEHIND=False, PROGRESS_FLUSH_INTERVAL_MS=0)
+class LeaderboardStreamTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        rival = User.objects.create_user(username='rival', password='secret123')
+        first = GameSession.objects.create(user=rival, session_token='s1', score=80, finished=True,
+                                           completed_at=timezone.now())
+        Leaderboard.objects.create(user=rival, session=first, final_score=80, total_time=60,
+                                   accuracy=90, speed_score=10)
+        cls.user = User.objects.create_user(username='watcher', password='secret123')
+        cls.session = GameSession.objects.create(user=cls.user, session_token='s2', score=95, finished=True,
+                                                 completed_at=timezone.now())
+        cls.key = Token.objects.create(user=cls.user).key
+
+    def setUp(self):
+        leaderboard_feed.clear()
+        self.addCleanup(leaderboard_feed.clear)
+        # Like the test client: requests must not close the test transaction's connection
+        for signal in (signals.request_started, signals.request_finished):
+            signal.disconnect(close_old_connections)
+            self.addCleanup(signal.connect, close_old_connections)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.key}')
+
+    def tearDown(self):
+        progress_buffer.stop()
+        progress_buffer.clear()
+
+    def submit(self):
+        with self.captureOnCommitCallbacks(using=router.db_for_write(Leaderboard), execute=True):
+            return self.client.post('/api/auth/leaderboard/submit/', {
+                'session_id': self.session.id, 'accuracy': 100, 'speed_score': 5,
+            }, format='json')
+
+    def save_level(self):
+        GameSession.objects.filter(id=self.session.id).update(is_active=True)
+        with self.captureOnCommitCallbacks(using=router.db_for_write(Leaderboard), execute=True):
+            return self.client.post('/api/auth/game/level/', {'level': 1, 'score': 15}, format='json')
+
+    async def test_stream_sends_snapshot_then_events(self):
+        stream = StreamClient()
+        start = await stream.open()
+        headers = dict(start['headers'])
+        self.assertEqual((start['status'], headers[b'Content-Type']), (200, b'text/event-stream'))
+        self.assertEqual(headers[b'Cache-Control'], b'no-cache')
+        self.assertNotIn(b'Content-Encoding', headers)
+
+        event, data = await stream.next_event()
+        self.assertEqual(event, 'snapshot')
+        self.assertEqual([row['final_score'] for row in data['leaderboard']], [80])
+
+        self.assertEqual((await sync_to_async(self.submit)()).status_code, 201)
+        event, data = await stream.next_event()
+        self.assertEqual((event, data['rank'], data['entry']['final_score']), ('leaderboard', 1, 95))
+
+        self.assertEqual((await sync_to_async(self.save_level)()).status_code, 201)
+        event, data = await stream.next_event()
+        self.assertEqual((event, data['username'], data['level_number']), ('level_completed', 'watcher', 0))
+
+        await stream.close()
+        self.assertEqual(leaderboard_feed.subscriber_count(), 0)
+
+    async def test_subscribers_share_one_snapshot_and_see_deletes(self):
+        streams = [StreamClient() for _ in range(3)]
+        for stream in streams:
+            await stream.open()
+        snapshots = {(await stream.next())['body'] for stream in streams}
+        self.assertEqual(len(snapshots), 1)
+
+        await Leaderboard.objects.all().adelete()
+        await sync_to_async(leaderboard_feed.refresh)()  # the signal's on_commit callback
+        for stream in streams:
+            self.assertEqual(await stream.next_event(), ('snapshot', {'leaderboard': [], 'activity': []}))
+            await stream.close()
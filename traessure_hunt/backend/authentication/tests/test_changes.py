@@ -0,0 +1,129 @@
+"""
+Tests for the incremental sync change feed
+"""
+from django.conf import settings
+from django.db import connections, router
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from authentication.models import GameSession, Leaderboard, LevelProgress, User
+
+URL = '/api/auth/changes/'
+
+
+@override_settings(CHANGE_FEED_SETTLE_SECONDS=0)
+class ChangeFeedTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='secret123', is_staff=True)
+        for name in ('alice', 'bob', 'carol'):
+            user = User.objects.create_user(username=name, password='secret123')
+            session = GameSession.objects.create(user=user, session_token=f'{name}-token', score=30)
+            for level in range(2):
+                LevelProgress.objects.create(session=session, level_number=level, question_category='Linux',
+                                             difficulty='easy')
+        cls.alice = User.objects.get(username='alice')
+        cls.alice_key = Token.objects.create(user=cls.alice).key
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.admin).key}')
+
+    def pull(self, since=None, **params):
+        response = self.client.get(URL, dict(params, **({'since': since} if since else {})))
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def sync(self, since=None, **params):
+        """Pull until caught up; returns (changed ids per feed, deleted ids per feed, cursor, pulls)"""
+        changed, deleted, pulls = {}, {}, 0
+        while True:
+            data = self.pull(since, **params)
+            pulls += 1
+            for name, rows in data['changes'].items():
+                changed.setdefault(name, []).extend(row['id'] for row in rows)
+            for name, ids in data['deleted'].items():
+                deleted.setdefault(name, []).extend(ids)
+            since = data['cursor']
+            if not data['has_more']:
+                return changed, deleted, since, pulls
+
+    def test_full_sync_pages_through_every_row_once(self):
+        changed, deleted, _, pulls = self.sync(limit=2)
+        self.assertEqual(sorted(changed['users']), sorted(User.objects.values_list('id', flat=True)))
+        self.assertEqual(sorted(changed['sessions']), sorted(GameSession.objects.values_list('id', flat=True)))
+        self.assertEqual(len(set(changed['level_progress'])), len(changed['level_progress']))
+        self.assertEqual(len(changed['level_progress']), 6)
+        self.assertEqual(deleted, {'users': [], 'sessions': [], 'level_progress': [], 'leaderboard': []})
+        self.assertEqual(pulls, 3)  # 6 progress rows, 2 per pull
+
+    def test_rows_match_the_list_serializers(self):
+        data = self.pull()
+        alice = next(row for row in data['changes']['users'] if row['username'] == 'alice')
+        self.assertEqual(alice['total_score'], 0)
+        self.assertIn('updated_at', alice)
+        self.assertNotIn('password', alice)
+        progress = data['changes']['level_progress'][0]
+        self.assertEqual(progress['username'], 'alice')
+        self.assertEqual(data['changes']['sessions'][0]['username'], 'alice')
+
+    def test_pull_after_caught_up_returns_only_new_changes(self):
+        _, _, cursor, _ = self.sync()
+        self.assertEqual(self.pull(cursor)['changes']['users'], [])
+
+        # Two queryset.update() paths: the session and the player's totals
+        player = APIClient()
+        player.credentials(HTTP_AUTHORIZATION=f'Token {self.alice_key}')
+        self.assertEqual(player.post('/api/auth/game/mark_completed/').status_code, 200)
+
+        data = self.pull(cursor)
+        self.assertEqual([row['username'] for row in data['changes']['users']], ['alice'])
+        self.assertEqual(data['changes']['users'][0]['total_score'], 30)
+        session = data['changes']['sessions'][0]
+        self.assertEqual((session['username'], session['finished']), ('alice', True))
+        self.assertEqual(data['changes']['level_progress'], [])
+
+    def test_deletes_leave_tombstones(self):
+        _, _, cursor, _ = self.sync()
+        session = GameSession.objects.get(user=self.alice)
+        session_id = session.id
+        progress_ids = sorted(LevelProgress.objects.filter(session=session).values_list('id', flat=True))
+        Leaderboard.objects.create(user=self.alice, session=session, final_score=30, total_time=60,
+                                   accuracy=90, speed_score=10)
+
+        with self.captureOnCommitCallbacks(using=router.db_for_write(GameSession), execute=True):
+            session.delete()
+
+        data = self.pull(cursor)
+        self.assertEqual(sorted(data['deleted']['level_progress']), progress_ids)
+        self.assertEqual(data['deleted']['sessions'], [session_id])
+        self.assertEqual(len(data['deleted']['leaderboard']), 1)
+        self.assertEqual(data['changes']['leaderboard'], [])  # created and deleted between pulls
+        self.assertEqual(self.pull(data['cursor'])['deleted']['sessions'], [])
+
+    @override_settings(CHANGE_FEED_SETTLE_SECONDS=3600)
+    def test_fresh_rows_wait_for_the_settle_window(self):
+        data = self.pull()
+        self.assertEqual(data['changes']['users'], [])
+        self.assertFalse(data['has_more'])
+
+    def test_bad_cursor_and_non_admin(self):
+        response = self.client.get(URL, {'since': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+        player = APIClient()
+        player.credentials(HTTP_AUTHORIZATION=f'Token {self.alice_key}')
+        self.assertEqual(player.get(URL).status_code, 403)
+
+
+class SettleWindowTests(TestCase):
+    databases = '__all__'
+
+    def test_settle_window_outlasts_every_lock_wait(self):
+        for alias in connections:
+            with self.subTest(alias=alias), connections[alias].cursor() as cursor:
+                cursor.execute('PRAGMA busy_timeout')
+                busy_timeout = cursor.fetchone()[0] / 1000
+                self.assertGreater(settings.CHANGE_FEED_SETTLE_SECONDS, busy_timeout)
@@ -0,0 +1,88 @@
+"""
+Tests for the streaming level progress export
+"""
+import csv
+import functools
+import io
+import json
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient, TestCase
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from authentication import views
+from authentication.exports import EXPORT_FIELDS, iter_progress_chunks
+from authentication.models import GameSession, LevelProgress, User
+from authentication.serializers import LevelProgressSerializer
+
+
+class LevelProgressExportTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='secret123', is_staff=True)
+        for name in ('alice', 'bob'):
+            user = User.objects.create_user(username=name, password='secret123')
+            session = GameSession.objects.create(user=user, session_token=f'{name}-token')
+            for level in range(3):
+                LevelProgress.objects.create(
+                    session=session, level_number=level, question_category='Linux',
+                    difficulty='easy', points_earned=10 * level, hint_used=level == 1,
+                    completed_at=timezone.now() if level else None, time_spent=1.5,
+                )
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+        return client
+
+    def expected_rows(self):
+        rows = LevelProgressSerializer(LevelProgress.objects.order_by('id'), many=True).data
+        return json.loads(json.dumps(rows))
+
+    def test_ndjson_matches_serializer_output(self):
+        response = self.client_for(self.admin).get('/api/auth/game/progress/export/ndjson/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertFalse(response.is_async)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], self.expected_rows())
+
+    async def test_asgi_requests_stream_chunk_by_chunk(self):
+        key = await sync_to_async(lambda: Token.objects.create(user=self.admin).key)()
+        with mock.patch.object(views, 'iter_progress_chunks', functools.partial(iter_progress_chunks, chunk_size=2)):
+            response = await AsyncClient().get('/api/auth/game/progress/export/ndjson/',
+                                               headers={'Authorization': f'Token {key}'})
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 3)
+        lines = b''.join(chunks).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], await sync_to_async(self.expected_rows)())
+
+    def test_csv_has_header_and_all_rows(self):
+        response = self.client_for(self.admin).get('/api/auth/game/progress/export/csv/')
+        self.assertEqual(response.status_code, 200)
+        reader = csv.reader(io.StringIO(b''.join(response.streaming_content).decode()))
+        header, *rows = list(reader)
+        self.assertEqual(header, EXPORT_FIELDS)
+        self.assertEqual(len(rows), 6)
+        self.assertEqual({row[header.index('username')] for row in rows}, {'alice', 'bob'})
+
+    def test_chunks_cover_every_row_once(self):
+        chunks = list(iter_progress_chunks(chunk_size=4))
+        self.assertEqual([len(chunk) for chunk in chunks], [4, 2])
+        ids = [row['id'] for chunk in chunks for row in chunk]
+        self.assertEqual(ids, sorted(set(ids)))
+
+    def test_admin_required(self):
+        player = User.objects.get(username='alice')
+        response = self.client_for(player).get('/api/auth/game/progress/export/csv/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_unknown_format_rejected(self):
+        response = self.client_for(self.admin).get('/api/auth/game/progress/export/xml/')
+        self.assertEqual(response.status_code, 400)
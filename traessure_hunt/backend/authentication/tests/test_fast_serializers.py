@@ -0,0 +1,73 @@
+"""
+The values_list() serializers must render exactly what the ModelSerializers do
+"""
+import json
+
+from django.test import TestCase
+from django.utils import timezone
+
+from authentication.fast_serializers import (
+    AchievementValuesSerializer, LeaderboardValuesSerializer, LevelProgressValuesSerializer,
+    QuestionValuesSerializer, UserAchievementValuesSerializer,
+)
+from authentication.models import (
+    Achievement, GameSession, Leaderboard, LevelProgress, Question, User, UserAchievement,
+)
+from authentication.serializers import (
+    AchievementSerializer, LeaderboardSerializer, LevelProgressSerializer,
+    QuestionSerializer, UserAchievementSerializer,
+)
+
+
+class ValuesSerializerParityTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        achievements = [
+            Achievement.objects.create(name=f'Badge {i}', description='Ünïcode "quoted"', icon='🏆', points=i)
+            for i in range(3)
+        ]
+        for level in range(3):
+            Question.objects.create(
+                level_number=level, question=f'Riddle {level}\nline two', answer='kernel',
+                security_riddle='?', security_key='pwd', hint='h', security_hint='sh',
+                category='Linux', difficulty='hard', points=10 + level,
+            )
+        for name in ('alice', 'bob'):
+            user = User.objects.create_user(username=name, password='secret123')
+            session = GameSession.objects.create(user=user, session_token=f'{name}-token', finished=True)
+            for level in range(3):
+                LevelProgress.objects.create(
+                    session=session, level_number=level, question_category='Linux', difficulty='easy',
+                    hint_used=level == 1, completed_at=timezone.now() if level else None, time_spent=2.5,
+                )
+            for achievement in achievements[:2]:
+                UserAchievement.objects.create(user=user, achievement=achievement, session=session)
+            Leaderboard.objects.create(
+                user=user, session=session, final_score=100, total_time=61.5,
+                rank_achieved='Kernel Master', accuracy=90, speed_score=75.25,
+            )
+
+    def assertSameJSON(self, fast, slow):
+        self.assertEqual(json.dumps(fast.data), json.dumps(slow.data))
+
+    def test_achievements(self):
+        queryset = Achievement.objects.all()
+        self.assertSameJSON(AchievementValuesSerializer(queryset), AchievementSerializer(queryset, many=True))
+
+    def test_user_achievements(self):
+        queryset = UserAchievement.objects.filter(user__username='alice')
+        self.assertSameJSON(UserAchievementValuesSerializer(queryset), UserAchievementSerializer(queryset, many=True))
+
+    def test_leaderboard(self):
+        queryset = Leaderboard.objects.all()[:10]
+        self.assertSameJSON(LeaderboardValuesSerializer(queryset), LeaderboardSerializer(queryset, many=True))
+
+    def test_level_progress(self):
+        queryset = LevelProgress.objects.all()
+        self.assertSameJSON(LevelProgressValuesSerializer(queryset), LevelProgressSerializer(queryset, many=True))
+
+    def test_questions(self):
+        queryset = Question.objects.filter(is_active=True).order_by('level_number')
+        self.assertSameJSON(QuestionValuesSerializer(queryset), QuestionSerializer(queryset, many=True))
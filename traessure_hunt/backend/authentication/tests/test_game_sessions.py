@@ -0,0 +1,62 @@
+"""
+Tests for starting game sessions when starts race each other
+"""
+from unittest import mock
+
+from django.db import IntegrityError
+from django.db.models import QuerySet
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from authentication import views
+from authentication.models import GameSession, User
+
+START_URL = '/api/auth/game/start/'
+
+
+class StartGameSessionTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='clicker', password='secret123')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_start_replaces_the_active_session(self):
+        first = self.client.post(START_URL).data['session']['id']
+        response = self.client.post(START_URL)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(list(GameSession.objects.filter(is_active=True).values_list('id', flat=True)),
+                         [response.data['session']['id']])
+        self.assertFalse(GameSession.objects.get(id=first).is_active)
+
+    def test_racing_start_is_rejected_as_a_whole(self):
+        winner = GameSession.objects.create(user=self.user, session_token='winner')
+        # The winner commits between our deactivating update and our insert
+        with mock.patch.object(QuerySet, 'update', return_value=0), self.assertRaises(IntegrityError):
+            views.start_game_session(self.user)
+        self.assertEqual(list(GameSession.objects.values_list('id', 'is_active')), [(winner.id, True)])
+
+    def test_losing_a_race_returns_the_winning_session(self):
+        winner = GameSession.objects.create(user=self.user, session_token='winner')
+        with mock.patch.object(views, 'start_game_session', side_effect=IntegrityError):
+            response = self.client.post(START_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['session']['id'], winner.id)
+
+    def test_retries_once_when_the_winner_is_gone_too(self):
+        attempts = []
+
+        def start(user, real=views.start_game_session):
+            attempts.append(user)
+            if len(attempts) == 1:
+                raise IntegrityError
+            return real(user)
+
+        with mock.patch.object(views, 'start_game_session', side_effect=start):
+            response = self.client.post(START_URL)
+        self.assertEqual((response.status_code, len(attempts)), (201, 2))
+        self.assertEqual(GameSession.objects.filter(user=self.user, is_active=True).count(), 1)
@@ -0,0 +1,53 @@
+"""
+Tests for the /healthz and /readyz probes
+"""
+from contextlib import ExitStack
+from unittest import mock
+
+from django.db import connections
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from treasure_hunt_backend.health import readiness
+
+
+class HealthProbeTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        readiness.clear()
+        self.addCleanup(readiness.clear)
+
+    def count_queries(self, *requests):
+        with ExitStack() as stack:
+            captured = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+            responses = [request() for request in requests]
+        return responses, sum(len(queries) for queries in captured)
+
+    def test_healthz_never_touches_the_database(self):
+        (response, head), queries = self.count_queries(
+            lambda: self.client.get('/healthz'), lambda: self.client.head('/healthz'),
+        )
+        self.assertEqual(queries, 0)
+        self.assertEqual((response.status_code, response.json()), (200, {'status': 'ok'}))
+        self.assertEqual(response['Cache-Control'], 'no-store')
+        self.assertEqual((head.status_code, head.content), (200, b''))
+
+    def test_readyz_pings_each_database_once_per_ttl(self):
+        with self.settings(READINESS_CACHE_TTL=60):
+            responses, queries = self.count_queries(*[lambda: self.client.get('/readyz')] * 3)
+        self.assertEqual(queries, len(connections.all()))
+        self.assertEqual({response.status_code for response in responses}, {200})
+        self.assertEqual(responses[0].json(), {
+            'status': 'ready', 'databases': {alias: 'ok' for alias in connections},
+        })
+
+    def test_readyz_reports_a_failed_ping(self):
+        with mock.patch.object(readiness, 'ping', return_value={'default': 'disk I/O error'}):
+            response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['databases'], {'default': 'disk I/O error'})
+        self.assertIn('Retry-After', response)
+
+    def test_other_methods_rejected(self):
+        self.assertEqual(self.client.post('/healthz').status_code, 405)
@@ -0,0 +1,84 @@
+"""
+Tests for Idempotency-Key handling on the mutating game endpoints
+"""
+from contextlib import ExitStack
+from datetime import timedelta
+
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from authentication.idempotency import clear_idempotency_cache
+from authentication.models import GameSession, Leaderboard, LevelProgress, User
+from authentication.write_behind import progress_buffer
+
+
+@override_settings(PROGRESS_WRITE_BEHIND=False, PROGRESS_FLUSH_INTERVAL_MS=0)
+class IdempotencyKeyTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='retrier', password='secret123')
+        cls.session = GameSession.objects.create(user=cls.user, session_token='retry')
+
+    def setUp(self):
+        clear_idempotency_cache()
+        self.addCleanup(clear_idempotency_cache)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+
+    def tearDown(self):
+        progress_buffer.stop()
+        progress_buffer.clear()
+
+    def post(self, url, data, key):
+        return self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_duplicate_level_save_is_replayed_without_queries(self):
+        first = self.post('/api/auth/game/level/', {'level': 1, 'score': 10}, 'save-1')
+        self.assertEqual(first.status_code, 201)
+        with ExitStack() as stack:
+            captured = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+            replay = self.post('/api/auth/game/level/', {'score': 10, 'level': 1}, 'save-1')
+        self.assertEqual(sum(len(queries) for queries in captured), 0)
+        self.assertEqual((replay.status_code, replay.data), (201, first.data))
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(LevelProgress.objects.count(), 1)
+
+    def test_leaderboard_submit_creates_one_entry(self):
+        GameSession.objects.filter(id=self.session.id).update(
+            finished=True, completed_at=timezone.now(), started_at=timezone.now() - timedelta(minutes=5),
+        )
+        data = {'session_id': self.session.id, 'accuracy': 90}
+        responses = [self.post('/api/auth/leaderboard/submit/', data, 'submit-1') for _ in range(3)]
+        self.assertEqual([response.status_code for response in responses], [201, 201, 201])
+        self.assertEqual(Leaderboard.objects.count(), 1)
+
+    def test_key_reused_for_a_different_body_is_rejected(self):
+        self.post('/api/auth/game/level/', {'level': 1, 'score': 10}, 'save-1')
+        response = self.post('/api/auth/game/level/', {'level': 1, 'score': 99}, 'save-1')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(LevelProgress.objects.get().points_earned, 10)
+
+    def test_keys_are_scoped_per_user_and_endpoint(self):
+        self.post('/api/auth/game/level/', {'level': 1, 'score': 10}, 'shared')
+        response = self.client.put(f'/api/auth/game/session/{self.session.id}/', {'score': 10},
+                                   format='json', HTTP_IDEMPOTENCY_KEY='shared')
+        self.assertNotIn('Idempotent-Replayed', response)
+
+        other = APIClient()
+        other.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=User.objects.create(username="other")).key}')
+        response = other.post('/api/auth/game/level/', {'level': 1, 'score': 10}, format='json',
+                              HTTP_IDEMPOTENCY_KEY='shared')
+        self.assertEqual(response.status_code, 404)
+
+    def test_requests_without_a_key_are_not_cached(self):
+        self.client.post('/api/auth/game/mark_completed/', format='json')
+        response = self.client.post('/api/auth/game/mark_completed/', format='json')
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.games_played, 2)
@@ -0,0 +1,100 @@
+"""
+Tests for the incrementally maintained LevelStats totals
+"""
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from authentication.level_stats import rebuild_level_stats
+from authentication.models import GameSession, LevelProgress, LevelStats, Question, User
+from authentication.write_behind import progress_buffer
+
+
+def authenticated_client(user):
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+def stats_rows():
+    return list(LevelStats.objects.order_by('level_number', 'difficulty').values(
+        'level_number', 'difficulty', 'attempts', 'solves', 'hints',
+        'riddle_attempts_sum', 'security_attempts_sum', 'time_spent_sum',
+    ))
+
+
+@override_settings(PROGRESS_WRITE_BEHIND=False, PROGRESS_FLUSH_INTERVAL_MS=0)
+class LevelStatsTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        for level, difficulty in ((0, 'easy'), (1, 'hard')):
+            Question.objects.create(
+                level_number=level, question='?', answer='a', security_riddle='?', security_key='k',
+                hint='h', security_hint='h', category='Linux', difficulty=difficulty,
+            )
+        cls.players = []
+        for name in ('alice', 'bob'):
+            user = User.objects.create_user(username=name, password='secret123')
+            session = GameSession.objects.create(user=user, session_token=f'{name}-token')
+            cls.players.append((user, session))
+
+    def tearDown(self):
+        progress_buffer.stop()
+        progress_buffer.clear()
+
+    def save_level(self, user, level, **data):
+        response = authenticated_client(user).post('/api/auth/game/level/', dict(data, level=level), format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_saves_accumulate_per_level_and_difficulty(self):
+        (alice, _), (bob, _) = self.players
+        self.save_level(alice, 1, wrong_attempts=2, hints_used=1)
+        self.save_level(bob, 1, wrong_attempts=1, security_wrong_attempts=3)
+        self.save_level(bob, 2)
+        stats = {row['level_number']: row for row in stats_rows()}
+        self.assertEqual(stats[0]['difficulty'], 'easy')
+        self.assertEqual((stats[0]['attempts'], stats[0]['solves'], stats[0]['hints']), (2, 2, 1))
+        self.assertEqual((stats[0]['riddle_attempts_sum'], stats[0]['security_attempts_sum']), (3, 3))
+        self.assertEqual((stats[1]['difficulty'], stats[1]['attempts']), ('hard', 1))
+
+    def test_resaving_a_level_applies_the_difference(self):
+        alice, _ = self.players[0]
+        self.save_level(alice, 1, wrong_attempts=4, hints_used=1)
+        self.save_level(alice, 1, wrong_attempts=1)
+        row = LevelStats.objects.get(level_number=0)
+        self.assertEqual((row.attempts, row.hints, row.riddle_attempts_sum), (1, 0, 1))
+
+    def test_deleting_progress_subtracts_it(self):
+        (alice, alice_session), (bob, _) = self.players
+        self.save_level(alice, 1, wrong_attempts=2)
+        self.save_level(bob, 1)
+        authenticated_client(alice).delete(f'/api/auth/game/session/{alice_session.id}/progress/clear/')
+        row = LevelStats.objects.get(level_number=0)
+        self.assertEqual((row.attempts, row.riddle_attempts_sum), (1, 0))
+
+    def test_incremental_totals_match_rebuild(self):
+        (alice, alice_session), (bob, _) = self.players
+        self.save_level(alice, 1, wrong_attempts=2, hints_used=1)
+        self.save_level(alice, 2, security_wrong_attempts=1)
+        self.save_level(bob, 1, wrong_attempts=5)
+        self.save_level(alice, 1, wrong_attempts=3)
+        progress = LevelProgress.objects.get(session=alice_session, level_number=1)
+        progress.delete()
+
+        incremental = stats_rows()
+        rebuild_level_stats()
+        self.assertEqual(stats_rows(), incremental)
+
+    def test_endpoint_is_admin_only(self):
+        alice, _ = self.players[0]
+        self.save_level(alice, 1, wrong_attempts=2)
+        self.assertEqual(authenticated_client(alice).get('/api/auth/game/progress/level-stats/').status_code, 403)
+
+        admin = User.objects.create_user(username='admin', password='secret123', is_staff=True)
+        response = authenticated_client(admin).get('/api/auth/game/progress/level-stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['level_stats'][0]['avg_riddle_attempts'], 2)
+        self.assertEqual(response.data['level_stats'][0]['solve_rate'], 1)
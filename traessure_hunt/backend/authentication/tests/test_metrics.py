@@ -0,0 +1,96 @@
+"""
+Tests for the per-endpoint metrics middleware and /metrics
+"""
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from authentication.models import GameSession, Question, User
+from authentication.write_behind import progress_buffer
+from treasure_hunt_backend import metrics
+from treasure_hunt_backend.asgi import ASGI_URLCONF
+
+
+def scrape(client):
+    """Parse /metrics into {sample line without value: value}"""
+    response = client.get('/metrics')
+    assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+    samples = {}
+    for line in response.content.decode().splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return samples
+
+
+@override_settings(PROGRESS_WRITE_BEHIND=False, PROGRESS_FLUSH_INTERVAL_MS=0)
+class MetricsTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        Question.objects.create(level_number=0, question='Q', answer='a', security_riddle='?', security_key='k',
+                                hint='h', security_hint='h', category='Linux')
+        cls.user = User.objects.create_user(username='metered', password='secret123')
+        GameSession.objects.create(user=cls.user, session_token='metered')
+        cls.key = Token.objects.create(user=cls.user).key
+
+    def setUp(self):
+        metrics.registry.clear()
+        self.addCleanup(metrics.registry.clear)
+        metrics.install_for_current_thread()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.key}')
+
+    def tearDown(self):
+        progress_buffer.stop()
+        progress_buffer.clear()
+
+    def test_requests_are_recorded_per_url_name(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get('/api/auth/questions/public/').status_code, 200)
+        self.client.post('/api/auth/game/level/', {'level': 1, 'score': 5}, format='json')
+        samples = scrape(self.client)
+
+        labels = 'view="public_questions",method="GET"'
+        self.assertEqual(samples[f'treasure_hunt_http_request_duration_seconds_count{{{labels}}}'], 3)
+        self.assertEqual(samples[f'treasure_hunt_http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'], 3)
+        self.assertEqual(samples[f'treasure_hunt_http_responses_total{{{labels},status="200"}}'], 3)
+        # At least the questions query on every request
+        self.assertGreaterEqual(samples[f'treasure_hunt_db_queries_per_request_sum{{{labels}}}'], 3)
+        self.assertGreater(samples[f'treasure_hunt_http_response_size_bytes_sum{{{labels}}}'], 0)
+        self.assertIn(f'treasure_hunt_db_query_duration_seconds_total{{{labels}}}', samples)
+        self.assertEqual(samples['treasure_hunt_http_responses_total{view="save_level",method="POST",status="201"}'], 1)
+
+    def test_unmatched_paths_share_one_label(self):
+        for path in ('/nope', '/api/auth/nope/', '/wp-login.php'):
+            self.client.get(path)
+        samples = scrape(self.client)
+        self.assertEqual(samples['treasure_hunt_http_responses_total{view="unmatched",method="GET",status="404"}'], 3)
+        self.assertFalse(any('nope' in name for name in samples))
+
+    @override_settings(ROOT_URLCONF=ASGI_URLCONF)
+    async def test_async_views_are_recorded_with_their_queries(self):
+        client = AsyncClient()
+        response = await client.get('/api/auth/game/session/', headers={'Authorization': f'Token {self.key}'})
+        self.assertEqual(response.status_code, 200)
+        samples = await sync_to_async(scrape)(self.client)
+        labels = 'view="active_session",method="GET"'
+        self.assertEqual(samples[f'treasure_hunt_http_responses_total{{{labels},status="200"}}'], 1)
+        self.assertGreaterEqual(samples[f'treasure_hunt_db_queries_per_request_sum{{{labels}}}'], 1)
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = metrics.Histogram((1, 5))
+        for value in (0, 1, 3, 7):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [2, 1, 1])
+        lines = []
+        endpoint = metrics.EndpointMetrics()
+        endpoint.queries = histogram
+        metrics._histogram(lines, 'q', 'help', [(('v', 'GET'), endpoint)], 'queries')
+        self.assertEqual(lines[2:5], [
+            'q_bucket{view="v",method="GET",le="1"} 2',
+            'q_bucket{view="v",method="GET",le="5"} 3',
+            'q_bucket{view="v",method="GET",le="+Inf"} 4',
+        ])
@@ -0,0 +1,157 @@
+"""
+Tests for pooled password checks and the hashing policy
+"""
+import threading
+from unittest import mock
+
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.signals import user_login_failed
+from django.core.exceptions import PermissionDenied
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from authentication import passwords
+from authentication.models import User
+from authentication.passwords import PasswordCheckBusy, PasswordCheckPool
+from authentication.throttling import reset_throttles
+from treasure_hunt_backend import metrics
+
+LOGIN_URL = '/api/auth/login/'
+
+
+def occupy(pool):
+    """Block one pool worker until the returned event is set"""
+    started, release = threading.Event(), threading.Event()
+    threading.Thread(target=pool.run, args=(lambda: started.set() or release.wait(),),
+                     kwargs={'timeout': 5}).start()
+    started.wait(5)
+    return release
+
+
+def iterations(user):
+    user.refresh_from_db()
+    return int(user.password.split('$')[1])
+
+
+class BannedBackend(ModelBackend):
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username == 'banned':
+            raise PermissionDenied
+        return None
+
+
+# Committed rows: pool threads read through their own connections
+@override_settings(PASSWORD_HASH_ITERATIONS=1000, PASSWORD_CHECK_WORKERS=2)
+class PooledLoginTests(TransactionTestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='crowd', password='secret123')
+        for cleanup in (reset_throttles, metrics.registry.clear):
+            cleanup()
+            self.addCleanup(cleanup)
+
+    def login(self, username='crowd', password='secret123'):
+        return APIClient().post(LOGIN_URL, {'username': username, 'password': password}, format='json')
+
+    def test_login_through_the_pool(self):
+        self.assertEqual(self.login().status_code, 200)
+        self.assertEqual(self.login(password='nope').status_code, 401)
+        self.assertEqual(self.login(username='nobody').status_code, 401)
+
+    def test_inactive_user_is_rejected(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.login().status_code, 401)
+
+    @override_settings(AUTHENTICATION_BACKENDS=['authentication.tests.test_passwords.BannedBackend',
+                                                'django.contrib.auth.backends.ModelBackend'])
+    def test_backends_and_signals_run_on_the_pool(self):
+        User.objects.create_user(username='banned', password='secret123')
+        failures = []
+
+        def record(sender, credentials, request, **kwargs):
+            failures.append((credentials['username'], threading.current_thread().name))
+
+        user_login_failed.connect(record)
+        self.addCleanup(user_login_failed.disconnect, record)
+        self.assertEqual(self.login(username='banned').status_code, 401)
+        self.assertEqual(self.login(password='nope').status_code, 401)
+        self.assertEqual(self.login().status_code, 200)
+        self.assertEqual([name for name, _ in failures], ['banned', 'crowd'])
+        self.assertTrue(all(thread.startswith('password-check') for _, thread in failures))
+
+    def test_rehash_is_saved_from_the_pool(self):
+        with self.settings(PASSWORD_HASH_ITERATIONS=2000):
+            self.assertEqual(self.login().status_code, 200)
+        self.assertEqual(iterations(self.user), 2000)
+
+    @override_settings(PASSWORD_CHECK_WORKERS=0)
+    def test_inline_checks(self):
+        with mock.patch.object(passwords, 'password_checks') as pool:
+            self.assertEqual(self.login().status_code, 200)
+            self.assertEqual(self.login(password='nope').status_code, 401)
+        pool.assert_not_called()
+
+    def test_full_pool_fails_fast_with_retry_after(self):
+        pool = PasswordCheckPool(workers=1, queue_size=0)
+        self.addCleanup(occupy(pool).set)
+        with mock.patch.object(passwords, '_pool', pool):
+            response = self.login()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '5')
+        self.assertIn('treasure_hunt_shed_requests_total{reason="password_pool_full",scope="login"} 1',
+                      metrics.registry.render())
+
+    def test_slow_check_times_out(self):
+        pool = PasswordCheckPool(workers=1, queue_size=1)
+        release = occupy(pool)
+        self.addCleanup(release.set)
+        with self.assertRaises(PasswordCheckBusy):
+            pool.run(lambda: True, timeout=0.01)  # queued behind the blocked check
+        release.set()
+        self.assertTrue(pool.run(lambda: True, timeout=5))  # the cancelled slot was given back
+
+
+class HashingPolicyTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        reset_throttles()
+        self.addCleanup(reset_throttles)
+
+    def login(self, username):
+        return APIClient().post(LOGIN_URL, {'username': username, 'password': 'secret123'}, format='json')
+
+    @override_settings(PASSWORD_HASH_ITERATIONS=1200)
+    def test_new_hashes_follow_the_policy(self):
+        self.assertEqual(iterations(User.objects.create_user(username='fresh', password='secret123')), 1200)
+
+    def test_rehash_waits_until_it_is_turned_back_on(self):
+        user = User.objects.create(username='event', password=make_password('secret123', hasher='default'))
+        with self.settings(PASSWORD_HASH_ITERATIONS=1000):
+            user.set_password('secret123')
+            user.save()
+        # After the event: full strength again, but rehashing still off
+        with self.settings(PASSWORD_HASH_ITERATIONS=2000, PASSWORD_REHASH_ON_LOGIN=False):
+            self.assertEqual(self.login('event').status_code, 200)
+            self.assertEqual(iterations(user), 1000)
+            with self.settings(PASSWORD_CHECK_WORKERS=0):
+                self.assertEqual(self.login('event').status_code, 200)
+                self.assertEqual(iterations(user), 1000)
+        with self.settings(PASSWORD_HASH_ITERATIONS=2000, PASSWORD_REHASH_ON_LOGIN=True):
+            self.assertEqual(self.login('event').status_code, 200)
+            self.assertEqual(iterations(user), 2000)
+            self.assertEqual(self.login('event').status_code, 200)
+
+
+class PasswordCheckPoolTests(SimpleTestCase):
+    def test_runs_on_pool_threads(self):
+        pool = PasswordCheckPool(workers=2, queue_size=2)
+        self.assertTrue(pool.run(lambda: threading.current_thread().name, timeout=5).startswith('password-check'))
+
+    def test_errors_propagate_and_free_the_slot(self):
+        pool = PasswordCheckPool(workers=1, queue_size=0)
+        for _ in range(2):
+            with self.assertRaises(ZeroDivisionError):
+                pool.run(lambda: 1 / 0, timeout=5)
@@ -0,0 +1,75 @@
+"""
+Tests for the cached level progress aggregates endpoint
+"""
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from authentication.aggregates import get_progress_aggregates, invalidate_progress_aggregates
+from authentication.models import GameSession, LevelProgress, User
+
+URL = '/api/auth/game/progress/stats/'
+
+
+class LevelProgressAggregateTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='secret123', is_staff=True)
+        # alice clears levels 0-2, bob 0-1 (with a hint on 1), carol only level 0
+        for name, levels in (('alice', 3), ('bob', 2), ('carol', 1)):
+            user = User.objects.create_user(username=name, password='secret123')
+            session = GameSession.objects.create(user=user, session_token=f'{name}-token')
+            for level in range(levels):
+                LevelProgress.objects.create(
+                    session=session, level_number=level, question_category='Linux',
+                    difficulty='easy' if level == 0 else 'hard', level_completed=True,
+                    hint_used=name == 'bob' and level == 1, riddle_attempts=level,
+                )
+
+    def setUp(self):
+        invalidate_progress_aggregates()
+        self.addCleanup(invalidate_progress_aggregates)
+
+    def test_level_funnel(self):
+        levels = {row['level_number']: row for row in get_progress_aggregates()['levels']}
+        self.assertEqual([levels[n]['sessions'] for n in (0, 1, 2)], [3, 2, 1])
+        self.assertEqual([levels[n]['drop_off'] for n in (0, 1, 2)], [1, 1, 0])
+        self.assertEqual(levels[0]['drop_off_rate'], 0.3333)
+        self.assertEqual(levels[1]['hint_rate'], 0.5)
+        self.assertEqual(levels[2]['avg_riddle_attempts'], 2)
+
+    def test_drop_off_skips_missing_levels(self):
+        LevelProgress.objects.filter(level_number=1).delete()
+        levels = {row['level_number']: row for row in get_progress_aggregates()['levels']}
+        # Level 0 is not compared with level 2, so no one appears to stop at it
+        self.assertEqual([levels[n]['drop_off'] for n in (0, 2)], [0, 0])
+
+    def test_difficulty_breakdown_and_totals(self):
+        aggregates = get_progress_aggregates()
+        difficulties = {row['difficulty']: row for row in aggregates['difficulties']}
+        self.assertEqual(difficulties['easy']['sessions'], 3)
+        self.assertEqual(difficulties['hard']['players'], 2)
+        totals = aggregates['totals']
+        self.assertEqual((totals['sessions'], totals['completed'], totals['players'], totals['hints']), (6, 6, 3, 1))
+
+    def test_cached_until_progress_changes(self):
+        get_progress_aggregates()
+        with self.assertNumQueries(0):
+            get_progress_aggregates()
+
+        LevelProgress.objects.filter(level_number=2).get().delete()
+        self.assertEqual(get_progress_aggregates()['totals']['sessions'], 5)
+
+    def test_admin_only(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.admin).key}')
+        response = client.get(URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['success'])
+        self.assertEqual(len(response.data['levels']), 3)
+
+        player = User.objects.get(username='carol')
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=player).key}')
+        self.assertEqual(client.get(URL).status_code, 403)
@@ -0,0 +1,95 @@
+"""
+Tests for the keyset-paginated admin level progress API
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from authentication.models import GameSession, LevelProgress, User
+
+URL = '/api/auth/game/progress/'
+DAY_ONE = datetime(2024, 9, 21, 10, 0, tzinfo=dt_timezone.utc)
+
+
+class LevelProgressPaginationTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='secret123', is_staff=True)
+        cls.player = User.objects.create_user(username='alice', password='secret123')
+        for index, name in enumerate(('alice', 'alan', 'bob')):
+            user = cls.player if name == 'alice' else User.objects.create_user(username=name, password='secret123')
+            session = GameSession.objects.create(user=user, session_token=f'{name}-token')
+            for level in range(6):
+                LevelProgress.objects.create(
+                    session=session, level_number=level, question_category='Linux',
+                    difficulty='easy' if level < 3 else 'hard',
+                    # Two rows share each timestamp so ties are broken by id;
+                    # every sixth row is unfinished (completed_at NULL)
+                    completed_at=DAY_ONE + timedelta(hours=level // 2, days=index) if level != 5 else None,
+                )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.admin).key}')
+
+    def fetch_all(self, **params):
+        rows, cursor, pages = [], None, 0
+        while True:
+            query = dict(params, **({'cursor': cursor} if cursor else {}))
+            response = self.client.get(URL, query)
+            self.assertEqual(response.status_code, 200, response.data)
+            rows.extend(response.data['progress'])
+            pages += 1
+            cursor = response.data['next_cursor']
+            if cursor is None:
+                return rows, pages
+
+    def expected_ids(self, queryset):
+        completed = queryset.filter(completed_at__isnull=False).order_by('-completed_at', '-id')
+        unfinished = queryset.filter(completed_at__isnull=True).order_by('-id')
+        return list(completed.values_list('id', flat=True)) + list(unfinished.values_list('id', flat=True))
+
+    def test_cursor_walk_returns_every_row_once_in_order(self):
+        rows, pages = self.fetch_all(limit=4)
+        self.assertEqual([row['id'] for row in rows], self.expected_ids(LevelProgress.objects.all()))
+        self.assertEqual(pages, 5)
+        # Pages ending exactly on, just before and just after the last completed row
+        for limit in (5, 7, 14, 16):
+            with self.subTest(limit=limit):
+                rows, _ = self.fetch_all(limit=limit)
+                self.assertEqual([row['id'] for row in rows], self.expected_ids(LevelProgress.objects.all()))
+
+    def test_rows_carry_usernames(self):
+        rows, _ = self.fetch_all(limit=500)
+        self.assertEqual({row['username'] for row in rows}, {'alice', 'alan', 'bob'})
+
+    def test_level_and_difficulty_filters(self):
+        rows, _ = self.fetch_all(level=2, limit=2)
+        self.assertEqual([row['id'] for row in rows], self.expected_ids(LevelProgress.objects.filter(level_number=2)))
+        rows, _ = self.fetch_all(difficulty='hard', limit=4)
+        self.assertEqual([row['id'] for row in rows], self.expected_ids(LevelProgress.objects.filter(difficulty='hard')))
+
+    def test_username_prefix_filter(self):
+        rows, _ = self.fetch_all(username='al')
+        self.assertEqual({row['username'] for row in rows}, {'alice', 'alan'})
+        rows, _ = self.fetch_all(username='ali')
+        self.assertEqual({row['username'] for row in rows}, {'alice'})
+
+    def test_completed_date_range_includes_end_day(self):
+        rows, _ = self.fetch_all(completed_from='2024-09-22', completed_to='2024-09-22')
+        self.assertEqual({row['username'] for row in rows}, {'alan'})
+        self.assertEqual(len(rows), 5)
+
+    def test_invalid_parameters_rejected(self):
+        for params in ({'cursor': 'not-a-cursor'}, {'level': 'x'}, {'completed_from': 'yesterday'}, {'limit': 'all'}):
+            response = self.client.get(URL, params)
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_non_admin_forbidden(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.player).key}')
+        self.assertEqual(client.get(URL).status_code, 403)
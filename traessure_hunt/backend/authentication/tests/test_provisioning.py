@@ -0,0 +1,121 @@
+"""
+Tests for the provision_users management command
+"""
+import csv
+import io
+import os
+import stat
+import tempfile
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from authentication.management.commands.provision_users import Command
+from authentication.models import User
+from authentication.throttling import reset_throttles
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class ProvisionUsersTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        reset_throttles()
+        self.addCleanup(reset_throttles)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = directory.name
+
+    def provision(self, rows, *args, workers=0):
+        path = os.path.join(self.dir, 'participants.csv')
+        with open(path, 'w', newline='') as handle:
+            csv.writer(handle).writerows(rows)
+        out = io.StringIO()
+        call_command('provision_users', path, '--workers', str(workers), *args, stdout=out)
+        return out.getvalue(), os.path.join(self.dir, 'participants-credentials.csv')
+
+    def read_sheet(self, path):
+        with open(path, newline='') as handle:
+            return {row['username']: row for row in csv.DictReader(handle)}
+
+    def test_creates_users_tokens_and_sheet(self):
+        User.objects.create_user(username='taken', password='secret123')
+        output, sheet = self.provision([
+            ['username', 'email', 'password'],
+            ['alice', 'alice@example.com', 'wonderland'],
+            ['bob', '', ''],
+            ['taken', '', ''],
+            ['alice', '', ''],
+            ['bad name!', '', ''],
+            ['carol', '', 'abc'],
+        ], '--batch-size', '1')
+
+        self.assertIn('Created 2 accounts (4 skipped)', output)
+        for reason in ('taken: already exists', 'alice: repeated in the CSV', 'bad name!: invalid username',
+                       'carol: password shorter than 6 characters'):
+            self.assertIn(reason, output)
+
+        credentials = self.read_sheet(sheet)
+        self.assertEqual(set(credentials), {'alice', 'bob'})
+        self.assertEqual(credentials['alice']['password'], 'wonderland')
+        self.assertEqual(len(credentials['bob']['password']), 10)
+        self.assertEqual(stat.S_IMODE(os.stat(sheet).st_mode), 0o600)
+
+        alice = User.objects.get(username='alice')
+        self.assertEqual((alice.email, alice.password.split('$')[1]), ('alice@example.com', '1000'))
+        self.assertEqual(Token.objects.filter(user__username__in=['alice', 'bob']).count(), 2)
+
+        response = APIClient().post('/api/auth/login/', {
+            'username': 'bob', 'password': credentials['bob']['password']
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['token'], Token.objects.get(user__username='bob').key)
+
+    def test_hashes_on_a_process_pool(self):
+        _, sheet = self.provision([['username']] + [[f'player{i}'] for i in range(6)], workers=2)
+
+        player = User.objects.get(username='player5')
+        self.assertTrue(player.check_password(self.read_sheet(sheet)['player5']['password']))
+        self.assertEqual(player.password.split('$')[1], '1000')
+
+    def test_rerun_keeps_the_earlier_sheet(self):
+        _, sheet = self.provision([['username'], ['alice']])
+        first = self.read_sheet(sheet)
+        with self.assertRaises(CommandError):
+            self.provision([['username'], ['bob']])
+        self.assertEqual(self.read_sheet(sheet), first)
+        self.assertFalse(User.objects.filter(username='bob').exists())
+
+    def test_force_overwrites_and_restricts_the_sheet(self):
+        sheet = os.path.join(self.dir, 'participants-credentials.csv')
+        with open(sheet, 'w') as handle:
+            handle.write('stale\n')
+        os.chmod(sheet, 0o644)
+        self.provision([['username'], ['bob']], '--force')
+        self.assertEqual(set(self.read_sheet(sheet)), {'bob'})
+        self.assertEqual(stat.S_IMODE(os.stat(sheet).st_mode), 0o600)
+
+    def test_sheet_created_mid_run_is_not_overwritten(self):
+        sheet = os.path.join(self.dir, 'participants-credentials.csv')
+        original = Command.write_sheet
+
+        def write_sheet(command, path, rows, force):
+            with open(sheet, 'w') as handle:
+                handle.write('someone else\n')
+            return original(command, path, rows, force)
+
+        with mock.patch.object(Command, 'write_sheet', write_sheet):
+            output, _ = self.provision([['username'], ['carol']])
+        with open(sheet) as handle:
+            self.assertEqual(handle.read(), 'someone else\n')
+        written = [name for name in os.listdir(self.dir) if name.startswith('participants-credentials-')]
+        self.assertEqual(len(written), 1)
+        self.assertIn(written[0], output)
+        self.assertEqual(set(self.read_sheet(os.path.join(self.dir, written[0]))), {'carol'})
+
+    def test_needs_a_username_column(self):
+        with self.assertRaises(CommandError):
+            self.provision([['name', 'email'], ['alice', '']])
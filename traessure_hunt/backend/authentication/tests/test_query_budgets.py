@@ -0,0 +1,178 @@
+"""
+Query budgets for the API endpoints.
+
+Every endpoint below declares the most queries one request may run, counted
+across all databases with every in-process cache cold (token, answers,
+aggregates, idempotency). Going over the budget fails with the SQL that ran,
+so an N+1 (a serializer field following a foreign key per row) or a dropped
+prefetch shows up here. Read endpoints are also run again after the data set
+grows: their query count must not change with the number of rows.
+
+Lower a budget when an endpoint gets cheaper; raise one only with a reason.
+"""
+from contextlib import ExitStack
+
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from authentication.aggregates import invalidate_progress_aggregates
+from authentication.answers import invalidate_answer_index
+from authentication.authentication import clear_token_cache
+from authentication.idempotency import clear_idempotency_cache
+from authentication.models import (
+    Achievement, GameSession, Leaderboard, LevelProgress, LevelStats, Question, User, UserAchievement,
+)
+from authentication.write_behind import progress_buffer
+
+# (method, path, payload, max queries); '{session}' is the player's active session,
+# '{finished}' their finished one. Token authentication is one query.
+PLAYER_BUDGETS = [
+    ('get', '/api/auth/profile/', None, 1),
+    ('get', '/api/auth/game/session/', None, 2),
+    ('get', '/api/auth/game/bootstrap/', None, 5),
+    ('get', '/api/auth/game/session/{session}/progress/', None, 3),
+    ('get', '/api/auth/leaderboard/', None, 3),
+    ('get', '/api/auth/achievements/', None, 2),
+    ('get', '/api/auth/achievements/all/', None, 2),
+    ('get', '/api/auth/questions/public/', None, 2),
+    ('post', '/api/auth/game/verify/', {'level': 1, 'phase': 'riddle', 'answer': 'wrong'}, 3),
+    ('post', '/api/auth/game/level/', {'level': 2, 'score': 10, 'time_taken': 30}, 10),  # atomic() savepoint and release count
+    ('post', '/api/auth/leaderboard/submit/', {'session_id': '{finished}', 'accuracy': 90}, 3),
+]
+
+ADMIN_BUDGETS = [
+    ('get', '/api/auth/questions/', None, 2),
+    ('get', '/api/auth/questions/1/', None, 2),
+    ('get', '/api/auth/game/progress/', None, 3),
+    ('get', '/api/auth/game/progress/all/', None, 3),
+    ('get', '/api/auth/game/progress/stats/', None, 4),
+    ('get', '/api/auth/game/progress/level-stats/', None, 2),
+    ('get', '/api/auth/game/progress/export/csv/', None, 4),  # streamed in chunks; the empty last chunk is one query
+    ('get', '/api/auth/changes/', None, 9),
+]
+
+
+def clear_caches():
+    clear_token_cache()
+    invalidate_answer_index()
+    invalidate_progress_aggregates()
+    clear_idempotency_cache()
+
+
+def add_players(count, prefix):
+    """Players with a finished game each: progress, achievements and a leaderboard entry"""
+    achievements = list(Achievement.objects.all())
+    now = timezone.now()
+    for index in range(count):
+        user = User.objects.create_user(username=f'{prefix}{index}', password='secret123')
+        session = GameSession.objects.create(user=user, session_token=f'{prefix}{index}', score=30, finished=True,
+                                             is_active=False, completed_at=now)
+        for level in range(3):
+            LevelProgress.objects.create(session=session, level_number=level, question_category='Linux',
+                                         difficulty='easy', level_completed=True, points_earned=10)
+        for achievement in achievements:
+            UserAchievement.objects.create(user=user, achievement=achievement, session=session)
+        Leaderboard.objects.create(user=user, session=session, final_score=30, total_time=90, accuracy=80,
+                                   speed_score=50)
+
+
+@override_settings(PROGRESS_WRITE_BEHIND=False, PROGRESS_FLUSH_INTERVAL_MS=0, CHANGE_FEED_SETTLE_SECONDS=0)
+class QueryBudgetTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        for level in range(4):
+            Question.objects.create(level_number=level, question='Q', answer='kernel', security_riddle='?',
+                                    security_key='pwd', hint='h', security_hint='sh', category='Linux')
+            LevelStats.objects.create(level_number=level, difficulty='medium')
+        for name in ('First Blood', 'Speedrunner'):
+            Achievement.objects.create(name=name, description=name, icon='🏅')
+        add_players(2, 'small')
+
+        cls.player = User.objects.create_user(username='player', password='secret123')
+        cls.finished = GameSession.objects.create(user=cls.player, session_token='finished', score=20,
+                                                  finished=True, is_active=False, completed_at=timezone.now())
+        cls.session = GameSession.objects.create(user=cls.player, session_token='active', current_level=1)
+        LevelProgress.objects.create(session=cls.session, level_number=0, question_category='Linux',
+                                     difficulty='easy', level_completed=True)
+        for achievement in Achievement.objects.all():
+            UserAchievement.objects.create(user=cls.player, achievement=achievement, session=cls.finished)
+        cls.admin = User.objects.create_user(username='admin', password='secret123', is_staff=True)
+
+    def setUp(self):
+        self.addCleanup(clear_caches)
+        self.player_client = self.client_for(self.player)
+        self.admin_client = self.client_for(self.admin)
+
+    def tearDown(self):
+        progress_buffer.stop()
+        progress_buffer.clear()
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+        return client
+
+    def resolve(self, value):
+        ids = {'session': self.session.id, 'finished': self.finished.id}
+        if isinstance(value, dict):
+            return {key: self.resolve(item) for key, item in value.items()}
+        if value == '{finished}':
+            return ids['finished']
+        return value.format(**ids) if isinstance(value, str) else value
+
+    def run_counted(self, client, method, path, payload):
+        """Return (response, executed SQL) for one request with cold caches"""
+        clear_caches()
+        with ExitStack() as stack:
+            captured = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+            response = getattr(client, method)(self.resolve(path), self.resolve(payload), format='json')
+            if response.streaming:
+                b''.join(response.streaming_content)  # exports query as they stream
+        if response.status_code >= 300:
+            self.fail(f'{method.upper()} {path} returned {response.status_code}: {response.data}')
+        return response, [query['sql'] for queries in captured for query in queries]
+
+    def assertQueryBudget(self, client, method, path, payload, budget):
+        _, queries = self.run_counted(client, method, path, payload)
+        if len(queries) > budget:
+            self.fail(f'{method.upper()} {path} ran {len(queries)} queries, budget is {budget}:\n'
+                      + '\n'.join(f'  {sql}' for sql in queries))
+        return len(queries)
+
+    def test_player_endpoints_stay_within_budget(self):
+        for method, path, payload, budget in PLAYER_BUDGETS:
+            with self.subTest(f'{method.upper()} {path}'):
+                self.assertQueryBudget(self.player_client, method, path, payload, budget)
+
+    def test_admin_endpoints_stay_within_budget(self):
+        for method, path, payload, budget in ADMIN_BUDGETS:
+            with self.subTest(f'{method.upper()} {path}'):
+                self.assertQueryBudget(self.admin_client, method, path, payload, budget)
+
+    def test_read_queries_do_not_grow_with_rows(self):
+        reads = [(self.player_client, *row) for row in PLAYER_BUDGETS if row[0] == 'get']
+        reads += [(self.admin_client, *row) for row in ADMIN_BUDGETS]
+        before = {path: len(self.run_counted(client, method, path, payload)[1])
+                  for client, method, path, payload, _ in reads}
+        add_players(6, 'large')
+        for client, method, path, payload, _ in reads:
+            with self.subTest(path):
+                _, queries = self.run_counted(client, method, path, payload)
+                self.assertEqual(len(queries), before[path], '\n'.join(queries))
+
+    @override_settings(QUERY_COUNT_HEADERS=True)
+    def test_debug_headers_report_the_request_queries(self):
+        response, queries = self.run_counted(self.player_client, 'get', '/api/auth/game/bootstrap/', None)
+        self.assertEqual(int(response['X-Query-Count']), len(queries))
+        self.assertRegex(response['X-DB-Time'], r'^\d+\.\d{3}ms$')
+
+    def test_debug_headers_off_by_default(self):
+        response = self.player_client.get('/api/auth/profile/')
+        self.assertNotIn('X-Query-Count', response)
+        self.assertNotIn('X-DB-Time', response)
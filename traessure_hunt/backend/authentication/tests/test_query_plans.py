@@ -0,0 +1,125 @@
+"""
+Query plan regression tests for the hot gameplay queries.
+
+Every query that runs on a request path during an event is compiled by the ORM
+and fed to SQLite's EXPLAIN QUERY PLAN. A plan that scans a table or walks an
+index from the start instead of searching it, or that sorts through a temporary
+B-tree, fails the test, so a dropped index or a rewritten filter shows up here
+before it shows up as latency.
+"""
+from django.db import IntegrityError, connections, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from authentication.changes import _page
+from authentication.models import DeletedRow, GameSession, LevelProgress, Leaderboard, Question, User
+from authentication.pagination import _ranges_after
+
+
+def explain_sql(using, sql, params=()):
+    """Return the EXPLAIN QUERY PLAN detail lines for a SQL statement"""
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def explain(queryset):
+    """Return the EXPLAIN QUERY PLAN detail lines for a queryset"""
+    sql, params = queryset.query.sql_with_params()
+    return explain_sql(queryset.db, sql, params)
+
+
+class HotQueryPlanTests(TestCase):
+    """Every hot query must be answered from an index"""
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='planner', password='secret123')
+        cls.session = GameSession.objects.create(user=cls.user, session_token='plan-token')
+
+    def assertUsesIndex(self, queryset, ordered_scan=False):
+        """
+        Every table must be searched through an index. ``ordered_scan`` also
+        allows walking an index in order, for LIMITed first pages and top-N
+        reads, where the scan stops after the limit.
+        """
+        self.assertPlanUsesIndex(explain(queryset), ordered_scan)
+
+    def assertPlanUsesIndex(self, plan, ordered_scan=False):
+        for line in plan:
+            if line.startswith('SCAN') and not (ordered_scan and 'INDEX' in line):
+                self.fail(f'Scan in plan: {plan}')
+            if 'TEMP B-TREE' in line:
+                self.fail(f'Temporary sort in plan: {plan}')
+
+    def test_active_session_lookup(self):
+        # The statement get_active_session actually runs, not a copy of its filter
+        client = APIClient()
+        client.force_authenticate(self.user)
+        using = GameSession.objects.db
+        with CaptureQueriesContext(connections[using]) as queries:
+            self.assertEqual(client.get('/api/auth/game/session/').status_code, 200)
+        lookups = [query['sql'] for query in queries if 'game_sessions' in query['sql']]
+        self.assertEqual(len(lookups), 1)
+        self.assertPlanUsesIndex(explain_sql(using, lookups[0]))
+
+    def test_session_ownership_lookup(self):
+        self.assertUsesIndex(GameSession.objects.filter(id=self.session.id, user=self.user))
+
+    def test_level_progress_upsert_lookup(self):
+        self.assertUsesIndex(LevelProgress.objects.filter(session=self.session, level_number=2))
+
+    def test_session_progress_listing(self):
+        self.assertUsesIndex(LevelProgress.objects.filter(session_id=self.session.id))
+
+    def test_question_by_level(self):
+        self.assertUsesIndex(Question.objects.filter(level_number=3, is_active=True))
+
+    def test_active_question_catalogue(self):
+        self.assertUsesIndex(Question.objects.filter(is_active=True).order_by('level_number'), ordered_scan=True)
+
+    def test_leaderboard_top_n(self):
+        self.assertUsesIndex(Leaderboard.objects.all()[:10], ordered_scan=True)
+
+    def test_progress_pages(self):
+        newest_first = LevelProgress.objects.order_by('-completed_at', '-id')
+        self.assertUsesIndex(newest_first[:101], ordered_scan=True)
+        self.assertUsesIndex(newest_first.filter(level_number=3)[:101])
+        self.assertUsesIndex(newest_first.filter(difficulty='hard')[:101])
+
+    def test_progress_pages_after_a_cursor(self):
+        newest_first = LevelProgress.objects.order_by('-completed_at', '-id')
+        for cursor in ((timezone.now(), 42), (None, 42)):
+            for predicate in _ranges_after(cursor):
+                for queryset in (newest_first, newest_first.filter(level_number=3),
+                                 newest_first.filter(difficulty='hard')):
+                    with self.subTest(cursor=cursor, predicate=predicate, query=str(queryset.query)[-60:]):
+                        self.assertUsesIndex(queryset.filter(predicate)[:101])
+
+    def test_change_feed_pages(self):
+        position = (timezone.now(), 1)
+        for model, field in ((User, 'updated_at'), (GameSession, 'updated_at'), (LevelProgress, 'updated_at'),
+                             (Leaderboard, 'updated_at'), (DeletedRow, 'deleted_at')):
+            with self.subTest(model=model.__name__):
+                self.assertUsesIndex(_page(model.objects.all(), field, position, timezone.now())[:501])
+
+
+class ActiveSessionConstraintTests(TestCase):
+    """The partial unique index allows one active session per user"""
+    databases = '__all__'
+
+    def test_second_active_session_rejected(self):
+        user = User.objects.create_user(username='twice', password='secret123')
+        GameSession.objects.create(user=user, session_token='first')
+        with self.assertRaises(IntegrityError), transaction.atomic(using=GameSession.objects.db):
+            GameSession.objects.create(user=user, session_token='second')
+
+    def test_inactive_sessions_not_limited(self):
+        user = User.objects.create_user(username='history', password='secret123')
+        GameSession.objects.create(user=user, session_token='old-1', is_active=False)
+        GameSession.objects.create(user=user, session_token='old-2', is_active=False)
+        GameSession.objects.create(user=user, session_token='current')
+        self.assertEqual(GameSession.objects.filter(user=user).count(), 3)
@@ -0,0 +1,66 @@
+"""
+Tests for the orjson renderer and thresholded gzip compression
+"""
+import datetime
+import decimal
+import gzip
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
+
+from authentication import renderers
+from authentication.models import Question
+from authentication.renderers import FastJSONRenderer
+
+SAMPLE = {
+    'success': True,
+    'message': 'Ünïcode ✓ and a line separator \u2028 here',
+    'errors': {'username': [ErrorDetail('This field is required.', code='required')]},
+    'when': datetime.datetime(2024, 9, 21, 10, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+    'day': datetime.date(2024, 9, 21),
+    'amount': decimal.Decimal('12.50'),
+    'levels': {1: 'kernel', 2: 'shell'},
+    'scores': [1, 2.5, None, -3],
+}
+
+
+class FastJSONRendererTests(SimpleTestCase):
+
+    def test_matches_drf_renderer(self):
+        self.assertEqual(FastJSONRenderer().render(SAMPLE), JSONRenderer().render(SAMPLE))
+
+    def test_indented_output_uses_stdlib(self):
+        media_type = 'application/json; indent=4'
+        self.assertEqual(
+            FastJSONRenderer().render(SAMPLE, media_type), JSONRenderer().render(SAMPLE, media_type)
+        )
+
+    def test_falls_back_without_orjson(self):
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(FastJSONRenderer().render(SAMPLE), JSONRenderer().render(SAMPLE))
+
+    def test_none_renders_empty_body(self):
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+
+@override_settings(GZIP_MIN_LENGTH=1024)
+class GZipThresholdTests(TestCase):
+    databases = '__all__'
+
+    def test_large_response_compressed(self):
+        for level in range(6):
+            Question.objects.create(
+                level_number=level, question='A long riddle ' * 40, answer='kernel', security_riddle='?',
+                security_key='pwd', hint='h', security_hint='sh', category='Linux',
+            )
+        response = self.client.get('/api/auth/questions/public/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))['questions']), 6)
+
+    def test_small_response_left_alone(self):
+        response = self.client.get('/api/auth/achievements/all/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(json.loads(response.content), {'success': True, 'achievements': []})
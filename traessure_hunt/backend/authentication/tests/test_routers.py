@@ -0,0 +1,86 @@
+"""
+Tests for the optional gameplay database split and the cascades that replace
+cross-database foreign key constraints.
+"""
+from unittest import skipUnless
+
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase
+
+from authentication.models import (
+    Achievement, GameSession, LevelProgress, LevelStats, Leaderboard, Question, User, UserAchievement,
+)
+from authentication.routers import GAMEPLAY_DB, GameplayRouter
+
+
+class GameplayRouterTests(SimpleTestCase):
+    router = GameplayRouter()
+
+    def test_gameplay_models_routed_to_gameplay_db(self):
+        for model in (GameSession, LevelProgress, LevelStats, Leaderboard):
+            self.assertEqual(self.router.db_for_read(model), GAMEPLAY_DB)
+            self.assertEqual(self.router.db_for_write(model), GAMEPLAY_DB)
+
+    def test_read_mostly_models_routed_to_default_db(self):
+        for model in (User, Question, Achievement, UserAchievement):
+            self.assertEqual(self.router.db_for_read(model), 'default')
+            self.assertEqual(self.router.db_for_write(model), 'default')
+
+    def test_migrations_split_by_database(self):
+        self.assertTrue(self.router.allow_migrate(GAMEPLAY_DB, 'authentication', 'levelprogress'))
+        self.assertFalse(self.router.allow_migrate('default', 'authentication', 'levelprogress'))
+        self.assertFalse(self.router.allow_migrate(GAMEPLAY_DB, 'authentication', 'question'))
+        self.assertFalse(self.router.allow_migrate(GAMEPLAY_DB, 'auth', 'permission'))
+        self.assertTrue(self.router.allow_migrate('default', 'authentication', 'question'))
+
+
+class GameplayCascadeTests(TestCase):
+    """Deletes still cascade now that user links are DO_NOTHING + signals"""
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='cascade', password='secret123')
+        self.session = GameSession.objects.create(user=self.user, session_token='cascade-token', finished=True)
+        LevelProgress.objects.create(session=self.session, level_number=0, question_category='Test', difficulty='easy')
+        Leaderboard.objects.create(
+            user=self.user, session=self.session, final_score=50, total_time=60,
+            rank_achieved='', accuracy=100, speed_score=100,
+        )
+        achievement = Achievement.objects.create(name='Cascade', description='', icon='*')
+        self.unlocked = UserAchievement.objects.create(user=self.user, achievement=achievement, session=self.session)
+
+    def test_user_delete_removes_gameplay_rows(self):
+        self.user.delete()
+        self.assertFalse(GameSession.objects.exists())
+        self.assertFalse(LevelProgress.objects.exists())
+        self.assertFalse(Leaderboard.objects.exists())
+        self.assertFalse(UserAchievement.objects.exists())
+
+    def test_session_delete_keeps_achievement(self):
+        self.session.delete()
+        self.unlocked.refresh_from_db()
+        self.assertIsNone(self.unlocked.session_id)
+        self.assertFalse(LevelProgress.objects.exists())
+
+
+@skipUnless(getattr(settings, 'SPLIT_GAMEPLAY_DB', False), 'TREASURE_HUNT_SPLIT_DB is not enabled')
+class SplitDatabaseIntegrationTests(TestCase):
+    """Run with TREASURE_HUNT_SPLIT_DB=1 python manage.py test authentication"""
+    databases = '__all__'
+
+    def test_gameplay_rows_written_to_gameplay_db(self):
+        user = User.objects.create_user(username='split', password='secret123')
+        session = GameSession.objects.create(user=user, session_token='split-token')
+        self.assertEqual(session._state.db, GAMEPLAY_DB)
+        self.assertEqual(GameSession.objects.using(GAMEPLAY_DB).count(), 1)
+        self.assertEqual(User.objects.using('default').count(), 1)
+        self.assertEqual(session.user.username, 'split')
+
+    def test_admin_changelists_render(self):
+        admin = User.objects.create_superuser(username='boss', password='secret123')
+        session = GameSession.objects.create(user=admin, session_token='admin-token')
+        LevelProgress.objects.create(session=session, level_number=0, question_category='Test', difficulty='easy')
+        self.client.force_login(admin)
+        for url in ('gamesession', 'levelprogress', 'leaderboard', 'userachievement'):
+            response = self.client.get(f'/admin/authentication/{url}/', {'q': 'boss'})
+            self.assertEqual(response.status_code, 200, url)
@@ -0,0 +1,200 @@
+"""
+Tests for the token-bucket throttles and the concurrency limiter
+"""
+import asyncio
+import threading
+from unittest import mock
+
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+
+from authentication.idempotency import clear_idempotency_cache
+from authentication.models import GameSession, User
+from authentication.throttling import TokenBucket, TokenBucketThrottle, reset_throttles
+from authentication.write_behind import progress_buffer
+from treasure_hunt_backend import concurrency, metrics
+from treasure_hunt_backend.asgi import ASGI_URLCONF
+from treasure_hunt_backend.concurrency import ConcurrencyLimiter
+
+LOGIN_URL = '/api/auth/login/'
+SAVE_URL = '/api/auth/game/level/'
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_burst_then_refill(self):
+        bucket = TokenBucket(3, now=0)
+        self.assertEqual([bucket.take(3, 0.5, now=0) for _ in range(3)], [0, 0, 0])
+        self.assertEqual(bucket.take(3, 0.5, now=0), 2.0)  # next token in 1 / 0.5 s
+        self.assertEqual(bucket.take(3, 0.5, now=1), 1.0)
+        self.assertEqual(bucket.take(3, 0.5, now=2), 0)
+        # Never refills past capacity
+        self.assertEqual([bucket.take(3, 0.5, now=100) for _ in range(4)], [0, 0, 0, 2.0])
+
+
+@override_settings(PROGRESS_WRITE_BEHIND=False, PROGRESS_FLUSH_INTERVAL_MS=0)
+class ThrottleTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='hasty', password='secret123')
+        GameSession.objects.create(user=cls.user, session_token='hasty')
+        cls.key = Token.objects.create(user=cls.user).key
+
+    def setUp(self):
+        for cleanup in (reset_throttles, clear_idempotency_cache, metrics.registry.clear):
+            cleanup()
+            self.addCleanup(cleanup)
+        rates = mock.patch.dict(api_settings.DEFAULT_THROTTLE_RATES, {
+            'login': '2/min', 'login_address': '4/min', 'save_level': '3/min',
+        })
+        rates.start()
+        self.addCleanup(rates.stop)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.key}')
+
+    def tearDown(self):
+        progress_buffer.stop()
+        progress_buffer.clear()
+
+    def login(self, username, password='wrong', address='10.0.0.1'):
+        return APIClient().post(LOGIN_URL, {'username': username, 'password': password}, format='json',
+                                REMOTE_ADDR=address)
+
+    def test_login_is_throttled_per_username_and_address(self):
+        self.assertEqual([self.login('hasty').status_code for _ in range(2)], [401, 401])
+        response = self.login('Hasty', 'secret123')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')  # one token per 30 s at 2/min
+        # Another account from the same address is unaffected
+        self.assertEqual(self.login('someone-else').status_code, 401)
+
+    def test_victim_still_logs_in_while_another_client_is_throttled_on_their_name(self):
+        for _ in range(3):
+            self.login('hasty', address='203.0.113.9')
+        self.assertEqual(self.login('hasty', address='203.0.113.9').status_code, 429)
+        self.assertEqual(self.login('hasty', 'secret123', address='10.0.0.7').status_code, 200)
+
+    def test_login_attempts_per_address_are_capped_across_usernames(self):
+        statuses = [self.login(f'guess{i}').status_code for i in range(5)]
+        self.assertEqual(statuses, [401, 401, 401, 401, 429])
+        self.assertEqual(self.login('hasty', 'secret123', address='10.0.0.2').status_code, 200)
+
+    def test_save_level_is_throttled_per_user(self):
+        statuses = [self.client.post(SAVE_URL, {'level': level}, format='json').status_code for level in range(1, 5)]
+        self.assertEqual(statuses, [201, 201, 201, 429])
+        with mock.patch.object(TokenBucketThrottle, 'timer', mock.Mock(return_value=10 ** 6)):
+            self.assertEqual(self.client.post(SAVE_URL, {'level': 5}, format='json').status_code, 201)
+
+    def test_unset_rate_turns_the_scope_off(self):
+        api_settings.DEFAULT_THROTTLE_RATES['login'] = None
+        self.assertEqual({self.login('hasty').status_code for _ in range(4)}, {401})
+
+    @override_settings(ROOT_URLCONF=ASGI_URLCONF)
+    async def test_async_save_level_shares_the_bucket(self):
+        headers = {'Authorization': f'Token {self.key}'}
+        client = AsyncClient()
+        statuses = [(await client.post(SAVE_URL, {'level': level}, content_type='application/json',
+                                       headers=headers)).status_code for level in range(1, 4)]
+        self.assertEqual(statuses, [201, 201, 201])
+        response = await client.post(SAVE_URL, {'level': 4}, content_type='application/json', headers=headers)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('throttled', response.json()['detail'])
+        self.assertEqual(response['Retry-After'], '20')
+
+    def test_throttled_requests_are_counted(self):
+        for _ in range(3):
+            self.login('hasty')
+        self.assertIn('treasure_hunt_shed_requests_total{reason="throttled",scope="login"} 1',
+                      metrics.registry.render())
+
+
+class ConcurrencyLimiterTests(SimpleTestCase):
+    def test_admits_up_to_the_limit_then_queues_then_sheds(self):
+        limiter = ConcurrencyLimiter(limit=1, queue_size=1)
+        self.assertTrue(limiter.acquire(timeout=0))
+        admitted = []
+        waiter = threading.Thread(target=lambda: admitted.append(limiter.acquire(timeout=5)))
+        waiter.start()
+        while not limiter.queued:
+            pass
+        self.assertFalse(limiter.acquire(timeout=5))  # queue full: shed without waiting
+        limiter.release()  # hands the slot to the waiter
+        waiter.join()
+        self.assertEqual((admitted, limiter.active, limiter.queued), ([True], 1, 0))
+        limiter.release()
+        self.assertEqual(limiter.active, 0)
+
+    def test_waiter_times_out(self):
+        limiter = ConcurrencyLimiter(limit=1, queue_size=5)
+        limiter.acquire(timeout=0)
+        self.assertFalse(limiter.acquire(timeout=0.01))
+        self.assertEqual((limiter.active, limiter.queued), (1, 0))
+
+    def test_async_waiters_are_served_in_order(self):
+        limiter = ConcurrencyLimiter(limit=1, queue_size=5)
+        order = []
+
+        async def request(name):
+            self.assertTrue(await limiter.aacquire(timeout=5))
+            order.append(name)
+            await asyncio.sleep(0)
+            limiter.release()
+
+        async def main():
+            self.assertTrue(await limiter.aacquire(timeout=0))
+            tasks = [asyncio.create_task(request(name)) for name in 'abc']
+            await asyncio.sleep(0)
+            self.assertEqual(limiter.queued, 3)
+            limiter.release()
+            await asyncio.gather(*tasks)
+
+        asyncio.run(main())
+        self.assertEqual((order, limiter.active), (list('abc'), 0))
+
+    def test_cancelled_waiter_passes_its_slot_on(self):
+        limiter = ConcurrencyLimiter(limit=1, queue_size=5)
+
+        async def main():
+            await limiter.aacquire(timeout=0)
+            task = asyncio.create_task(limiter.aacquire(timeout=5))
+            await asyncio.sleep(0)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            self.assertEqual(limiter.queued, 0)
+            limiter.release()
+
+        asyncio.run(main())
+        self.assertEqual(limiter.active, 0)
+
+
+@override_settings(MAX_CONCURRENT_REQUESTS=1)  # the middleware only loads with a limit
+class LoadSheddingTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        metrics.registry.clear()
+        self.addCleanup(metrics.registry.clear)
+        patcher = mock.patch.object(concurrency, 'limiter', ConcurrencyLimiter(limit=0, queue_size=0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_saturated_limiter_sheds_with_retry_after(self):
+        response = self.client.get('/api/auth/questions/public/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '2')
+        self.assertFalse(response.json()['success'])
+
+        scrape = self.client.get('/metrics').content.decode()
+        self.assertIn('treasure_hunt_shed_requests_total{reason="overloaded",scope="global"} 1', scrape)
+        self.assertIn('treasure_hunt_requests_in_flight 0', scrape)
+
+    def test_probes_bypass_the_limiter(self):
+        self.assertEqual(self.client.get('/healthz').status_code, 200)
+
+    @override_settings(ROOT_URLCONF=ASGI_URLCONF)
+    async def test_async_requests_are_shed_too(self):
+        response = await AsyncClient().get('/api/auth/questions/public/')
+        self.assertEqual(response.status_code, 503)
@@ -0,0 +1,88 @@
+"""
+Tests for the in-process TTL/LRU cache and the cached token authentication
+"""
+from django.test import SimpleTestCase, TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from authentication.authentication import clear_token_cache
+from authentication.caching import TTLCache
+from authentication.models import User
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TTLCacheTests(SimpleTestCase):
+
+    def test_entries_expire_after_ttl(self):
+        timer = FakeTimer()
+        cache = TTLCache(maxsize=10, ttl=5, timer=timer)
+        cache.set('a', 1)
+        timer.now = 4.9
+        self.assertEqual(cache.get('a'), 1)
+        timer.now = 5.0
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_least_recently_used_entry_evicted(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    url = '/api/auth/profile/'
+
+    def setUp(self):
+        clear_token_cache()
+        self.user = User.objects.create_user(username='cached', password='secret123')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_repeat_requests_skip_token_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_logout_invalidates_token(self):
+        self.client.get(self.url)
+        self.assertEqual(self.client.post('/api/auth/logout/').status_code, 200)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_deactivation_invalidates_user(self):
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_password_change_invalidates_user(self):
+        self.client.get(self.url)
+        self.user.set_password('another-secret')
+        self.user.save()
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+    def test_profile_reflects_saved_stats(self):
+        self.client.get(self.url)
+        self.user.total_score = 99
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).data['user']['total_score'], 99)
+
+    def test_requests_get_independent_user_instances(self):
+        self.client.get(self.url)
+        first = self.client.get(self.url).wsgi_request.user
+        second = self.client.get(self.url).wsgi_request.user
+        self.assertIsNot(first, second)
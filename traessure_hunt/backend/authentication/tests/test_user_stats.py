@@ -0,0 +1,87 @@
+"""
+Tests for the atomic user stat updates applied when a game finishes
+"""
+import threading
+
+from django.db import connections
+from django.test import TestCase, TransactionTestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from authentication.models import GameSession, User
+
+
+def authenticated_client(user):
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+class FinishGameStatsTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='finisher', password='secret123', best_streak=4)
+        self.session = GameSession.objects.create(user=self.user, session_token='finish', score=30, max_streak=2)
+        self.client = authenticated_client(self.user)
+
+    def test_finishing_session_credits_user(self):
+        response = self.client.put(f'/api/auth/game/session/{self.session.id}/', {'finished': True}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.total_score, self.user.games_played, self.user.best_streak), (30, 1, 4))
+        self.session.refresh_from_db()
+        self.assertIsNotNone(self.session.completed_at)
+
+    def test_best_streak_keeps_the_maximum(self):
+        self.session.max_streak = 6
+        self.session.save()
+        self.client.post('/api/auth/game/mark_completed/')
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.best_streak, 6)
+        self.session.refresh_from_db()
+        self.assertTrue(self.session.game_completed_permanently)
+
+    def test_profile_sees_updated_stats(self):
+        self.client.get('/api/auth/profile/')
+        self.client.post('/api/auth/game/mark_completed/')
+        profile = self.client.get('/api/auth/profile/').data['user']
+        self.assertEqual(profile['total_score'], 30)
+
+
+class ConcurrentStatsStressTests(TransactionTestCase):
+    """Overlapping finish requests must not lose each other's increments"""
+    databases = '__all__'
+    threads = 8
+    finishes_per_thread = 10
+
+    def test_no_increments_lost(self):
+        user = User.objects.create_user(username='racer', password='secret123')
+        session = GameSession.objects.create(user=user, session_token='race', score=5)
+        url = f'/api/auth/game/session/{session.id}/'
+        start = threading.Barrier(self.threads)
+        failures = []
+
+        def finish_repeatedly():
+            client = authenticated_client(user)
+            try:
+                start.wait()
+                for _ in range(self.finishes_per_thread):
+                    response = client.put(url, {'finished': True}, format='json')
+                    if response.status_code != 200:
+                        failures.append(response.status_code)
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=finish_repeatedly) for _ in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(failures, [])
+        user.refresh_from_db()
+        total = self.threads * self.finishes_per_thread
+        self.assertEqual(user.games_played, total)
+        self.assertEqual(user.total_score, total * 5)
@@ -0,0 +1,117 @@
+"""
+Tests for server-side answer verification
+"""
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+
+from authentication.answers import check_answer, invalidate_answer_index, normalize_answer
+from authentication.models import GameSession, Question, User
+from authentication.throttling import reset_throttles
+
+URL = '/api/auth/game/verify/'
+
+
+class VerifyAnswerTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.question = Question.objects.create(
+            level_number=3, question='?', answer='Package Manager', security_riddle='?', security_key='cd',
+            hint='h', security_hint='sh', category='Linux',
+        )
+        cls.user = User.objects.create_user(username='solver', password='secret123')
+        cls.session = GameSession.objects.create(user=cls.user, session_token='verify', current_level=3)
+
+    def setUp(self):
+        for cleanup in (invalidate_answer_index, reset_throttles):
+            cleanup()
+            self.addCleanup(cleanup)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+
+    def verify(self, answer, phase='riddle', level=3):
+        return self.client.post(URL, {'level': level, 'phase': phase, 'answer': answer}, format='json')
+
+    def test_normalization(self):
+        self.assertEqual(normalize_answer('  Package   MANAGER \n'), 'package manager')
+
+    def test_correct_riddle_answer_marks_session(self):
+        response = self.verify('  package manager ')
+        self.assertTrue(response.data['correct'])
+        self.session.refresh_from_db()
+        self.assertTrue(self.session.riddle_solved)
+
+    def test_wrong_answers_are_counted_per_phase(self):
+        self.assertFalse(self.verify('apt').data['correct'])
+        self.assertFalse(self.verify('ls', phase='security').data['correct'])
+        self.assertFalse(self.verify('ls', phase='security').data['correct'])
+        self.session.refresh_from_db()
+        self.assertEqual((self.session.wrong_attempts, self.session.security_wrong_attempts), (1, 2))
+
+    def test_index_answers_without_queries(self):
+        check_answer(3, 'riddle', 'x')
+        with self.assertNumQueries(0):
+            self.assertTrue(check_answer(3, 'security', 'CD'))
+
+    def test_index_rebuilt_when_question_changes(self):
+        self.assertTrue(check_answer(3, 'riddle', 'package manager'))
+        self.question.answer = 'apt'
+        self.question.save()
+        self.assertTrue(check_answer(3, 'riddle', 'apt'))
+        self.question.is_active = False
+        self.question.save()
+        self.assertIsNone(check_answer(3, 'riddle', 'apt'))
+
+    def test_unknown_level_and_bad_payloads(self):
+        self.assertEqual(self.verify('x', level=99).status_code, 404)
+        self.assertEqual(self.verify('x', phase='bonus').status_code, 400)
+        self.assertEqual(self.client.post(URL, {'level': '3', 'answer': 'x'}, format='json').status_code, 400)
+        self.assertEqual(self.verify('x', level=True).status_code, 400)
+
+    def test_correct_security_key_moves_on_a_level(self):
+        self.assertTrue(self.verify('cd', phase='security').data['correct'])
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.current_level, 4)
+        # Level 3 is behind the session now
+        self.assertEqual(self.verify('cd', phase='security').status_code, 409)
+
+    def test_other_levels_are_rejected_without_revealing_the_answer(self):
+        Question.objects.create(level_number=5, question='?', answer='grep', security_riddle='?', security_key='ls',
+                                hint='h', security_hint='sh', category='Linux')
+        response = self.verify('grep', level=5)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['current_level'], 3)
+        self.assertNotIn('correct', response.data)
+        self.session.refresh_from_db()
+        self.assertEqual((self.session.riddle_solved, self.session.wrong_attempts), (False, 0))
+
+    def test_no_active_session(self):
+        GameSession.objects.filter(pk=self.session.pk).update(is_active=False)
+        self.assertEqual(self.verify('package manager').status_code, 404)
+
+    def test_answer_checks_are_throttled_per_player(self):
+        with mock.patch.dict(api_settings.DEFAULT_THROTTLE_RATES, {'verify_answer': '2/min'}):
+            statuses = [self.verify('apt').status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+
+    def test_public_questions_have_no_answers(self):
+        question = APIClient().get('/api/auth/questions/public/').data['questions'][0]
+        self.assertNotIn('answer', question)
+        self.assertNotIn('security_key', question)
+        self.assertEqual(question['security_riddle'], '?')
+
+    def test_questions_with_answers_are_admin_only(self):
+        admin = User.objects.create_user(username='editor', password='secret123', is_staff=True)
+        staff = APIClient()
+        staff.force_authenticate(admin)
+        for url in ('/api/auth/questions/', '/api/auth/questions/3/'):
+            with self.subTest(url=url):
+                self.assertEqual(APIClient().get(url).status_code, 401)
+                self.assertEqual(self.client.get(url).status_code, 403)
+                self.assertEqual(staff.get(url).status_code, 200)
+        self.assertEqual(staff.get('/api/auth/questions/3/').data['question']['answer'], 'Package Manager')
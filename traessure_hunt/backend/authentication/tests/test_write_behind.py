@@ -0,0 +1,138 @@
+"""
+Tests for the write-behind level progress buffer
+"""
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from authentication.models import GameSession, LevelProgress, LevelStats, Question, User
+from authentication.views import level_progress_data
+from authentication.write_behind import progress_buffer
+
+SAVE_URL = '/api/auth/game/level/'
+
+
+@override_settings(PROGRESS_WRITE_BEHIND=True, PROGRESS_FLUSH_INTERVAL_MS=0,
+                   PROGRESS_FLUSH_BATCH_SIZE=100, PROGRESS_BUFFER_MAX_SIZE=100)
+class WriteBehindTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        Question.objects.create(
+            level_number=0, question='?', answer='a', security_riddle='?', security_key='k',
+            hint='h', security_hint='h', category='Linux', difficulty='easy',
+        )
+        cls.user = User.objects.create_user(username='buffered', password='secret123')
+        cls.session = GameSession.objects.create(user=cls.user, session_token='buffered')
+
+    def setUp(self):
+        progress_buffer.clear()
+        self.addCleanup(progress_buffer.clear)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+
+    def tearDown(self):
+        progress_buffer.stop()
+        progress_buffer.clear()
+
+    def save_level(self, level, **data):
+        return self.client.post(SAVE_URL, dict(data, level=level), format='json')
+
+    def session_progress(self):
+        return self.client.get(f'/api/auth/game/session/{self.session.id}/progress/').data['progress']
+
+    def test_saves_are_buffered_until_flushed(self):
+        response = self.save_level(1, score=10)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['level_progress']['points_earned'], 10)
+        self.assertFalse(LevelProgress.objects.exists())
+
+        self.assertEqual(progress_buffer.flush(), 1)
+        progress = LevelProgress.objects.get()
+        self.assertEqual((progress.level_number, progress.points_earned, progress.difficulty), (0, 10, 'easy'))
+        self.assertEqual(LevelStats.objects.get(level_number=0).attempts, 1)
+
+    def test_later_saves_of_a_level_overwrite_earlier_ones(self):
+        self.save_level(1, score=10, wrong_attempts=3)
+        self.save_level(1, score=25, wrong_attempts=1)
+        self.assertEqual(len(progress_buffer), 1)
+        progress_buffer.flush()
+        progress = LevelProgress.objects.get()
+        self.assertEqual((progress.points_earned, progress.riddle_attempts), (25, 1))
+        stats = LevelStats.objects.get(level_number=0)
+        self.assertEqual((stats.attempts, stats.riddle_attempts_sum), (1, 1))
+
+    def test_flushing_updates_existing_rows_and_stats(self):
+        self.save_level(1, score=10, wrong_attempts=3)
+        progress_buffer.flush()
+        self.save_level(1, score=40, wrong_attempts=0)
+        progress_buffer.flush()
+        self.assertEqual(LevelProgress.objects.get().points_earned, 40)
+        stats = LevelStats.objects.get(level_number=0)
+        self.assertEqual((stats.attempts, stats.riddle_attempts_sum), (1, 0))
+
+    def test_player_reads_see_unflushed_values(self):
+        self.save_level(1, score=10)
+        progress_buffer.flush()
+        flushed_id = LevelProgress.objects.get().id
+        self.save_level(1, score=30)
+        self.save_level(2, score=20)
+
+        progress = self.session_progress()
+        self.assertEqual([(row['level_number'], row['points_earned']) for row in progress], [(0, 30), (1, 20)])
+        self.assertEqual(progress[0]['id'], flushed_id)
+        bootstrap = self.client.get('/api/auth/game/bootstrap/').data['progress']
+        self.assertEqual([row['points_earned'] for row in bootstrap], [30, 20])
+
+    def test_other_players_cannot_read_buffered_progress(self):
+        self.save_level(1, score=10)
+        other = APIClient()
+        other.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=User.objects.create(username="nosy")).key}')
+        response = other.get(f'/api/auth/game/session/{self.session.id}/progress/')
+        self.assertEqual(response.data['progress'], [])
+
+    def test_clearing_progress_discards_buffered_saves(self):
+        self.save_level(1, score=10)
+        self.client.delete(f'/api/auth/game/session/{self.session.id}/progress/clear/')
+        progress_buffer.flush()
+        self.assertFalse(LevelProgress.objects.exists())
+
+    @override_settings(PROGRESS_FLUSH_BATCH_SIZE=2)
+    def test_batch_size_triggers_a_flush(self):
+        self.save_level(1)
+        self.assertFalse(LevelProgress.objects.exists())
+        self.save_level(2)
+        self.assertEqual(LevelProgress.objects.count(), 2)
+        self.assertEqual(len(progress_buffer), 0)
+
+    @override_settings(PROGRESS_BUFFER_MAX_SIZE=1)
+    def test_full_buffer_is_flushed_before_buffering_more(self):
+        self.save_level(1)
+        self.save_level(2)
+        self.assertEqual(LevelProgress.objects.count(), 1)
+        self.assertEqual(len(progress_buffer), 1)
+
+    def test_saves_of_deleted_sessions_are_dropped(self):
+        session = GameSession.objects.create(user=self.user, session_token='gone', is_active=False)
+        progress_buffer.put(session.id, 0, {'question_category': 'Linux', 'difficulty': 'easy'})
+        session.delete()
+        self.assertEqual(progress_buffer.flush(), 0)
+        self.assertFalse(LevelProgress.objects.exists())
+
+    def test_invalid_values_are_rejected_before_buffering(self):
+        response = self.save_level(1, score='abc')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('points_earned', response.data['errors'])
+        self.assertEqual(len(progress_buffer), 0)
+
+    def test_a_bad_entry_does_not_block_the_batch(self):
+        self.save_level(1, score=10)
+        # Bypasses the view's validation, as a value the database rejects would
+        fields = level_progress_data(self.session, 5, None, {'score': 'abc'})
+        del fields['session'], fields['level_number']
+        progress_buffer.put(self.session.id, 5, fields)
+        with self.assertLogs('authentication.write_behind', 'ERROR'):
+            self.assertEqual(progress_buffer.flush(), 1)
+        self.assertEqual(len(progress_buffer), 0)
+        self.assertEqual(list(LevelProgress.objects.values_list('level_number', 'points_earned')), [(0, 10)])
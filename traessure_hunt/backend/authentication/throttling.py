@@ -0,0 +1,137 @@
+"""
+In-memory token-bucket throttles for the bursty gameplay endpoints
+
+Each (scope, caller) pair gets a bucket holding up to N tokens for a rate of
+'N/period' in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']. A request takes one
+token and tokens flow back at N per period, so a caller can burst N requests
+and then keep to the average rate; anything more gets DRF's 429 with a
+Retry-After of the time until the next token.
+
+Buckets live in one process, like the other caches in caching.py, and are
+least-recently-used out past THROTTLE_MAX_BUCKETS per scope. A bucket
+dropped early only gives its caller a full bucket again.
+"""
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from treasure_hunt_backend import metrics
+
+from .caching import TTLCache
+
+
+class TokenBucket:
+    __slots__ = ('tokens', 'updated_at')
+
+    def __init__(self, capacity, now):
+        self.tokens = float(capacity)
+        self.updated_at = now
+
+    def take(self, capacity, refill_per_second, now):
+        """Take a token; returns 0 on success, otherwise seconds until one is available"""
+        self.tokens = min(capacity, self.tokens + (now - self.updated_at) * refill_per_second)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / refill_per_second
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Token bucket per caller for ``scope``: the user id when authenticated,
+    the client address otherwise. A rate of None turns the scope off.
+    """
+    timer = time.monotonic
+    _buckets = None  # per subclass, see __init_subclass__
+    _lock = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # A day is DRF's longest period: any bucket that old is full anyway
+        cls._buckets = TTLCache(maxsize=settings.THROTTLE_MAX_BUCKETS, ttl=86400)
+        cls._lock = threading.Lock()
+
+    def __init__(self):
+        # Read at request time, not import time, so rate changes apply
+        self.THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+        super().__init__()
+        self._wait = None
+
+    def get_cache_key(self, request, view):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return f'user:{user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        refill_per_second = self.num_requests / self.duration
+        now = self.timer()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(self.num_requests, now)
+                self._buckets.set(key, bucket)
+            self._wait = bucket.take(self.num_requests, refill_per_second, now)
+        if self._wait:
+            metrics.registry.record_shed('throttled', self.scope)
+            return False
+        return True
+
+    def wait(self):
+        return self._wait
+
+    @classmethod
+    def reset(cls):
+        cls._buckets.clear()
+
+
+class LoginThrottle(TokenBucketThrottle):
+    """
+    Password checks per username and client address, so one bot can't keep
+    the hasher busy for an account. The address is part of the key so that
+    a client hammering someone else's name only throttles itself: the owner
+    still logs in from their own address.
+    """
+    scope = 'login'
+
+    def get_cache_key(self, request, view):
+        username = request.data.get('username') if hasattr(request, 'data') else None
+        if isinstance(username, str) and username:
+            return f'username:{username.lower()}:ip:{self.get_ident(request)}'
+        return super().get_cache_key(request, view)
+
+
+class LoginAddressThrottle(TokenBucketThrottle):
+    """
+    Login attempts per client address across all usernames, so cycling
+    through names doesn't get around LoginThrottle. Much looser than the
+    per-name rate: at an event, a whole room logs in from one NAT address.
+    """
+    scope = 'login_address'
+
+    def get_cache_key(self, request, view):
+        return f'ip:{self.get_ident(request)}'
+
+
+class SaveLevelThrottle(TokenBucketThrottle):
+    """Level progress saves per player"""
+    scope = 'save_level'
+
+
+class VerifyAnswerThrottle(TokenBucketThrottle):
+    """Answer checks per player, so short security keys can't be brute-forced"""
+    scope = 'verify_answer'
+
+
+def reset_throttles():
+    for throttle in (LoginThrottle, LoginAddressThrottle, SaveLevelThrottle, VerifyAnswerThrottle):
+        throttle.reset()
@@ -5,6 +5,10 @@ from django.urls import path
 from . import views
 
 urlpatterns = [
+    # Waiting Room
+    path('admission/', views.join_waiting_room, name='join_waiting_room'),
+    path('admission/<str:ticket>/', views.get_admission_status, name='admission_status'),
+    
     # Authentication
     path('register/', views.register_user, name='register'),
     path('login/', views.login_user, name='login'),
@@ -14,13 +18,22 @@ urlpatterns = [
     # Game Sessions
     path('game/start/', views.create_game_session, name='start_game'),
     path('game/session/', views.get_active_session, name='active_session'),
+    path('game/bootstrap/', views.bootstrap_game, name='bootstrap_game'),
     path('game/session/<int:session_id>/', views.update_game_session, name='update_session'),
     path('game/session/<int:session_id>/progress/', views.get_session_progress, name='session_progress'),
     path('game/session/<int:session_id>/progress/clear/', views.clear_session_progress, name='clear_session_progress'),
     
     # Level Progress
     path('game/level/', views.save_level_progress, name='save_level'),
+    path('game/verify/', views.verify_answer, name='verify_answer'),
+    path('game/progress/', views.list_level_progress, name='list_level_progress'),
+    path('game/progress/stats/', views.get_level_progress_stats, name='level_progress_stats'),
+    path('game/progress/level-stats/', views.get_level_stats, name='level_stats'),
     path('game/progress/all/', views.get_all_level_progress, name='all_level_progress'),
+    path('game/progress/export/<str:export_format>/', views.export_level_progress, name='export_level_progress'),
+    
+    # Incremental Sync
+    path('changes/', views.get_changes, name='changes'),
     
     # Leaderboard
     path('leaderboard/', views.get_leaderboard, name='leaderboard'),
@@ -32,6 +45,7 @@ urlpatterns = [
     
     # Questions
     path('questions/', views.get_all_questions, name='all_questions'),
+    path('questions/public/', views.get_public_questions, name='public_questions'),
     path('questions/<int:level_number>/', views.get_question_by_level, name='question_by_level'),
     path('questions/create/', views.create_question, name='create_question'),
     path('questions/<int:level_number>/update/', views.update_question, name='update_question'),
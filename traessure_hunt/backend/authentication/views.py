@@ -2,23 +2,230 @@
 REST API Views for Treasure Hunt Authentication & Game Management
 """
 from rest_framework import status, generics, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.contrib.auth import login, logout
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from django.utils import timezone
-from django.db.models import Q
+from django.db import IntegrityError, router, transaction
+from django.db.models import Count, F, Max, Q
+from django.db.models.functions import Greatest
+from contextlib import ExitStack
 import secrets
 
-from .models import User, GameSession, LevelProgress, Achievement, UserAchievement, Leaderboard, Question
+from .admission import admission_body, admission_queue, admission_required, client_ident, waiting_room_enabled
+from .aggregates import get_progress_aggregates
+from .answers import PHASES, check_answer
+from .authentication import invalidate_user
+from .broadcast import leaderboard_feed
+from .changes import changes_since, decode_changes_cursor, encode_changes_cursor, parse_changes_limit
+from .exports import EXPORT_FORMATS, astream, iter_progress_chunks
+from .fast_serializers import (
+    AchievementValuesSerializer, LeaderboardValuesSerializer, LevelProgressValuesSerializer,
+    PublicQuestionValuesSerializer, QuestionValuesSerializer, UserAchievementValuesSerializer,
+)
+from .idempotency import idempotent
+from .level_stats import progress_snapshot, record_level_progress
+from .pagination import decode_cursor, filter_level_progress, parse_page_size, progress_page
+from .throttling import LoginAddressThrottle, LoginThrottle, SaveLevelThrottle, VerifyAnswerThrottle
+from .write_behind import buffered_row, progress_buffer, with_pending_progress, write_behind_enabled
+from .models import User, GameSession, LevelProgress, LevelStats, Achievement, UserAchievement, Leaderboard, Question
 from .serializers import (
     UserSerializer, UserRegistrationSerializer, LoginSerializer,
-    GameSessionSerializer, LevelProgressSerializer, AchievementSerializer,
+    GameSessionSerializer, LevelProgressFieldsSerializer, LevelProgressSerializer, LevelStatsSerializer,
     UserAchievementSerializer, LeaderboardSerializer, QuestionSerializer
 )
 
 
+# ═══════════════════════════════════════════════════════════════════════════════
+# HELPERS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def atomic_for(*models):
+    """
+    transaction.atomic() on every database the given models are written to
+    (one or two, depending on whether the gameplay router is enabled)
+    """
+    stack = ExitStack()
+    for alias in dict.fromkeys(router.db_for_write(model) for model in models):
+        stack.enter_context(transaction.atomic(using=alias))
+    return stack
+
+
+def add_session_to_user_stats(user, session):
+    """
+    Credit a finished session to the player's totals with a single
+    UPDATE ... SET total_score = total_score + ? so overlapping requests
+    can't lose each other's increments
+    """
+    User.objects.filter(pk=user.pk).update(
+        updated_at=timezone.now(),
+        total_score=F('total_score') + session.score,
+        games_played=F('games_played') + 1,
+        best_streak=Greatest('best_streak', session.max_streak),
+    )
+    # queryset.update() sends no post_save and skips auto_now (hence the
+    # explicit updated_at), so drop the cached token user here
+    invalidate_user(user.pk)
+
+
+def start_game_session(user):
+    """
+    Deactivate the player's active session and create a new one in a single
+    transaction (BEGIN IMMEDIATE in the production profile). The partial
+    unique index still rejects a concurrent start that commits in between
+    with IntegrityError.
+    """
+    with atomic_for(GameSession):
+        GameSession.objects.filter(user=user, is_active=True).update(is_active=False, updated_at=timezone.now())
+        return GameSession.objects.create(
+            user=user,
+            session_token=secrets.token_urlsafe(32)
+        )
+
+
+def question_catalogue_version():
+    """
+    Short token that changes whenever an active question is added, edited,
+    deactivated or deleted, so clients only refetch /questions/ when needed
+    """
+    catalogue = Question.objects.filter(is_active=True).aggregate(count=Count('id'), updated=Max('updated_at'))
+    updated = catalogue['updated'].strftime('%Y%m%d%H%M%S%f') if catalogue['updated'] else '0'
+    return f"{catalogue['count']}-{updated}"
+
+
+def level_progress_data(session, level_number, question, data):
+    """Values stored for a completed level, from a save_level_progress body"""
+    return {
+        'session': session.id,
+        'level_number': level_number,
+        'question_category': question.category if question else 'Unknown',
+        'difficulty': question.difficulty if question else 'medium',
+        'points_earned': data.get('score', 0),
+        'bonus_points': 0,  # Calculate based on streak/combo if needed
+        'riddle_attempts': data.get('wrong_attempts', 0),
+        'security_attempts': data.get('security_wrong_attempts', 0),
+        'hint_used': data.get('hints_used', 0) > 0,
+        'security_hint_used': False,  # Track this separately if needed
+        'riddle_solved': True,  # Since we're saving after level completion
+        'level_completed': True,
+        'completed_at': timezone.now(),
+        'time_spent': 0  # Calculate if needed
+    }
+
+
+def store_level_progress(session, level_number, level_progress_data, username):
+    """
+    Buffer (write-behind mode) or upsert a level's progress; returns the
+    status code and body for save_level_progress. Sync only - the async view
+    calls it through sync_to_async.
+    """
+    # Check the values before either path stores them: a bad value in the
+    # write-behind buffer would otherwise fail every later flush
+    values = LevelProgressFieldsSerializer(data=level_progress_data)
+    if not values.is_valid():
+        return status.HTTP_400_BAD_REQUEST, {
+            'success': False,
+            'errors': values.errors
+        }
+    fields = values.validated_data
+    
+    # Write-behind mode: buffer the values and let the flusher write them
+    if write_behind_enabled():
+        if progress_buffer.put(session.id, level_number, fields):
+            row = buffered_row(session.id, username, level_number, fields)
+            leaderboard_feed.publish_level_completed(row)
+            return status.HTTP_202_ACCEPTED, {
+                'success': True,
+                'level_progress': row
+            }
+    
+    # Check if level progress already exists; the progress row and the
+    # LevelStats totals are written in one transaction
+    with transaction.atomic(using=router.db_for_write(LevelProgress)):
+        try:
+            existing_progress = LevelProgress.objects.get(
+                session=session, 
+                level_number=level_number
+            )
+            previous = progress_snapshot(existing_progress)
+            # Update existing progress
+            for key, value in fields.items():
+                setattr(existing_progress, key, value)
+            existing_progress.save()
+            level_progress = existing_progress
+        except LevelProgress.DoesNotExist:
+            previous = None
+            # Create new progress
+            serializer = LevelProgressSerializer(data=level_progress_data)
+            if serializer.is_valid():
+                level_progress = serializer.save()
+                # The serializer loaded its own copy of the session; keep the
+                # one with the user attached so the response doesn't query it
+                level_progress.session = session
+            else:
+                return status.HTTP_400_BAD_REQUEST, {
+                    'success': False,
+                    'errors': serializer.errors
+                }
+        record_level_progress(level_progress, previous)
+        row = LevelProgressSerializer(level_progress).data
+        transaction.on_commit(lambda: leaderboard_feed.publish_level_completed(row),
+                              using=router.db_for_write(LevelProgress))
+    
+    return status.HTTP_201_CREATED, {
+        'success': True,
+        'level_progress': row
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# WAITING ROOM ENDPOINTS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def join_waiting_room(request):
+    """
+    Take a ticket for login and game start (see admission.py)
+    POST /api/auth/admission/
+    """
+    if not waiting_room_enabled():
+        return Response({'success': True, 'ticket': None, 'admitted': True, 'position': 0,
+                         'estimated_wait': 0, 'retry_after': 0})
+    
+    return Response(dict({'success': True}, **admission_body(admission_queue.join(client_ident(request)))),
+                    status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def get_admission_status(request, ticket):
+    """
+    Place in line for a ticket; cheap enough to poll every Retry-After seconds
+    GET /api/auth/admission/<ticket>/
+    """
+    if not waiting_room_enabled():
+        return Response({'success': True, 'ticket': ticket, 'admitted': True, 'position': 0,
+                         'estimated_wait': 0, 'retry_after': 0})
+    
+    admission = admission_queue.check(ticket, client_ident(request))
+    if admission is None:
+        return Response({
+            'success': False,
+            'message': 'Ticket not found or expired'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    body = admission_body(admission)
+    return Response(dict({'success': True}, **body),
+                    headers={'Retry-After': str(body['retry_after'])} if body['retry_after'] else None)
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # AUTHENTICATION ENDPOINTS
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -50,13 +257,15 @@ def register_user(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([LoginAddressThrottle, LoginThrottle])
+@admission_required
 def login_user(request):
     """
     Login user and return authentication token
     POST /api/auth/login/
     Body: {"username": "...", "password": "..."}
     """
-    serializer = LoginSerializer(data=request.data)
+    serializer = LoginSerializer(data=request.data, context={'request': request})
     if serializer.is_valid():
         user = serializer.validated_data['user']
         token, _ = Token.objects.get_or_create(user=user)
@@ -119,19 +328,29 @@ def get_user_profile(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@admission_required
 def create_game_session(request):
     """
     Create a new game session for the user
     POST /api/auth/game/start/
     """
-    # Deactivate any existing active sessions
-    GameSession.objects.filter(user=request.user, is_active=True).update(is_active=False)
-    
-    # Create new session
-    session = GameSession.objects.create(
-        user=request.user,
-        session_token=secrets.token_urlsafe(32)
-    )
+    try:
+        session = start_game_session(request.user)
+    except IntegrityError:
+        # A concurrent start for this player (double click, retry) committed
+        # its session between our two statements; answer with that one
+        try:
+            session = GameSession.objects.get(user=request.user, is_active=True)
+        except GameSession.DoesNotExist:
+            # ...and it was already replaced in turn; start afresh once more
+            session = start_game_session(request.user)
+        else:
+            session.user = request.user
+            return Response({
+                'success': True,
+                'message': 'Game session already started',
+                'session': GameSessionSerializer(session).data
+            })
     
     return Response({
         'success': True,
@@ -149,6 +368,8 @@ def get_active_session(request):
     """
     try:
         session = GameSession.objects.get(user=request.user, is_active=True)
+        # The serializer reads session.user.username; don't let it query
+        session.user = request.user
         return Response({
             'success': True,
             'session': GameSessionSerializer(session).data
@@ -160,8 +381,39 @@ def get_active_session(request):
         }, status=status.HTTP_404_NOT_FOUND)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def bootstrap_game(request):
+    """
+    Everything a client needs to resume a game, in one round trip: profile,
+    active session, its level progress, unlocked achievements and the
+    question catalogue version
+    GET /api/auth/game/bootstrap/
+    """
+    # Through the related manager so session.user is the request user without
+    # a query; progress rows come back with session already attached
+    session = (
+        request.user.game_sessions.filter(is_active=True)
+        .prefetch_related('level_progress')
+        .first()
+    )
+    achievements = UserAchievement.objects.filter(user=request.user).select_related('achievement')
+    
+    return Response({
+        'success': True,
+        'user': UserSerializer(request.user).data,
+        'session': GameSessionSerializer(session).data if session else None,
+        'progress': with_pending_progress(
+            LevelProgressSerializer(session.level_progress.all(), many=True).data, session.id, request.user.username
+        ) if session else [],
+        'achievements': UserAchievementSerializer(achievements, many=True).data,
+        'questions_version': question_catalogue_version(),
+    })
+
+
 @api_view(['PUT'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def update_game_session(request, session_id):
     """
     Update game session progress
@@ -172,18 +424,13 @@ def update_game_session(request, session_id):
         serializer = GameSessionSerializer(session, data=request.data, partial=True)
         
         if serializer.is_valid():
-            serializer.save()
-            
-            # If game is finished, update user stats
+            # If game is finished, save it and update user stats together
             if request.data.get('finished'):
-                session.completed_at = timezone.now()
-                session.save()
-                
-                user = request.user
-                user.total_score += session.score
-                user.games_played += 1
-                user.best_streak = max(user.best_streak, session.max_streak)
-                user.save()
+                with atomic_for(GameSession, User):
+                    serializer.save(completed_at=timezone.now())
+                    add_session_to_user_stats(request.user, session)
+            else:
+                serializer.save()
             
             return Response({
                 'success': True,
@@ -208,6 +455,8 @@ def update_game_session(request, session_id):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([SaveLevelThrottle])
+@idempotent
 def save_level_progress(request):
     """
     Save progress for a specific level
@@ -223,53 +472,14 @@ def save_level_progress(request):
             level_number -= 1
         
         # Get question details if available
-        questions = Question.objects.filter(level_number=level_number, is_active=True)
-        question = questions.first() if questions.exists() else None
+        question = Question.objects.filter(level_number=level_number, is_active=True).first()
+        session.user = request.user
         
-        # Create or update level progress
-        level_progress_data = {
-            'session': session.id,
-            'level_number': level_number,
-            'question_category': question.category if question else 'Unknown',
-            'difficulty': question.difficulty if question else 'medium',
-            'points_earned': request.data.get('score', 0),
-            'bonus_points': 0,  # Calculate based on streak/combo if needed
-            'riddle_attempts': request.data.get('wrong_attempts', 0),
-            'security_attempts': request.data.get('security_wrong_attempts', 0),
-            'hint_used': request.data.get('hints_used', 0) > 0,
-            'security_hint_used': False,  # Track this separately if needed
-            'riddle_solved': True,  # Since we're saving after level completion
-            'level_completed': True,
-            'completed_at': timezone.now(),
-            'time_spent': 0  # Calculate if needed
-        }
-        
-        # Check if level progress already exists
-        try:
-            existing_progress = LevelProgress.objects.get(
-                session=session, 
-                level_number=level_number
-            )
-            # Update existing progress
-            for key, value in level_progress_data.items():
-                setattr(existing_progress, key, value)
-            existing_progress.save()
-            level_progress = existing_progress
-        except LevelProgress.DoesNotExist:
-            # Create new progress
-            serializer = LevelProgressSerializer(data=level_progress_data)
-            if serializer.is_valid():
-                level_progress = serializer.save()
-            else:
-                return Response({
-                    'success': False,
-                    'errors': serializer.errors
-                }, status=status.HTTP_400_BAD_REQUEST)
-        
-        return Response({
-            'success': True,
-            'level_progress': LevelProgressSerializer(level_progress).data
-        }, status=status.HTTP_201_CREATED)
+        status_code, body = store_level_progress(
+            session, level_number, level_progress_data(session, level_number, question, request.data),
+            request.user.username,
+        )
+        return Response(body, status=status_code)
         
     except GameSession.DoesNotExist:
         return Response({
@@ -283,6 +493,69 @@ def save_level_progress(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([VerifyAnswerThrottle])
+def verify_answer(request):
+    """
+    Check a riddle answer or security key for the current level of the
+    player's active session and record the attempt; a correct security key
+    moves the session on to the next level
+    POST /api/auth/game/verify/  {"level": 0, "phase": "riddle"|"security", "answer": "..."}
+    """
+    level_number = request.data.get('level')
+    phase = request.data.get('phase', 'riddle')
+    answer = request.data.get('answer')
+    # bool is an int subclass: 'level': true would pass as level 1
+    if isinstance(level_number, bool) or not isinstance(level_number, int) or phase not in PHASES \
+            or not isinstance(answer, str):
+        return Response({
+            'success': False,
+            'message': f"Expected an integer 'level', 'phase' in {', '.join(PHASES)} and a string 'answer'"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    correct = check_answer(level_number, phase, answer)
+    if correct is None:
+        return Response({
+            'success': False,
+            'message': 'Question not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    # Same counters the client keeps; one UPDATE on the (user, is_active) index
+    if correct and phase == 'riddle':
+        attempt = {'riddle_solved': True, 'wrong_attempts': 0}
+    elif correct:
+        attempt = {'riddle_solved': False, 'security_wrong_attempts': 0, 'current_level': F('current_level') + 1}
+    elif phase == 'riddle':
+        attempt = {'wrong_attempts': F('wrong_attempts') + 1}
+    else:
+        attempt = {'security_wrong_attempts': F('security_wrong_attempts') + 1}
+    # Only answers for the level the session is on count, so other levels'
+    # keys can't be tried; the result isn't revealed unless the attempt was recorded
+    recorded = GameSession.objects.filter(
+        user=request.user, is_active=True, current_level=level_number
+    ).update(updated_at=timezone.now(), **attempt)
+    if not recorded:
+        session = GameSession.objects.filter(user=request.user, is_active=True).only('current_level').first()
+        if session is None:
+            return Response({
+                'success': False,
+                'message': 'No active game session found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            'success': False,
+            'message': f'Level {level_number} is not the current level of this session',
+            'current_level': session.current_level
+        }, status=status.HTTP_409_CONFLICT)
+    
+    return Response({
+        'success': True,
+        'correct': correct,
+        'level': level_number,
+        'phase': phase
+    })
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_session_progress(request, session_id):
@@ -291,11 +564,16 @@ def get_session_progress(request, session_id):
     GET /api/auth/game/session/<id>/progress/
     """
     levels = LevelProgress.objects.filter(session_id=session_id, session__user=request.user)
-    serializer = LevelProgressSerializer(levels, many=True)
+    progress = LevelProgressValuesSerializer(levels).data
+    # Unflushed write-behind saves, once the session is known to be the user's
+    if progress_buffer.pending_for_session(session_id) and (
+        progress or GameSession.objects.filter(id=session_id, user=request.user).exists()
+    ):
+        progress = with_pending_progress(progress, session_id, request.user.username)
     
     return Response({
         'success': True,
-        'progress': serializer.data
+        'progress': progress
     })
 
 
@@ -309,7 +587,8 @@ def clear_session_progress(request, session_id):
     try:
         # Verify session belongs to user
         session = GameSession.objects.get(id=session_id, user=request.user)
-        # Delete all level progress for this session
+        # Delete all level progress for this session, buffered saves first
+        progress_buffer.discard_session(session.id)
         LevelProgress.objects.filter(session=session).delete()
         
         return Response({
@@ -339,7 +618,8 @@ def get_all_level_progress(request):
         }, status=status.HTTP_403_FORBIDDEN)
     
     # Get all level progress data
-    all_progress = LevelProgress.objects.select_related('session__user').all()
+    # prefetch (not select) the users: they may live in another database
+    all_progress = LevelProgress.objects.select_related('session').prefetch_related('session__user')
     serializer = LevelProgressSerializer(all_progress, many=True)
     
     return Response({
@@ -348,6 +628,144 @@ def get_all_level_progress(request):
     })
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def list_level_progress(request):
+    """
+    One page of level progress for the admin dashboard, newest first
+    GET /api/auth/game/progress/?level=3&username=al&difficulty=easy
+        &completed_from=2024-09-01&completed_to=2024-09-30&limit=100&cursor=<next_cursor>
+    """
+    # Only admins can access this
+    if not request.user.is_staff:
+        return Response({
+            'success': False,
+            'message': 'Admin access required'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        queryset = filter_level_progress(request.GET)
+        page_size = parse_page_size(request.GET.get('limit'))
+        cursor = decode_cursor(request.GET.get('cursor'))
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    rows, next_cursor = progress_page(queryset, cursor, page_size)
+    
+    return Response({
+        'success': True,
+        'progress': rows,
+        'next_cursor': next_cursor,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_level_progress_stats(request):
+    """
+    Per-level funnel, per-difficulty and overall level progress aggregates
+    GET /api/auth/game/progress/stats/
+    """
+    # Only admins can access this
+    if not request.user.is_staff:
+        return Response({
+            'success': False,
+            'message': 'Admin access required'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    return Response({'success': True, **get_progress_aggregates()})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_level_stats(request):
+    """
+    Running per-level and per-difficulty totals from the LevelStats table
+    GET /api/auth/game/progress/level-stats/
+    """
+    # Only admins can access this
+    if not request.user.is_staff:
+        return Response({
+            'success': False,
+            'message': 'Admin access required'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    serializer = LevelStatsSerializer(LevelStats.objects.all(), many=True)
+    
+    return Response({
+        'success': True,
+        'level_stats': serializer.data
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_level_progress(request, export_format):
+    """
+    Stream all level progress for the admin dashboard as NDJSON or CSV
+    GET /api/auth/game/progress/export/<ndjson|csv>/
+    """
+    # Only admins can access this
+    if not request.user.is_staff:
+        return Response({
+            'success': False,
+            'message': 'Admin access required'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    if export_format not in EXPORT_FORMATS:
+        return Response({
+            'success': False,
+            'message': f"Unknown export format '{export_format}', use one of: {', '.join(EXPORT_FORMATS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    stream, content_type = EXPORT_FORMATS[export_format]
+    body = stream(iter_progress_chunks())
+    if isinstance(request._request, ASGIRequest):
+        # A sync body would be collected into one list before sending
+        body = astream(body)
+    response = StreamingHttpResponse(body, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="level_progress.{export_format}"'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_changes(request):
+    """
+    Users, sessions, level progress and leaderboard rows changed or deleted
+    since a cursor, for incremental sync
+    GET /api/auth/changes/?since=<cursor>&limit=500
+    """
+    # Only admins can access this
+    if not request.user.is_staff:
+        return Response({
+            'success': False,
+            'message': 'Admin access required'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        positions = decode_changes_cursor(request.GET.get('since'))
+        limit = parse_changes_limit(request.GET.get('limit'))
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    changes, deleted, positions, has_more = changes_since(positions, limit)
+    
+    return Response({
+        'success': True,
+        'changes': changes,
+        'deleted': deleted,
+        'cursor': encode_changes_cursor(positions),
+        'has_more': has_more,
+    })
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # LEADERBOARD ENDPOINTS
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -361,7 +779,7 @@ def get_leaderboard(request):
     """
     limit = int(request.GET.get('limit', 10))
     leaderboard = Leaderboard.objects.all()[:limit]
-    serializer = LeaderboardSerializer(leaderboard, many=True)
+    serializer = LeaderboardValuesSerializer(leaderboard)
     
     return Response({
         'success': True,
@@ -371,6 +789,7 @@ def get_leaderboard(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def submit_to_leaderboard(request):
     """
     Submit completed game to leaderboard
@@ -390,11 +809,15 @@ def submit_to_leaderboard(request):
             accuracy=request.data.get('accuracy', 0),
             speed_score=request.data.get('speed_score', 0)
         )
+        entry = LeaderboardSerializer(leaderboard_entry).data
+        # Live leaderboard watchers (GET /api/auth/stream/leaderboard/)
+        transaction.on_commit(lambda: leaderboard_feed.publish_leaderboard_entry(entry),
+                              using=router.db_for_write(Leaderboard))
         
         return Response({
             'success': True,
             'message': 'Score submitted to leaderboard',
-            'entry': LeaderboardSerializer(leaderboard_entry).data
+            'entry': entry
         }, status=status.HTTP_201_CREATED)
         
     except GameSession.DoesNotExist:
@@ -416,7 +839,7 @@ def get_user_achievements(request):
     GET /api/auth/achievements/
     """
     achievements = UserAchievement.objects.filter(user=request.user)
-    serializer = UserAchievementSerializer(achievements, many=True)
+    serializer = UserAchievementValuesSerializer(achievements)
     
     return Response({
         'success': True,
@@ -432,7 +855,7 @@ def list_all_achievements(request):
     GET /api/auth/achievements/all/
     """
     achievements = Achievement.objects.all()
-    serializer = AchievementSerializer(achievements, many=True)
+    serializer = AchievementValuesSerializer(achievements)
     
     return Response({
         'success': True,
@@ -445,29 +868,60 @@ def list_all_achievements(request):
 # ═══════════════════════════════════════════════════════════════════════════════
 
 @api_view(['GET'])
-@permission_classes([AllowAny])
+@permission_classes([IsAuthenticated])
 def get_all_questions(request):
     """
-    Get all active questions
+    Get all active questions with their answers and security keys, for the
+    admin dashboard; players use /questions/public/
     GET /api/auth/questions/
     """
+    if not request.user.is_staff:
+        return Response({
+            'success': False,
+            'message': 'Admin access required'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
     questions = Question.objects.filter(is_active=True).order_by('level_number')
-    serializer = QuestionSerializer(questions, many=True)
+    data = QuestionValuesSerializer(questions).data
     
     return Response({
         'success': True,
-        'count': questions.count(),
-        'questions': serializer.data
+        'count': len(data),
+        'questions': data
     })
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+def get_public_questions(request):
+    """
+    Get all active questions without answers or security keys, for clients
+    that check answers through /game/verify/
+    GET /api/auth/questions/public/
+    """
+    questions = Question.objects.filter(is_active=True).order_by('level_number')
+    data = PublicQuestionValuesSerializer(questions).data
+    
+    return Response({
+        'success': True,
+        'count': len(data),
+        'questions': data
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
 def get_question_by_level(request, level_number):
     """
-    Get a specific question by level number
+    Get a specific question by level number, answers included (admin only)
     GET /api/auth/questions/<level_number>/
     """
+    if not request.user.is_staff:
+        return Response({
+            'success': False,
+            'message': 'Admin access required'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
     try:
         question = Question.objects.get(level_number=level_number, is_active=True)
         serializer = QuestionSerializer(question)
@@ -584,6 +1038,7 @@ def delete_question(request, level_number):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def mark_game_completed_permanently(request):
     """
     Mark game as completed permanently to prevent replay
@@ -594,14 +1049,11 @@ def mark_game_completed_permanently(request):
         session.game_completed_permanently = True
         session.finished = True
         session.completed_at = timezone.now()
-        session.save()
         
-        # Update user stats
-        user = request.user
-        user.total_score += session.score
-        user.games_played += 1
-        user.best_streak = max(user.best_streak, session.max_streak)
-        user.save()
+        with atomic_for(GameSession, User):
+            session.save(update_fields=['game_completed_permanently', 'finished', 'completed_at', 'updated_at'])
+            # Update user stats
+            add_session_to_user_stats(request.user, session)
         
         return Response({
             'success': True,
@@ -0,0 +1,261 @@
+"""
+Write-behind buffer for level progress autosaves
+
+Opt in with settings.PROGRESS_WRITE_BEHIND. save_level_progress then stores the
+row's values in a bounded in-memory buffer keyed by (session id, level number)
+instead of writing them; a later save of the same level replaces the buffered
+values. A background thread writes the whole buffer in one transaction every
+PROGRESS_FLUSH_INTERVAL_MS, or as soon as PROGRESS_FLUSH_BATCH_SIZE levels are
+waiting, and once more when the process exits. When PROGRESS_BUFFER_MAX_SIZE
+levels are waiting, the saving request flushes inline before buffering more.
+
+The buffer lives in one process: a player's own progress reads overlay their
+unflushed values (with_pending_progress), but other processes, admin views and
+LevelStats only see progress once it is flushed. Run a single worker process,
+or route each player to the same one, while write-behind is on.
+"""
+import atexit
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DataError, IntegrityError, close_old_connections, router, transaction
+from django.utils import timezone
+
+from .aggregates import invalidate_progress_aggregates
+from .fast_serializers import LevelProgressValuesSerializer, format_datetime
+from .level_stats import progress_snapshot, record_level_progress_batch
+from .models import GameSession, LevelProgress
+
+logger = logging.getLogger(__name__)
+
+# Errors meaning an entry's own values can't be stored, as opposed to the
+# database being unavailable (locked, disk full), which is worth retrying
+REJECTED_VALUE_ERRORS = (TypeError, ValueError, ValidationError, DataError, IntegrityError)
+
+# Bound on ids per IN (...) lookup while flushing
+LOOKUP_CHUNK_SIZE = 500
+
+# Columns a buffered save sets; the row is identified by session and level
+BUFFERED_FIELDS = [
+    field.name for field in LevelProgress._meta.concrete_fields
+    if field.name not in ('id', 'session', 'level_number', 'created_at')
+]
+
+
+def write_behind_enabled():
+    return settings.PROGRESS_WRITE_BEHIND
+
+
+def _chunks(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def write_progress_batch(entries):
+    """
+    Upsert buffered progress in one transaction. ``entries`` is a list of
+    ((session_id, level_number), fields) pairs; LevelStats is updated with the
+    same deltas save_level_progress would have applied row by row. Entries of
+    sessions deleted since they were buffered are dropped.
+    """
+    using = router.db_for_write(LevelProgress)
+    with transaction.atomic(using=using):
+        session_ids = {session_id for (session_id, _), _ in entries}
+        live, existing = set(), {}
+        for chunk in _chunks(session_ids, LOOKUP_CHUNK_SIZE):
+            live.update(GameSession.objects.using(using).filter(id__in=chunk).values_list('id', flat=True))
+            for progress in LevelProgress.objects.using(using).filter(session_id__in=chunk):
+                existing[(progress.session_id, progress.level_number)] = progress
+
+        created, updated, changes = [], [], []
+        # bulk_update() doesn't apply auto_now, so stamp updated rows here
+        now = timezone.now()
+        for (session_id, level_number), fields in entries:
+            if session_id not in live:
+                continue
+            progress = existing.get((session_id, level_number))
+            if progress is None:
+                progress = LevelProgress(session_id=session_id, level_number=level_number, **fields)
+                created.append(progress)
+                changes.append((progress, None))
+            else:
+                previous = progress_snapshot(progress)
+                for name, value in fields.items():
+                    setattr(progress, name, value)
+                progress.updated_at = now
+                updated.append(progress)
+                changes.append((progress, previous))
+
+        LevelProgress.objects.using(using).bulk_create(created)
+        if updated:
+            LevelProgress.objects.using(using).bulk_update(updated, BUFFERED_FIELDS)
+        # bulk writes send no post_save signals
+        record_level_progress_batch(changes)
+    invalidate_progress_aggregates()
+    return len(changes)
+
+
+def write_progress_rows(entries):
+    """
+    Fallback after a failed batch: write ``entries`` one transaction each.
+    Returns the rows written and an OrderedDict of the entries to retry.
+    Entries whose values the database rejects are logged and dropped, so
+    one bad entry can't hold back everyone else's progress.
+    """
+    written, retry = 0, OrderedDict()
+    for key, fields in entries:
+        try:
+            written += write_progress_batch([(key, fields)])
+        except REJECTED_VALUE_ERRORS:
+            logger.exception('Dropping buffered level progress %s with invalid values %r', key, fields)
+        except Exception:
+            retry[key] = fields
+    return written, retry
+
+
+class ProgressBuffer:
+    """
+    Last-write-wins buffer of level progress keyed by (session id, level
+    number). Thread-safe; the flusher thread starts on the first put().
+    """
+
+    def __init__(self):
+        self._pending = OrderedDict()
+        # Entries being written by the current flush, still visible to readers
+        self._flushing = {}
+        self._lock = threading.Lock()
+        # Serialises flushes, so a newer value is never overwritten by an older one
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    def put(self, session_id, level_number, fields):
+        """
+        Buffer a level's values. Returns False when the buffer is full and
+        could not be flushed, in which case the caller should write directly.
+        """
+        key = (session_id, level_number)
+        with self._lock:
+            full = key not in self._pending and len(self._pending) >= settings.PROGRESS_BUFFER_MAX_SIZE
+        if full:
+            self.flush()
+        with self._lock:
+            if key not in self._pending and len(self._pending) >= settings.PROGRESS_BUFFER_MAX_SIZE:
+                return False
+            self._pending[key] = dict(fields)
+            self._pending.move_to_end(key)
+            batch_ready = len(self._pending) >= settings.PROGRESS_FLUSH_BATCH_SIZE
+        if not self._ensure_flusher():
+            if batch_ready:
+                self.flush()
+        elif batch_ready:
+            self._wake.set()
+        return True
+
+    def pending_for_session(self, session_id):
+        """Unflushed values of a session, as {level_number: fields}"""
+        with self._lock:
+            pending = {
+                level_number: fields
+                for sources in (self._flushing, self._pending)
+                for (owner, level_number), fields in sources.items() if owner == session_id
+            }
+        return pending
+
+    def discard_session(self, session_id):
+        """Drop a session's unflushed values, e.g. before its progress is deleted"""
+        with self._flush_lock, self._lock:
+            for key in [key for key in self._pending if key[0] == session_id]:
+                del self._pending[key]
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of rows written"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                self._flushing, self._pending = self._pending, OrderedDict()
+            try:
+                return write_progress_batch(list(self._flushing.items()))
+            except Exception:
+                logger.exception('Flushing %d buffered level progress rows failed; writing them one by one',
+                                 len(self._flushing))
+                written, retry = write_progress_rows(self._flushing.items())
+                with self._lock:
+                    # Keep them for the next flush, unless a newer value arrived meanwhile
+                    retry.update(self._pending)
+                    self._pending = retry
+                return written
+            finally:
+                with self._lock:
+                    self._flushing = {}
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _ensure_flusher(self):
+        """Start the flusher thread if periodic flushing is configured"""
+        if settings.PROGRESS_FLUSH_INTERVAL_MS <= 0:
+            return False
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._stopping = False
+                    self._thread = threading.Thread(target=self._run, name='progress-flusher', daemon=True)
+                    self._thread.start()
+        return True
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(settings.PROGRESS_FLUSH_INTERVAL_MS / 1000)
+            self._wake.clear()
+            close_old_connections()
+            self.flush()
+
+    def stop(self):
+        """Stop the flusher thread and write whatever is still buffered"""
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._wake.clear()
+        self.flush()
+
+
+progress_buffer = ProgressBuffer()
+atexit.register(progress_buffer.stop)
+
+
+def buffered_row(session_id, username, level_number, fields, progress_id=None):
+    """A buffered level's values with the keys and formats of LevelProgressSerializer"""
+    row = dict(fields, id=progress_id, session=session_id, session_id=session_id, username=username,
+               level_number=level_number, completed_at=format_datetime(fields.get('completed_at')))
+    return {key: row.get(key) for key in LevelProgressValuesSerializer.fields}
+
+
+def with_pending_progress(rows, session_id, username):
+    """
+    Overlay a session's unflushed progress on its serialized progress rows,
+    ordered by level number like the model
+    """
+    pending = progress_buffer.pending_for_session(session_id)
+    if not pending:
+        return rows
+    by_level = {row['level_number']: row for row in rows}
+    for level_number, fields in pending.items():
+        flushed = by_level.get(level_number)
+        by_level[level_number] = buffered_row(
+            session_id, username, level_number, fields, flushed['id'] if flushed else None
+        )
+    return [by_level[level_number] for level_number in sorted(by_level)]
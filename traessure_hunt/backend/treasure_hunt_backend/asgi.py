@@ -1,11 +1,121 @@
 """
 ASGI config for treasure_hunt_backend project.
+
+Requests resolve against asgi_urls.py, which serves the hot gameplay
+endpoints from async views. Those paths go through a lean handler (see
+AsyncAPIHandler); everything else gets Django's usual ASGI handling.
+Run with: python manage.py runasgi
 """
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.exception import convert_exception_to_response
+from django.utils.module_loading import import_string
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'treasure_hunt_backend.settings')
 
-application = get_asgi_application()
+ASGI_URLCONF = 'treasure_hunt_backend.asgi_urls'
+
+
+class AsyncViewsASGIHandler(ASGIHandler):
+    """ASGIHandler whose requests use ASGI_URLCONF instead of ROOT_URLCONF"""
+
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+        if request is not None:
+            request.urlconf = ASGI_URLCONF
+        return request, error_response
+
+
+class AsyncAPIHandler(AsyncViewsASGIHandler):
+    """
+    Handler for the async token-authenticated JSON endpoints.
+
+    Runs settings.ASYNC_API_MIDDLEWARE: each MiddlewareMixin in the chain
+    costs two thread switches per request under ASGI, and these endpoints use
+    no sessions, messages or CSRF. Requests also skip the per-request
+    ThreadSensitiveContext, so the few sync calls they make (async ORM
+    queries, the progress upsert) share one long-lived thread and its
+    persistent database connection instead of connecting from a new thread
+    on every request. SQLite serialises those queries anyway.
+    """
+
+    def load_middleware(self, is_async=False):
+        """
+        BaseHandler.load_middleware() over settings.ASYNC_API_MIDDLEWARE.
+        The base method only reads settings.MIDDLEWARE, and swapping that
+        setting would change it for the whole process while loading.
+        """
+        from django.conf import settings
+
+        self._view_middleware = []
+        self._template_response_middleware = []
+        self._exception_middleware = []
+
+        get_response = self._get_response_async if is_async else self._get_response
+        handler = convert_exception_to_response(get_response)
+        handler_is_async = is_async
+        for middleware_path in reversed(settings.ASYNC_API_MIDDLEWARE):
+            middleware = import_string(middleware_path)
+            middleware_can_sync = getattr(middleware, 'sync_capable', True)
+            middleware_can_async = getattr(middleware, 'async_capable', False)
+            if not middleware_can_sync and not middleware_can_async:
+                raise RuntimeError(f'Middleware {middleware_path} must have at least one of '
+                                   'sync_capable/async_capable set to True.')
+            middleware_is_async = middleware_can_async and (handler_is_async or not middleware_can_sync)
+            try:
+                adapted_handler = self.adapt_method_mode(
+                    middleware_is_async, handler, handler_is_async,
+                    debug=settings.DEBUG, name=f'middleware {middleware_path}',
+                )
+                mw_instance = middleware(adapted_handler)
+            except MiddlewareNotUsed:
+                continue
+            handler = adapted_handler
+            if mw_instance is None:
+                raise ImproperlyConfigured(f'Middleware factory {middleware_path} returned None.')
+
+            if hasattr(mw_instance, 'process_view'):
+                self._view_middleware.insert(0, self.adapt_method_mode(is_async, mw_instance.process_view))
+            if hasattr(mw_instance, 'process_template_response'):
+                self._template_response_middleware.append(
+                    self.adapt_method_mode(is_async, mw_instance.process_template_response)
+                )
+            if hasattr(mw_instance, 'process_exception'):
+                # Django runs the exception stack synchronously
+                self._exception_middleware.append(self.adapt_method_mode(False, mw_instance.process_exception))
+
+            handler = convert_exception_to_response(mw_instance)
+            handler_is_async = middleware_is_async
+
+        handler = self.adapt_method_mode(is_async, handler, handler_is_async)
+        # Assigned last: Django treats it as the "initialised" flag
+        self._middleware_chain = handler
+
+    async def __call__(self, scope, receive, send):
+        await self.handle(scope, receive, send)
+
+
+class GameplayASGIApplication:
+    """Sends the async API paths to AsyncAPIHandler and the rest to Django's handler"""
+
+    def __init__(self):
+        from .asgi_urls import ASYNC_PATHS
+
+        self.async_paths = ASYNC_PATHS
+        self.api_handler = AsyncAPIHandler()
+        self.site_handler = AsyncViewsASGIHandler()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] in self.async_paths:
+            await self.api_handler(scope, receive, send)
+        else:
+            await self.site_handler(scope, receive, send)
+
+
+# What get_asgi_application() does, with the handlers above
+django.setup(set_prefix=False)
+application = GameplayASGIApplication()
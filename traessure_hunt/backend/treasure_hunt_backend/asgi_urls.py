@@ -0,0 +1,29 @@
+"""
+URL configuration used by the ASGI entrypoint (asgi.py).
+
+Same routes as urls.py, except the hot gameplay endpoints are served by the
+async views in authentication/async_views.py, plus the live leaderboard
+stream, which only exists under ASGI.
+"""
+from django.urls import path
+
+from authentication import async_views
+
+from .urls import urlpatterns as wsgi_urlpatterns
+
+# Same URL names as the sync routes they shadow, so metrics label both alike
+async_urlpatterns = [
+    path('api/auth/game/session/', async_views.get_active_session, name='active_session'),
+    path('api/auth/game/level/', async_views.save_level_progress, name='save_level'),
+    path('api/auth/leaderboard/', async_views.get_leaderboard, name='leaderboard'),
+    path('api/auth/questions/public/', async_views.get_public_questions, name='public_questions'),
+    path('api/auth/stream/leaderboard/', async_views.stream_leaderboard, name='stream_leaderboard'),
+]
+
+# Request paths asgi.py hands to its lean API handler (the health probes
+# and metrics need no sessions or CSRF either)
+ASYNC_PATHS = frozenset('/' + str(pattern.pattern) for pattern in async_urlpatterns) | {
+    '/healthz', '/readyz', '/metrics',
+}
+
+urlpatterns = async_urlpatterns + wsgi_urlpatterns
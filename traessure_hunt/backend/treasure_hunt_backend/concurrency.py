@@ -0,0 +1,127 @@
+"""
+Process-wide concurrency limit with a short, bounded wait queue
+
+ConcurrencyLimitMiddleware (middleware.py) admits at most MAX_CONCURRENT_REQUESTS
+requests into the views at once. Up to MAX_QUEUED_REQUESTS more wait, first
+come first served, for at most QUEUE_TIMEOUT seconds each; anything beyond
+that is answered 503 with Retry-After straight away. Admitted requests then
+compete with a bounded number of others for the database and the CPU, so
+their latency stays bounded during a burst instead of every request slowing
+down together.
+
+Sync requests wait on a threading.Event and async ones on a future of their
+event loop; a finishing request hands its slot straight to the oldest waiter.
+"""
+import asyncio
+import threading
+from collections import deque
+
+from django.conf import settings
+
+from . import metrics
+
+
+class _ThreadWaiter:
+    __slots__ = ('event',)
+
+    def __init__(self):
+        self.event = threading.Event()
+
+    def wake(self):
+        self.event.set()
+
+
+class _AsyncWaiter:
+    __slots__ = ('loop', 'future')
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.future = self.loop.create_future()
+
+    def wake(self):
+        self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class ConcurrencyLimiter:
+    """Counting semaphore shared by threads and event loops, with a bounded FIFO queue"""
+
+    def __init__(self, limit, queue_size):
+        self.limit = limit
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiters = deque()
+
+    @property
+    def active(self):
+        return self._active
+
+    @property
+    def queued(self):
+        return len(self._waiters)
+
+    def _enter(self, make_waiter):
+        """Under the lock: True if admitted, False if shed, else the queued waiter"""
+        if self._active < self.limit and not self._waiters:
+            self._active += 1
+            return True
+        if len(self._waiters) >= self.queue_size:
+            return False
+        waiter = make_waiter()
+        self._waiters.append(waiter)
+        return waiter
+
+    def _leave_queue(self, waiter):
+        """A waiter gives up; returns True if it was handed a slot in the meantime"""
+        with self._lock:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                return True
+            return False
+
+    def acquire(self, timeout):
+        with self._lock:
+            waiter = self._enter(_ThreadWaiter)
+        if isinstance(waiter, bool):
+            return waiter
+        if waiter.event.wait(timeout):
+            return True
+        return self._leave_queue(waiter)
+
+    async def aacquire(self, timeout):
+        with self._lock:
+            waiter = self._enter(_AsyncWaiter)
+        if isinstance(waiter, bool):
+            return waiter
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return self._leave_queue(waiter)
+        except asyncio.CancelledError:
+            # Client went away while queued; pass on a slot it was just given
+            if self._leave_queue(waiter):
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                # The slot goes straight to the oldest waiter; _active is unchanged
+                self._waiters.popleft().wake()
+            else:
+                self._active -= 1
+
+
+limiter = ConcurrencyLimiter(settings.MAX_CONCURRENT_REQUESTS, settings.MAX_QUEUED_REQUESTS)
+
+metrics.registry.add_gauge('treasure_hunt_requests_in_flight', 'Requests admitted by the concurrency limiter',
+                           lambda: limiter.active)
+metrics.registry.add_gauge('treasure_hunt_requests_queued', 'Requests waiting for the concurrency limiter',
+                           lambda: limiter.queued)
@@ -0,0 +1,45 @@
+"""
+SQLite database backend tuned for concurrent gameplay writes.
+
+Behaves exactly like Django's built-in sqlite3 backend, plus two OPTIONS:
+
+    'OPTIONS': {
+        # PRAGMA statements applied to every new connection
+        'pragmas': {'journal_mode': 'WAL', 'synchronous': 'NORMAL'},
+        # BEGIN mode for transaction.atomic() - IMMEDIATE takes the write lock
+        # up front, so busy_timeout applies instead of failing on lock upgrade
+        'transaction_mode': 'IMMEDIATE',
+    }
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        # Not sqlite3.connect() arguments - handled by this backend
+        conn_params.pop('pragmas', None)
+        conn_params.pop('transaction_mode', None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict['OPTIONS'].get('pragmas', {}).items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    @property
+    def transaction_mode(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode', 'DEFERRED').upper()
+        if mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"Invalid transaction_mode '{mode}', expected one of {', '.join(TRANSACTION_MODES)}"
+            )
+        return mode
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -0,0 +1,93 @@
+"""
+Liveness and readiness probes
+
+/healthz answers from memory: the process is up and serving requests.
+/readyz also checks that every configured database can be queried, but runs
+that check at most once per READINESS_CACHE_TTL seconds per process, so
+any number of probes (Streamlit sessions, load balancers) cost one query
+per interval. Both accept HEAD and skip DRF, authentication and the ORM.
+"""
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.http import HttpResponse
+from django.views.decorators.http import require_http_methods
+
+HEALTHZ_BODY = b'{"status":"ok"}'
+
+
+def probe_response(request, body, status=200):
+    # HEAD gets the headers only; probes that just check the status skip the body
+    response = HttpResponse(b'' if request.method == 'HEAD' else body, status=status,
+                            content_type='application/json')
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+class ReadinessCheck:
+    """Database ping shared by all threads, repeated only after ``ttl`` seconds"""
+
+    def __init__(self, timer=time.monotonic):
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._result = None
+        self._expires_at = 0.0
+
+    def ping(self):
+        """Return {alias: None or error message} for every configured database"""
+        errors = {}
+        for alias in settings.DATABASES:
+            try:
+                with connections[alias].cursor() as cursor:
+                    # A migrated database, not just a file SQLite could open
+                    cursor.execute('SELECT 1 FROM django_migrations LIMIT 1')
+                    cursor.fetchone()
+                errors[alias] = None
+            except DatabaseError as exc:
+                errors[alias] = str(exc)
+        return errors
+
+    def status(self):
+        """Return (ready, {alias: None or error}); pings when the last result expired"""
+        with self._lock:
+            if self._result is None or self._timer() >= self._expires_at:
+                errors = self.ping()
+                self._result = (all(error is None for error in errors.values()), errors)
+                self._expires_at = self._timer() + settings.READINESS_CACHE_TTL
+            return self._result
+
+    def clear(self):
+        with self._lock:
+            self._result = None
+
+
+readiness = ReadinessCheck()
+
+
+@require_http_methods(['GET', 'HEAD'])
+def healthz(request):
+    """
+    Liveness probe, no database access
+    GET|HEAD /healthz
+    """
+    return probe_response(request, HEALTHZ_BODY)
+
+
+@require_http_methods(['GET', 'HEAD'])
+def readyz(request):
+    """
+    Readiness probe, with the database ping cached for READINESS_CACHE_TTL seconds
+    GET|HEAD /readyz
+    """
+    ready, errors = readiness.status()
+    body = json.dumps({
+        'status': 'ready' if ready else 'unavailable',
+        'databases': {alias: error or 'ok' for alias, error in errors.items()},
+    }).encode()
+    response = probe_response(request, body, status=200 if ready else 503)
+    if not ready:
+        response['Retry-After'] = str(max(1, round(settings.READINESS_CACHE_TTL)))
+    return response
@@ -0,0 +1,227 @@
+"""
+Per-endpoint request metrics, exposed in Prometheus text format at /metrics
+
+MetricsMiddleware (middleware.py) times every request and records, per URL
+name and method: a latency histogram, a histogram of database queries per
+request, total database time, a response size histogram and a count per
+status code. Requests that match no URL are labelled view="unmatched", so
+memory is bounded by the number of routes, never by the paths clients send.
+
+Queries are counted by one execute wrapper installed on each database
+connection, which charges them to the request in the current context
+(a ContextVar, so sync_to_async calls of async views are included).
+
+Requests turned away before reaching a view - throttled (429) or shed by
+the concurrency limiter (503) - are also counted by reason and scope, and the
+limiter's in-flight and queued requests are exported as gauges.
+
+Counters are per process and reset on restart, as Prometheus expects of
+counters; scrape every worker.
+"""
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.views.decorators.http import require_http_methods
+
+# Upper bounds of the histogram buckets (+Inf is implied)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)  # bytes
+
+KNOWN_METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'})
+UNMATCHED = 'unmatched'
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    """Cumulative-on-export histogram: one count per bucket plus sum and count"""
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class EndpointMetrics:
+    __slots__ = ('latency', 'queries', 'query_seconds', 'size', 'statuses')
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.query_seconds = 0.0
+        self.size = Histogram(SIZE_BUCKETS)
+        self.statuses = {}
+
+
+class RequestStats:
+    """Queries charged to one request"""
+    __slots__ = ('queries', 'query_seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+
+
+current_request = contextvars.ContextVar('treasure_hunt_request_stats', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """connection.execute_wrapper() that charges each query to the current request"""
+    stats = current_request.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.query_seconds += time.perf_counter() - started
+
+
+def install_query_recorder(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    install_query_recorder(connection)
+
+
+connection_created.connect(_on_connection_created, dispatch_uid='treasure_hunt_metrics')
+
+
+def install_for_current_thread():
+    """Cover this thread's connections that were opened before the signal handler existed"""
+    for alias in connections:
+        install_query_recorder(connections[alias])
+
+
+class MetricsRegistry:
+    """Thread-safe store of EndpointMetrics keyed by (URL name, method)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._shed = {}
+        self._gauges = {}
+
+    def record(self, view, method, status_code, seconds, stats, size):
+        if method not in KNOWN_METHODS:
+            method = 'other'
+        with self._lock:
+            metrics = self._endpoints.get((view, method))
+            if metrics is None:
+                metrics = self._endpoints[(view, method)] = EndpointMetrics()
+            metrics.latency.observe(seconds)
+            metrics.queries.observe(stats.queries)
+            metrics.query_seconds += stats.query_seconds
+            if size is not None:
+                metrics.size.observe(size)
+            metrics.statuses[status_code] = metrics.statuses.get(status_code, 0) + 1
+
+    def record_shed(self, reason, scope):
+        """Count a request refused before its view ran, e.g. ('throttled', 'login')"""
+        with self._lock:
+            self._shed[(reason, scope)] = self._shed.get((reason, scope), 0) + 1
+
+    def add_gauge(self, name, help_text, read):
+        """Export ``read()`` as gauge ``name`` on every scrape"""
+        self._gauges[name] = (help_text, read)
+
+    def clear(self):
+        with self._lock:
+            self._endpoints.clear()
+            self._shed.clear()
+
+    def render(self):
+        """Prometheus text exposition format"""
+        with self._lock:
+            snapshot = sorted(self._endpoints.items())
+            # Copy under the lock so the output is consistent
+            snapshot = [(key, _copy(metrics)) for key, metrics in snapshot]
+            shed = sorted(self._shed.items())
+
+        lines = []
+        _histogram(lines, 'treasure_hunt_http_request_duration_seconds',
+                   'Request latency by URL name and method', snapshot, 'latency')
+        lines.append('# HELP treasure_hunt_http_responses_total Responses by URL name, method and status code')
+        lines.append('# TYPE treasure_hunt_http_responses_total counter')
+        for (view, method), metrics in snapshot:
+            for status_code, count in sorted(metrics.statuses.items()):
+                lines.append(f'treasure_hunt_http_responses_total{{{_labels(view, method)},status="{status_code}"}} {count}')
+        _histogram(lines, 'treasure_hunt_db_queries_per_request',
+                   'Database queries per request', snapshot, 'queries')
+        lines.append('# HELP treasure_hunt_db_query_duration_seconds_total Time spent in database queries')
+        lines.append('# TYPE treasure_hunt_db_query_duration_seconds_total counter')
+        for (view, method), metrics in snapshot:
+            lines.append(f'treasure_hunt_db_query_duration_seconds_total{{{_labels(view, method)}}} {metrics.query_seconds:.6f}')
+        _histogram(lines, 'treasure_hunt_http_response_size_bytes',
+                   'Response body size (streaming responses not included)', snapshot, 'size')
+        lines.append('# HELP treasure_hunt_shed_requests_total Requests refused before reaching their view')
+        lines.append('# TYPE treasure_hunt_shed_requests_total counter')
+        for (reason, scope), count in shed:
+            lines.append(f'treasure_hunt_shed_requests_total{{reason="{reason}",scope="{scope}"}} {count}')
+        for name, (help_text, read) in sorted(self._gauges.items()):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {_format(read())}')
+        return '\n'.join(lines) + '\n'
+
+
+def _copy(metrics):
+    copy = EndpointMetrics()
+    for name in ('latency', 'queries', 'size'):
+        source, target = getattr(metrics, name), getattr(copy, name)
+        target.counts, target.sum, target.count = list(source.counts), source.sum, source.count
+    copy.query_seconds = metrics.query_seconds
+    copy.statuses = dict(metrics.statuses)
+    return copy
+
+
+def _labels(view, method):
+    return f'view="{view}",method="{method}"'
+
+
+def _format(value):
+    return f'{value:.6f}' if isinstance(value, float) else str(value)
+
+
+def _histogram(lines, name, help_text, snapshot, attribute):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for (view, method), metrics in snapshot:
+        histogram = getattr(metrics, attribute)
+        if not histogram.count:
+            continue
+        labels = _labels(view, method)
+        cumulative = 0
+        for bound, count in zip(histogram.bounds + ('+Inf',), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{labels}}} {_format(histogram.sum)}')
+        lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+
+
+registry = MetricsRegistry()
+
+
+@require_http_methods(['GET'])
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint
+    GET /metrics
+    """
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
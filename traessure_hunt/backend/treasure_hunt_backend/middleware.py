@@ -0,0 +1,147 @@
+"""
+Project-wide middleware for the Treasure Hunt backend
+"""
+import json
+import math
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.middleware.gzip import GZipMiddleware
+
+from . import concurrency, metrics
+
+
+class ThresholdGZipMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that only compresses responses of at least
+    settings.GZIP_MIN_LENGTH bytes (Django's own cut-off is 200). Small JSON
+    bodies such as autosave acknowledgements gain almost nothing from gzip
+    and still cost CPU on both ends. Streaming responses are always
+    compressed, since their size isn't known up front - except event
+    streams, whose messages must reach the client as soon as they're sent.
+    """
+
+    def process_response(self, request, response):
+        if response.get('Content-Type', '').startswith('text/event-stream'):
+            return response
+        if not response.streaming and len(response.content) < settings.GZIP_MIN_LENGTH:
+            return response
+        return super().process_response(request, response)
+
+
+class MetricsMiddleware:
+    """
+    Records latency, database queries, response size and status per URL name
+    (see metrics.py). Sync and async capable, so it adds no thread switches
+    under ASGI. Put it first to time the whole middleware chain.
+
+    With settings.QUERY_COUNT_HEADERS (DEBUG only) each response also reports
+    the request's queries in X-Query-Count and their time in X-DB-Time.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not (settings.METRICS_ENABLED or settings.QUERY_COUNT_HEADERS):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics.install_for_current_thread()
+        stats = metrics.RequestStats()
+        token = metrics.current_request.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.current_request.reset(token)
+        self.record(request, response, time.perf_counter() - started, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = metrics.RequestStats()
+        token = metrics.current_request.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.current_request.reset(token)
+        self.record(request, response, time.perf_counter() - started, stats)
+        return response
+
+    def record(self, request, response, seconds, stats):
+        if settings.QUERY_COUNT_HEADERS:
+            response['X-Query-Count'] = str(stats.queries)
+            response['X-DB-Time'] = f'{stats.query_seconds * 1000:.3f}ms'
+        if not settings.METRICS_ENABLED:
+            return
+        match = request.resolver_match
+        metrics.registry.record(
+            match.url_name if match is not None and match.url_name else metrics.UNMATCHED,
+            request.method,
+            response.status_code,
+            seconds,
+            stats,
+            None if response.streaming else len(response.content),
+        )
+
+
+class ConcurrencyLimitMiddleware:
+    """
+    Admits at most settings.MAX_CONCURRENT_REQUESTS requests at a time,
+    queueing a few more briefly and answering the rest 503 with Retry-After
+    (see concurrency.py). Probes, /metrics and the live leaderboard stream
+    (settings.CONCURRENCY_EXEMPT_PATHS) always go straight through. Sync and
+    async capable; place it right after MetricsMiddleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if settings.MAX_CONCURRENT_REQUESTS <= 0:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if request.path.startswith(settings.CONCURRENCY_EXEMPT_PATHS):
+            return self.get_response(request)
+        limiter = concurrency.limiter
+        if not limiter.acquire(settings.QUEUE_TIMEOUT):
+            return self.shed()
+        try:
+            return self.get_response(request)
+        finally:
+            limiter.release()
+
+    async def __acall__(self, request):
+        if request.path.startswith(settings.CONCURRENCY_EXEMPT_PATHS):
+            return await self.get_response(request)
+        limiter = concurrency.limiter
+        if not await limiter.aacquire(settings.QUEUE_TIMEOUT):
+            return self.shed()
+        try:
+            return await self.get_response(request)
+        finally:
+            limiter.release()
+
+    def shed(self):
+        metrics.registry.record_shed('overloaded', 'global')
+        response = HttpResponse(json.dumps({
+            'success': False,
+            'message': 'Server busy, please retry shortly'
+        }), status=503, content_type='application/json')
+        response['Retry-After'] = str(max(1, math.ceil(settings.QUEUE_TIMEOUT)))
+        return response
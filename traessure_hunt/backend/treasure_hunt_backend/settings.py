@@ -4,8 +4,11 @@ FOSS Treasure Hunt - Backend Configuration
 """
 
 from pathlib import Path
+import copy
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -32,7 +35,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'treasure_hunt_backend.middleware.MetricsMiddleware',
+    'treasure_hunt_backend.middleware.ConcurrencyLimitMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'treasure_hunt_backend.middleware.ThresholdGZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -42,6 +48,17 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Middleware for the async gameplay endpoints under ASGI (see asgi.py): they
+# authenticate by token, so sessions, messages and CSRF are left out
+ASYNC_API_MIDDLEWARE = [
+    'treasure_hunt_backend.middleware.MetricsMiddleware',
+    'treasure_hunt_backend.middleware.ConcurrencyLimitMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'treasure_hunt_backend.middleware.ThresholdGZipMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+    'django.middleware.common.CommonMiddleware',
+]
+
 ROOT_URLCONF = 'treasure_hunt_backend.urls'
 
 TEMPLATES = [
@@ -63,14 +80,63 @@ TEMPLATES = [
 WSGI_APPLICATION = 'treasure_hunt_backend.wsgi.application'
 
 # Database
-# SQLite for development
-DATABASES = {
-    'default': {
+# Pick a profile with TREASURE_HUNT_DB_PROFILE=development|production
+#   development - plain SQLite, one connection per request
+#   production  - WAL journal, tuned pragmas and persistent connections so
+#                 concurrent autosaves don't fail with "database is locked"
+DB_PROFILE = os.environ.get('TREASURE_HUNT_DB_PROFILE', 'development')
+DB_PATH = os.environ.get('TREASURE_HUNT_DB_PATH', str(BASE_DIR / 'treasure_hunt.db'))
+# Tests use an on-disk database so concurrency tests see real SQLite locking
+# (an in-memory shared-cache database fails lock waits instead of blocking)
+TEST_DB_PATH = str(BASE_DIR / 'test_treasure_hunt.db')
+
+DATABASE_PROFILES = {
+    'development': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'treasure_hunt.db',
-    }
+        'NAME': DB_PATH,
+        'TEST': {'NAME': TEST_DB_PATH},
+    },
+    'production': {
+        'ENGINE': 'treasure_hunt_backend.db_backends.sqlite3',
+        'NAME': DB_PATH,
+        'TEST': {'NAME': TEST_DB_PATH},
+        'CONN_MAX_AGE': int(os.environ.get('TREASURE_HUNT_DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Seconds the Python driver waits for a lock before raising
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': {
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',
+                'busy_timeout': int(os.environ.get('TREASURE_HUNT_DB_BUSY_TIMEOUT_MS', 20000)),
+                'mmap_size': 256 * 1024 * 1024,
+                'cache_size': -64000,  # negative = KiB, i.e. 64 MB
+            },
+        },
+    },
+}
+
+if DB_PROFILE not in DATABASE_PROFILES:
+    raise ImproperlyConfigured(f"Unknown TREASURE_HUNT_DB_PROFILE '{DB_PROFILE}', expected one of {list(DATABASE_PROFILES)}")
+
+DATABASES = {
+    'default': DATABASE_PROFILES[DB_PROFILE],
 }
 
+# Optional: move the write-hot gameplay tables (sessions, level progress,
+# leaderboard) into their own SQLite file so question and profile reads never
+# queue behind progress writes. See authentication/routers.py
+SPLIT_GAMEPLAY_DB = os.environ.get('TREASURE_HUNT_SPLIT_DB', '').lower() in ('1', 'true', 'yes')
+
+if SPLIT_GAMEPLAY_DB:
+    DATABASES['gameplay'] = dict(
+        copy.deepcopy(DATABASE_PROFILES[DB_PROFILE]),
+        NAME=os.environ.get('TREASURE_HUNT_GAMEPLAY_DB_PATH', str(BASE_DIR / 'treasure_hunt_gameplay.db')),
+        TEST={'NAME': str(BASE_DIR / 'test_treasure_hunt_gameplay.db')},
+    )
+    DATABASE_ROUTERS = ['authentication.routers.GameplayRouter']
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -87,6 +153,25 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Django's defaults, with PBKDF2-SHA256 iterations set by PASSWORD_HASH_ITERATIONS (authentication/hashers.py)
+PASSWORD_HASHERS = [
+    'authentication.hashers.PolicyPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+# Work factor for new and upgraded hashes; unset = Django's default. Lower it for event accounts
+PASSWORD_HASH_ITERATIONS = int(os.environ.get('TREASURE_HUNT_PASSWORD_ITERATIONS', 0)) or None
+# Re-hash passwords whose hash doesn't match the policy at login; turn off during an event
+PASSWORD_REHASH_ON_LOGIN = os.environ.get('TREASURE_HUNT_PASSWORD_REHASH', '1').lower() not in ('0', 'false', 'no')
+
+# Login password checks (authentication/passwords.py): hashing threads (0 = hash on the
+# request thread), how many more checks may wait, and the longest a login waits for one
+PASSWORD_CHECK_WORKERS = int(os.environ.get('TREASURE_HUNT_PASSWORD_WORKERS', os.cpu_count() or 1))
+PASSWORD_CHECK_QUEUE = int(os.environ.get('TREASURE_HUNT_PASSWORD_QUEUE', 64))
+PASSWORD_CHECK_TIMEOUT = float(os.environ.get('TREASURE_HUNT_PASSWORD_TIMEOUT', 5))  # seconds
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -103,13 +188,93 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'authentication.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # orjson when installed, stdlib json otherwise (authentication/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'authentication.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # Token buckets (authentication/throttling.py): a burst of N, then N per period; empty = off.
+    # Off unless set, except answer checks: short security keys must not be guessable
+    'DEFAULT_THROTTLE_RATES': {
+        'login': os.environ.get('TREASURE_HUNT_THROTTLE_LOGIN') or None,
+        'login_address': os.environ.get('TREASURE_HUNT_THROTTLE_LOGIN_ADDRESS') or None,
+        'save_level': os.environ.get('TREASURE_HUNT_THROTTLE_SAVE_LEVEL') or None,
+        'verify_answer': os.environ.get('TREASURE_HUNT_THROTTLE_VERIFY_ANSWER', '30/min') or None,
+    },
 }
+THROTTLE_MAX_BUCKETS = 10000  # per throttle scope
+
+# In-process token -> user cache used by CachedTokenAuthentication
+TOKEN_CACHE_TTL = int(os.environ.get('TREASURE_HUNT_TOKEN_CACHE_TTL', 60))  # seconds
+TOKEN_CACHE_MAX_SIZE = 10000
+
+# In-process index of normalized answers used by /game/verify/ (authentication/answers.py)
+ANSWER_INDEX_TTL = int(os.environ.get('TREASURE_HUNT_ANSWER_INDEX_TTL', 300))  # seconds
+
+# Responses replayed for repeated Idempotency-Key headers (authentication/idempotency.py)
+IDEMPOTENCY_CACHE_TTL = int(os.environ.get('TREASURE_HUNT_IDEMPOTENCY_TTL', 3600))  # seconds
+IDEMPOTENCY_CACHE_MAX_SIZE = 10000
+
+# In-process cache of the admin level progress aggregates (authentication/aggregates.py)
+PROGRESS_STATS_CACHE_TTL = int(os.environ.get('TREASURE_HUNT_PROGRESS_STATS_TTL', 10))  # seconds
+
+# Opt-in write-behind buffer for level progress saves (authentication/write_behind.py).
+# Buffered saves live in one process until flushed - use a single worker process
+PROGRESS_WRITE_BEHIND = os.environ.get('TREASURE_HUNT_PROGRESS_WRITE_BEHIND', '').lower() in ('1', 'true', 'yes')
+PROGRESS_FLUSH_INTERVAL_MS = int(os.environ.get('TREASURE_HUNT_PROGRESS_FLUSH_INTERVAL_MS', 200))  # 0 = no flusher thread
+PROGRESS_FLUSH_BATCH_SIZE = int(os.environ.get('TREASURE_HUNT_PROGRESS_FLUSH_BATCH_SIZE', 500))
+PROGRESS_BUFFER_MAX_SIZE = int(os.environ.get('TREASURE_HUNT_PROGRESS_BUFFER_MAX_SIZE', 5000))
+
+
+def _lock_wait_seconds(database):
+    """Longest a statement waits for an SQLite lock: PRAGMA busy_timeout, else the driver's timeout"""
+    options = database.get('OPTIONS', {})
+    busy_timeout_ms = options.get('pragmas', {}).get('busy_timeout')
+    return busy_timeout_ms / 1000 if busy_timeout_ms is not None else options.get('timeout', 5)
+
+
+# Rows enter the change feed (authentication/changes.py) once their updated_at is this old.
+# Autocommit writes (outside atomic(), e.g. user.save() at login) stamp updated_at and then
+# may wait up to the lock timeout before committing, so the window must outlast that wait
+# or a row could commit behind a cursor already handed out. Raising busy_timeout widens it.
+DB_LOCK_WAIT_SECONDS = max(_lock_wait_seconds(database) for database in DATABASES.values())
+CHANGE_FEED_SETTLE_SECONDS = DB_LOCK_WAIT_SECONDS + float(os.environ.get('TREASURE_HUNT_CHANGE_FEED_SETTLE_MARGIN', 2))
+
+# Idle live leaderboard streams get a comment line this often, so proxies keep them open
+LEADERBOARD_STREAM_HEARTBEAT = int(os.environ.get('TREASURE_HUNT_STREAM_HEARTBEAT', 15))  # seconds
+
+# /readyz pings the databases at most this often per process (treasure_hunt_backend/health.py)
+READINESS_CACHE_TTL = float(os.environ.get('TREASURE_HUNT_READINESS_TTL', 5))  # seconds
+
+# Per-endpoint latency/query metrics served at /metrics (treasure_hunt_backend/metrics.py)
+METRICS_ENABLED = os.environ.get('TREASURE_HUNT_METRICS', '1').lower() not in ('0', 'false', 'no')
+
+# Debug only: add X-Query-Count / X-DB-Time to every response, so client developers can spot expensive calls
+QUERY_COUNT_HEADERS = DEBUG and os.environ.get('TREASURE_HUNT_QUERY_HEADERS', '').lower() in ('1', 'true', 'yes')
+
+# Load shedding (treasure_hunt_backend/concurrency.py): requests in the views at once per
+# process (0 = no limit, the default), how many more may wait, and for how long before a 503
+MAX_CONCURRENT_REQUESTS = int(os.environ.get('TREASURE_HUNT_MAX_CONCURRENT', 0))
+MAX_QUEUED_REQUESTS = int(os.environ.get('TREASURE_HUNT_MAX_QUEUED', 64))
+QUEUE_TIMEOUT = float(os.environ.get('TREASURE_HUNT_QUEUE_TIMEOUT', 2))  # seconds
+CONCURRENCY_EXEMPT_PATHS = ('/healthz', '/readyz', '/metrics', '/api/auth/stream/')
+
+# Waiting room for login and game start (authentication/admission.py): tickets admitted
+# per second (0 = off), how many are let straight in after a quiet spell, and how long
+# an unused ticket lasts
+ADMISSION_RATE = float(os.environ.get('TREASURE_HUNT_ADMISSION_RATE', 0))
+ADMISSION_BURST = int(os.environ.get('TREASURE_HUNT_ADMISSION_BURST', 20))
+ADMISSION_TICKET_TTL = int(os.environ.get('TREASURE_HUNT_ADMISSION_TICKET_TTL', 600))  # seconds
+ADMISSION_MAX_TICKETS = 100000
+
+# Responses smaller than this many bytes are sent uncompressed
+GZIP_MIN_LENGTH = int(os.environ.get('TREASURE_HUNT_GZIP_MIN_LENGTH', 1024))
 
 # CORS Settings - Allow Streamlit frontend
 CORS_ALLOWED_ORIGINS = [
@@ -4,7 +4,12 @@ URL configuration for treasure_hunt_backend project.
 from django.contrib import admin
 from django.urls import path, include
 
+from . import health, metrics
+
 urlpatterns = [
+    path('healthz', health.healthz, name='healthz'),
+    path('readyz', health.readyz, name='readyz'),
+    path('metrics', metrics.metrics_view, name='metrics'),
     path('admin/', admin.site.urls),
     path('api/auth/', include('authentication.urls')),
 ]
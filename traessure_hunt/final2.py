@@ -5,6 +5,7 @@ from typing import Dict, List, Tuple, Optional
 import time
 import requests
 import json
+import uuid
 import toml
 from auth_manager import JSONAuthManager
 import os
@@ -55,11 +56,17 @@ QUESTIONS: List[Dict] = [
 # ═══════════════════════════════════════════════════════════════════════════════
 # DJANGO API INTEGRATION
 # ═══════════════════════════════════════════════════════════════════════════════
-API_BASE_URL = "http://localhost:8000/api/auth"
+BACKEND_URL = "http://localhost:8000"
+API_BASE_URL = f"{BACKEND_URL}/api/auth"
 
 # Initialize JSON Auth Manager for offline mode
 json_auth = JSONAuthManager("users.json")
 
+
+class AnswerCheckFailed(Exception):
+    """The backend was reached but could not check the answer; the player should retry"""
+
+
 class DjangoAPI:
     """Helper class for Django backend API integration"""
     
@@ -99,15 +106,26 @@ class DjangoAPI:
     def login_user(username: str, password: str) -> Tuple[bool, str, Optional[dict]]:
         """Login user via Django backend or JSON fallback"""
         try:
+            # Waiting room ticket, once the backend has handed one out
+            ticket = (st.session_state.get('admission') or {}).get('ticket')
             response = requests.post(
                 f"{API_BASE_URL}/login/",
                 json={"username": username, "password": password},
+                headers={'Admission-Ticket': ticket} if ticket else {},
                 timeout=5
             )
             
             if response.status_code == 200:
                 data = response.json()
+                # Waiting room on: the ticket this login was admitted with, for the game start
+                data['admission_ticket'] = response.headers.get('Admission-Ticket')
                 return True, data.get('message', 'Login successful'), data
+            elif response.status_code == 503 and response.json().get('ticket'):
+                # Event rush: queued in the waiting room; data holds the ticket and position
+                data = response.json()
+                return False, data.get('message', 'Waiting for your turn'), data
+            elif response.status_code in (429, 503):
+                return False, "Server busy, please try again in a moment", None
             else:
                 return False, "Invalid username or password", None
                 
@@ -118,20 +136,31 @@ class DjangoAPI:
             # Fallback to JSON authentication
             return json_auth.login_user(username, password)
     
+    @staticmethod
+    def admission_status(ticket: str) -> Optional[dict]:
+        """Place in the backend's login waiting room; None if the ticket expired"""
+        try:
+            response = requests.get(f"{API_BASE_URL}/admission/{ticket}/", timeout=5)
+            if response.status_code == 200:
+                return response.json()
+        except:
+            pass
+        return None
+    
     @staticmethod
     def check_backend_status() -> bool:
-        """Check if Django backend is running"""
+        """Check if Django backend is running (liveness probe, no database work)"""
         try:
-            response = requests.get(f"{API_BASE_URL}/achievements/all/", timeout=2)
-            return response.status_code in [200, 401, 403]  # Backend is up
+            response = requests.head(f"{BACKEND_URL}/healthz", timeout=2)
+            return response.status_code == 200
         except:
             return False
     
     @staticmethod
-    def get_questions() -> Optional[List[Dict]]:
-        """Fetch questions from Django backend"""
+    def get_questions(public: bool = False) -> Optional[List[Dict]]:
+        """Fetch questions from Django backend (without answers when public=True)"""
         try:
-            response = requests.get(f"{API_BASE_URL}/questions/", timeout=5)
+            response = requests.get(f"{API_BASE_URL}/questions/{'public/' if public else ''}", timeout=5)
             if response.status_code == 200:
                 data = response.json()
                 return data.get('questions', [])
@@ -148,6 +177,43 @@ class DjangoAPI:
             print(f"❌ Unexpected error when fetching questions: {e}")
             return None
 
+    @staticmethod
+    def verify_answer(level: int, phase: str, answer: str) -> Optional[bool]:
+        """Check a riddle answer ('riddle') or security key ('security') on the
+        backend. Returns None if the backend could not be reached, and raises
+        AnswerCheckFailed if it answered with an error."""
+        try:
+            response = requests.post(
+                f"{API_BASE_URL}/game/verify/",
+                json={"level": level, "phase": phase, "answer": answer},
+                headers={'Authorization': f'Token {st.session_state.auth_token}'} if st.session_state.get('auth_token') else {},
+                timeout=5
+            )
+        except requests.exceptions.ConnectionError:
+            return None
+        except requests.exceptions.RequestException as e:
+            raise AnswerCheckFailed(f"Could not check your answer ({e.__class__.__name__})") from e
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            data = {}
+        if response.status_code == 200 and isinstance(data.get('correct'), bool):
+            return data['correct']
+        message = data.get('message') or data.get('detail') or f"the server returned {response.status_code}"
+        raise AnswerCheckFailed(f"Could not check your answer: {str(message).rstrip('.')}")
+
+    @staticmethod
+    def idempotency_headers(action: str, payload: dict) -> dict:
+        """Idempotency-Key derived from the request, so a Streamlit rerun or
+        retry of the same save is answered from the backend's replay cache"""
+        seed = json.dumps([
+            action, st.session_state.get('backend_session_id'),
+            st.session_state.get('progress_epoch', 0), payload
+        ], sort_keys=True, default=str)
+        return {'Idempotency-Key': str(uuid.uuid5(uuid.NAMESPACE_URL, seed))}
+
     @staticmethod
     def save_progress(username: str, level: int, score: int, hints_used: int = 0, 
                      achievements: list = None, streak: int = 0, max_streak: int = 0,
@@ -156,24 +222,29 @@ class DjangoAPI:
         """Save user's game progress with all stats to backend or JSON"""
         try:
             # Try Django backend first
+            payload = {
+                "username": username,
+                "level": level,
+                "score": score,
+                "hints_used": hints_used,
+                "achievements": achievements or [],
+                "streak": streak,
+                "max_streak": max_streak,
+                "combo_multiplier": combo_multiplier,
+                "perfect_levels": perfect_levels,
+                "wrong_attempts": wrong_attempts
+            }
+            headers = DjangoAPI.idempotency_headers("save_progress", payload)
+            if st.session_state.get('auth_token'):
+                headers['Authorization'] = f'Token {st.session_state.auth_token}'
             response = requests.post(
                 f"{API_BASE_URL}/game/level/",
-                json={
-                    "username": username,
-                    "level": level,
-                    "score": score,
-                    "hints_used": hints_used,
-                    "achievements": achievements or [],
-                    "streak": streak,
-                    "max_streak": max_streak,
-                    "combo_multiplier": combo_multiplier,
-                    "perfect_levels": perfect_levels,
-                    "wrong_attempts": wrong_attempts
-                },
-                headers={'Authorization': f'Token {st.session_state.auth_token}'} if st.session_state.get('auth_token') else {},
+                json=payload,
+                headers=headers,
                 timeout=5
             )
-            return response.status_code == 200
+            # 201 when written, 202 when buffered by the backend's write-behind mode
+            return response.status_code in (200, 201, 202)
         except:
             # Fallback to JSON
             return json_auth.save_progress(
@@ -186,11 +257,14 @@ class DjangoAPI:
         """Mark game as completed permanently to prevent replay"""
         try:
             # Try Django backend first
+            payload = {"username": username}
+            headers = DjangoAPI.idempotency_headers("mark_completed", payload)
+            if st.session_state.get('auth_token'):
+                headers['Authorization'] = f'Token {st.session_state.auth_token}'
             response = requests.post(
                 f"{API_BASE_URL}/game/mark_completed/",
-                json={
-                    "username": username
-                },
+                json=payload,
+                headers=headers,
                 timeout=5
             )
             return response.status_code == 200
@@ -199,37 +273,54 @@ class DjangoAPI:
             return json_auth.mark_game_completed_permanently(username)
     
     @staticmethod
-    def load_progress(username: str) -> Optional[dict]:
-        """Load user's saved game progress from backend or JSON"""
+    def bootstrap() -> Optional[dict]:
+        """Fetch profile, active session, level progress, achievements and the
+        question catalogue version from the backend in one request"""
         try:
-            # Try Django backend first
-            # Get active session first
-            session_response = requests.get(
-                f"{API_BASE_URL}/game/session/",
+            response = requests.get(
+                f"{API_BASE_URL}/game/bootstrap/",
                 headers={'Authorization': f'Token {st.session_state.auth_token}'} if st.session_state.get('auth_token') else {},
                 timeout=5
             )
-            if session_response.status_code == 200:
-                session_data = session_response.json()
-                session_id = session_data.get('session', {}).get('id')
-                if session_id:
-                    # Get progress for this session
-                    response = requests.get(
-                        f"{API_BASE_URL}/game/session/{session_id}/progress/",
-                        headers={'Authorization': f'Token {st.session_state.auth_token}'} if st.session_state.get('auth_token') else {},
-                        timeout=5
-                    )
-                    if response.status_code == 200:
-                        progress_data = response.json().get('progress', [])
-                        if progress_data:
-                            # Find the highest level completed
-                            max_level = max([p.get('level_number', 0) for p in progress_data])
-                            # Return the progress of the highest level
-                            for p in progress_data:
-                                if p.get('level_number') == max_level:
-                                    return p
+            if response.status_code == 200:
+                data = response.json()
+                session = data.get('session') or {}
+                st.session_state.backend_session_id = session.get('id')
+                st.session_state.backend_level = session.get('current_level')
+                st.session_state.questions_version = data.get('questions_version')
+                return data
         except:
             pass
+        return None
+    
+    @staticmethod
+    def start_session(ticket: Optional[str] = None) -> Optional[dict]:
+        """Start a new backend game session at level 0, replacing the active one.
+        During an event rush this needs the waiting room ticket used to log in."""
+        headers = {'Authorization': f'Token {st.session_state.auth_token}'} if st.session_state.get('auth_token') else {}
+        if ticket:
+            headers['Admission-Ticket'] = ticket
+        try:
+            response = requests.post(f"{API_BASE_URL}/game/start/", headers=headers, timeout=5)
+            if response.status_code in (200, 201):
+                session = response.json().get('session') or {}
+                st.session_state.backend_session_id = session.get('id')
+                st.session_state.backend_level = session.get('current_level')
+                return session
+        except:
+            pass
+        return None
+    
+    @staticmethod
+    def load_progress(username: str) -> Optional[dict]:
+        """Load user's saved game progress from backend or JSON"""
+        # Try Django backend first
+        data = DjangoAPI.bootstrap()
+        if data:
+            progress_data = data.get('progress', [])
+            if progress_data:
+                # Return the progress of the highest level completed
+                return max(progress_data, key=lambda p: p.get('level_number', 0))
         
         # Fallback to JSON
         return json_auth.load_progress(username)
@@ -237,28 +328,32 @@ class DjangoAPI:
     @staticmethod
     def clear_progress(username: str) -> bool:
         """Clear user's saved game progress"""
-        try:
-            # Try Django backend first
-            # Get active session first
-            session_response = requests.get(
-                f"{API_BASE_URL}/game/session/",
-                headers={'Authorization': f'Token {st.session_state.auth_token}'} if st.session_state.get('auth_token') else {},
-                timeout=5
-            )
-            if session_response.status_code == 200:
-                session_data = session_response.json()
-                session_id = session_data.get('session', {}).get('id')
-                if session_id:
-                    # Clear all level progress for this session
-                    response = requests.delete(
-                        f"{API_BASE_URL}/game/session/{session_id}/progress/clear/",
-                        headers={'Authorization': f'Token {st.session_state.auth_token}'} if st.session_state.get('auth_token') else {},
-                        timeout=5
-                    )
-                    if response.status_code == 200:
-                        return True
-        except:
-            pass
+        # Try Django backend first, using the session id from the last bootstrap.
+        # A 404 means that session has been replaced since, so refresh it and retry once
+        session_id = st.session_state.get('backend_session_id')
+        for attempt in range(2):
+            if attempt or not session_id:
+                data = DjangoAPI.bootstrap()
+                session_id = (data.get('session') or {}).get('id') if data else None
+            if not session_id:
+                break
+            try:
+                # Clear all level progress for this session
+                response = requests.delete(
+                    f"{API_BASE_URL}/game/session/{session_id}/progress/clear/",
+                    headers={'Authorization': f'Token {st.session_state.auth_token}'} if st.session_state.get('auth_token') else {},
+                    timeout=5
+                )
+            except:
+                break
+            if response.status_code == 200:
+                # Saves after a reset are new requests, even with the same values
+                st.session_state.progress_epoch = st.session_state.get('progress_epoch', 0) + 1
+                # The backend checks answers against the session's level: start over at 0
+                DjangoAPI.start_session()
+                return True
+            if response.status_code != 404:
+                break
         
         # Fallback to JSON
         return json_auth.clear_progress(username)
@@ -1031,19 +1126,22 @@ def init_session_state():
         st.session_state.backend_connected = DjangoAPI.check_backend_status()
         st.session_state.backend_checked = True
     
-    # Load questions from API or use fallback
-    if "questions_loaded" not in st.session_state:
-        if st.session_state.backend_connected:
-            api_questions = DjangoAPI.get_questions()
+    # Load questions from the API once signed in, then again only when the
+    # catalogue version reported by the last bootstrap changes
+    if st.session_state.logged_in and st.session_state.backend_connected:
+        version = st.session_state.get("questions_version")
+        if "questions_loaded_version" not in st.session_state or version != st.session_state.questions_loaded_version:
+            # Answers stay on the backend; they are checked with /game/verify/
+            api_questions = DjangoAPI.get_questions(public=True)
             if api_questions:
                 # Convert API questions to the format expected by the frontend
                 converted_questions = []
                 for q in api_questions:
                     converted_questions.append({
                         "question": q["question"],
-                        "answer": q["answer"],
+                        "answer": None,
                         "security_riddle": q["security_riddle"],
-                        "security_key": q["security_key"],
+                        "security_key": None,
                         "hint": q["hint"],
                         "security_hint": q["security_hint"],
                         "category": q["category"],
@@ -1053,20 +1151,106 @@ def init_session_state():
                 st.session_state.QUESTIONS = converted_questions
                 st.session_state.questions_source = "database"
                 st.success("✅ Questions loaded from database!")
-            else:
+            elif st.session_state.get("questions_source") != "database":
                 st.session_state.QUESTIONS = QUESTIONS  # Fallback to hardcoded
                 st.session_state.questions_source = "fallback"
                 st.warning("⚠️ Using fallback questions - backend connection issue")
-        else:
-            st.session_state.QUESTIONS = QUESTIONS  # Fallback to hardcoded
-            st.session_state.questions_source = "fallback"
+            # Not retried on every rerun: the next version change fetches again
+            st.session_state.questions_loaded_version = version
+    elif "QUESTIONS" not in st.session_state:
+        st.session_state.QUESTIONS = QUESTIONS  # Fallback to hardcoded until signed in
+        st.session_state.questions_source = "fallback"
+        if not st.session_state.backend_connected:
             st.warning("⚠️ Backend server not running - using fallback questions. To enable full functionality, please start the Django backend server.")
-        st.session_state.questions_loaded = True
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # LOGIN SYSTEM - PROFESSIONAL UI/UX
 # ═══════════════════════════════════════════════════════════════════════════════
+def complete_login(username: str, message: str, data: Optional[dict]):
+    """Store the signed-in user, restore saved progress and rerun into the game"""
+    # The waiting room ticket also covers one game start
+    ticket = (st.session_state.pop('admission', None) or {}).get('ticket') or (data or {}).get('admission_ticket')
+    st.session_state.logged_in = True
+    st.session_state.username = username
+    st.session_state.auth_token = data.get('token') if data else None
+    st.session_state.user_id = data.get('user', {}).get('id') if data else None
+    st.session_state.start_time = datetime.now()
+
+    # Load saved progress
+    saved_progress = DjangoAPI.load_progress(username)
+    if saved_progress:
+        st.session_state.level = saved_progress.get('level', 0)
+        st.session_state.score = saved_progress.get('score', 0)
+        st.session_state.hints_used = saved_progress.get('hints_used', 0)
+        st.session_state.achievements = saved_progress.get('achievements', [])
+        st.session_state.streak = saved_progress.get('streak', 0)
+        st.session_state.max_streak = saved_progress.get('max_streak', 0)
+        st.session_state.combo_multiplier = saved_progress.get('combo_multiplier', 1.0)
+        st.session_state.perfect_levels = saved_progress.get('perfect_levels', 0)
+        st.session_state.wrong_attempts = saved_progress.get('wrong_attempts', 0)
+        st.info(f"📥 Progress loaded! Level {st.session_state.level + 1} | 🔥 {st.session_state.streak}x streak")
+
+    # The backend only checks answers for its session's current level, so play from there
+    if st.session_state.auth_token:
+        # None once bootstrap has answered without a session; absent if it couldn't be reached
+        if "backend_session_id" in st.session_state and st.session_state.backend_session_id is None:
+            DjangoAPI.start_session(ticket)
+        elif st.session_state.get('backend_level') is not None:
+            st.session_state.level = st.session_state.backend_level
+
+    # Check if game was completed permanently
+    if saved_progress and saved_progress.get('game_completed_permanently', False):
+        st.session_state.finished = True
+        st.session_state.game_completed_permanently = True
+        st.info("🏆 Game already completed! No replay allowed.")
+
+    st.success(f"✅ {message}")
+    time.sleep(1)
+    st.rerun()
+
+
+def render_waiting_room():
+    """Place in the backend's login waiting room; logs in once the ticket is admitted"""
+    admission = st.session_state.admission
+    st.markdown(f'''
+    <div class="pro-info-box" style="text-align: center;">
+        <h3 style="color: var(--primary-glow); margin-bottom: 10px;">⏳ You're in the waiting room</h3>
+        <p style="font-size: 3rem; font-weight: 900; margin: 10px 0;">#{admission.get('position', '?')}</p>
+        <p style="color: rgba(255,255,255,0.7);">
+            Everyone is logging in at once, so players are let in a few at a time.
+            Estimated wait: ~{admission.get('estimated_wait', 0):.0f}s. Keep this page open.
+        </p>
+    </div>
+    ''', unsafe_allow_html=True)
+    if st.button("✖ Leave the queue", key="leave_waiting_room"):
+        del st.session_state.admission
+        st.rerun()
+    
+    time.sleep(admission.get('retry_after') or 1)
+    status = DjangoAPI.admission_status(admission['ticket'])
+    if status is None:
+        # Ticket expired: the next sign-in attempt joins the back of the line
+        del st.session_state.admission
+        st.warning("⌛ Your place in line expired - please sign in again")
+        return
+    st.session_state.admission = status
+    if not status.get('admitted'):
+        st.rerun()
+    
+    # Our turn: sign in with what the player entered
+    username = st.session_state.get('login_username', '').strip()
+    success, message, data = DjangoAPI.login_user(username, st.session_state.get('login_password', ''))
+    if success:
+        complete_login(username, message, data)
+    elif data and data.get('ticket'):
+        st.session_state.admission = data
+        st.rerun()
+    else:
+        del st.session_state.admission
+        st.error(f"❌ {message}")
+
+
 def render_login_page():
     """Render the professional-grade futuristic login page with enhanced UX"""
     
@@ -1377,39 +1561,18 @@ def render_login_page():
                         success, message, data = DjangoAPI.login_user(username.strip(), password)
                         
                         if success:
-                            # Login successful
-                            st.session_state.logged_in = True
-                            st.session_state.username = username.strip()
-                            st.session_state.auth_token = data.get('token') if data else None
-                            st.session_state.user_id = data.get('user', {}).get('id') if data else None
-                            st.session_state.start_time = datetime.now()
-                            
-                            # Load saved progress
-                            saved_progress = DjangoAPI.load_progress(username.strip())
-                            if saved_progress:
-                                st.session_state.level = saved_progress.get('level', 0)
-                                st.session_state.score = saved_progress.get('score', 0)
-                                st.session_state.hints_used = saved_progress.get('hints_used', 0)
-                                st.session_state.achievements = saved_progress.get('achievements', [])
-                                st.session_state.streak = saved_progress.get('streak', 0)
-                                st.session_state.max_streak = saved_progress.get('max_streak', 0)
-                                st.session_state.combo_multiplier = saved_progress.get('combo_multiplier', 1.0)
-                                st.session_state.perfect_levels = saved_progress.get('perfect_levels', 0)
-                                st.session_state.wrong_attempts = saved_progress.get('wrong_attempts', 0)
-                                st.info(f"📥 Progress loaded! Level {st.session_state.level + 1} | 🔥 {st.session_state.streak}x streak")
-                            
-                            # Check if game was completed permanently
-                            if saved_progress and saved_progress.get('game_completed_permanently', False):
-                                st.session_state.finished = True
-                                st.session_state.game_completed_permanently = True
-                                st.info("🏆 Game already completed! No replay allowed.")
-                            
-                            st.success(f"✅ {message}")
-                            time.sleep(1)
+                            complete_login(username.strip(), message, data)
+                        elif data and data.get('ticket'):
+                            # Backend waiting room: show the place in line until it's our turn
+                            st.session_state.admission = data
                             st.rerun()
                         else:
                             st.error(f"❌ {message}")
             
+            # Polls below the form so the entered username and password are kept
+            if st.session_state.get('admission'):
+                render_waiting_room()
+            
             # Professional Info Box
             st.markdown('''
             <div class="pro-info-box">
@@ -1637,6 +1800,23 @@ def format_time(seconds: float) -> str:
     return f"{minutes}m {secs}s"
 
 
+def is_correct_answer(phase: str, user_input: str) -> bool:
+    """Check the riddle answer (phase "riddle") or security key (phase "security")
+    for the current level. Database questions carry no answers, so they are
+    verified by the backend, falling back to the bundled answers only if it
+    can't be reached. Raises AnswerCheckFailed if the backend answered with an
+    error, since its questions may not match the bundled ones."""
+    level = st.session_state.level
+    key = "answer" if phase == "riddle" else "security_key"
+    expected = st.session_state.QUESTIONS[level].get(key)
+    if expected is None:
+        verified = DjangoAPI.verify_answer(level, phase, user_input)
+        if verified is not None:
+            return verified
+        expected = QUESTIONS[level][key] if level < len(QUESTIONS) else ""
+    return user_input.strip().lower() == expected.lower()
+
+
 def calculate_bonus_points(is_riddle: bool = True) -> int:
     """Calculate bonus points based on performance"""
     bonus = 0
@@ -1786,7 +1966,8 @@ def add_achievement(achievement: str):
 
 def reset_game():
     """Reset all game state for new game"""
-    keys_to_keep = []
+    # The question catalogue is still current until a bootstrap reports a new version
+    keys_to_keep = ["QUESTIONS", "questions_source", "questions_version", "questions_loaded_version"]
     for key in list(st.session_state.keys()):
         if key not in keys_to_keep:
             del st.session_state[key]
@@ -2208,10 +2389,14 @@ else:
                     """, unsafe_allow_html=True)
 
             if submit_btn and answer.strip():
-                user_answer = answer.strip().lower()
-                correct_answer = current_q['answer'].lower()
-
-                if user_answer == correct_answer:
+                try:
+                    riddle_correct = is_correct_answer("riddle", answer)
+                except AnswerCheckFailed as e:
+                    riddle_correct = None
+                    st.warning(f"⚠️ {e}. Your attempt wasn't counted, please submit it again.")
+                if riddle_correct is None:
+                    pass
+                elif riddle_correct:
                     # Correct Answer
                     points = current_q['points']
                     bonus = calculate_bonus_points(is_riddle=True)
@@ -2318,10 +2503,14 @@ else:
                 """, unsafe_allow_html=True)
 
             if security_submit and security_answer.strip():
-                user_security = security_answer.strip().lower()
-                correct_security = current_q['security_key'].lower()
-
-                if user_security == correct_security:
+                try:
+                    key_correct = is_correct_answer("security", security_answer)
+                except AnswerCheckFailed as e:
+                    key_correct = None
+                    st.warning(f"⚠️ {e}. Your attempt wasn't counted, please submit it again.")
+                if key_correct is None:
+                    pass
+                elif key_correct:
                     # Correct Security Key
                     st.session_state.level += 1
                     st.session_state.riddle_solved = False